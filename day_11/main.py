@@ -1,8 +1,13 @@
-from intcode_computer import IntcodeComputer
+import sys
+sys.path.append("..")
 from enum import Enum, IntEnum
 import os
 from time import sleep
 
+from general.intcode_computer.backends import backend
+
+IntcodeComputer = backend("jit")
+
 class RobotMode(Enum):
     GROUNDING = 1
     PAINTING = 2
@@ -5,8 +5,10 @@ from enum import IntEnum
 sys.path.append("..") # Setting top level on path to import modules
 
 # Local Application Imports
-from general.intcode_computer.main import IntcodeComputer
-from general.helpers import trueIfNotNone
+from general.intcode_computer.backends import backend
+from general.intcode_computer.main import Status
+
+IntcodeComputer = backend("jit")
 
 class TileID(IntEnum):
     EMPTY = 0 # No game object in this tile
@@ -98,10 +100,16 @@ class TileFactory:
 class Game:
     """
     Software is the intcode program string
+
+    slice_instructions caps how many instructions the game runs between redraws.
+    Without it, the game runs all the way to its next joystick input every loop.
     """
-    def __init__(self, computer, tile_factory):
+    def __init__(self, computer, tile_factory, slice_instructions=None):
         self.computer = computer
         self.tile_factory = tile_factory
+        self.slice_instructions = slice_instructions
+        # Outputs of a tile that has only been partly output so far
+        self.pending_outputs = []
         self.score = 0
         self.tiles = []
         self.paddle = None
@@ -115,24 +123,28 @@ class Game:
         self.score = score
 
     def loop(self):
-        if self.paddle and self.ball:
+        """
+        Runs the game until it wants joystick input, or for a slice of slice_instructions,
+        drawing every tile it outputs on the way. Returns False once the game has halted.
+        """
+        if self.computer.waiting_for_input and self.paddle and self.ball:
             paddle_position_x = self.paddle.position[0]
             ball_position_x = self.ball.position[0]
             self.computer.set_input_queue([-1 if ball_position_x < paddle_position_x else 0 if ball_position_x == paddle_position_x else 1])
 
-        action_array = [
-                self.computer.process_intcode(), # Get X Position
-                self.computer.process_intcode(), # Get Y Position
-                self.computer.process_intcode()  # Get Tile ID
-        ]
+        status, count = self.computer.run_for(self.slice_instructions, stop_on_output=False)
+        outputs = self.pending_outputs + self.computer.take_outputs()
+        complete = len(outputs) - len(outputs) % 3
+
+        # Every three outputs are the X Position, Y Position and Tile ID of a tile
+        for index in range(0, complete, 3):
+            self.drawTile(*outputs[index:index + 3])
 
-        if not all([ trueIfNotNone(action) for action in action_array ]):
-            ''' Intcode Signal of 999 was processed '''
-            return False
+        self.pending_outputs = outputs[complete:]
 
-        # Converting the output to INT if it's not already int.
-        x, y, tile_id = action_array
+        return status is not Status.HALTED
 
+    def drawTile(self, x, y, tile_id):
         # Game is specifying a new score
         if x == -1 and y == 0:
             self.setScore(tile_id)
@@ -10,7 +10,9 @@ sys.path.append("..")
 # sys.setrecursionlimit(0x100000)
 
 from general.position import Position, Positioned
-from general.intcode_computer.main import IntcodeComputer
+from general.intcode_computer.backends import backend
+
+IntcodeComputer = backend("jit")
 
 """
 Going to try and solve this by creating a movement tree where node
@@ -57,7 +59,6 @@ class Robot(Node):
     """
     def __init__(self, position, memory, distance = 0,command = None, computer = None, computerClass = RobotComputer):
         super().__init__(None, position)
-        self.memory = memory
         self.computer = computer or computerClass(memory)
         self.command = command if command is None else int(command)
         self.distance = distance
@@ -73,6 +74,10 @@ class Robot(Node):
     def __repr__(self):
         return str(self)
 
+    @property
+    def memory(self):
+        return self.computer.instructions
+
     def getDistance(self):
         return self.distance
 
@@ -80,7 +85,7 @@ class Robot(Node):
         return self.value
 
     def copyComputer(self):
-        return copy.copy(self.computer)
+        return self.computer.fork()
 
     def process_movement(self):
         '''
@@ -91,7 +96,6 @@ class Robot(Node):
 
         movementStatus = self.computer.process_intcode()
         self.key = movementStatus
-        self.memory = self.computer.instructions
 
         return movementStatus
 
@@ -230,7 +234,7 @@ def getFirstValidPath(robot, paths= [], visited=[], key=MoveStatus.OXYGEN, minDi
 
         visited = visited.copy()
 
-        newRobot = Robot(position, copiedComputer.instructions, robot.distance + 1, command, copiedComputer)
+        newRobot = Robot(position, None, robot.distance + 1, command, copiedComputer)
         newRobot.setParent(robot)
 
         ## recursively try and find the path
@@ -313,7 +317,7 @@ def buildMap(robot):
             for command in queuedRobot.movements:
                 copiedComputer = queuedRobot.copyComputer()
                 position = createPositionFromMovementCommand(queuedRobot.getPosition(), command)
-                newRobot = Robot(position, copiedComputer.instructions, queuedRobot.distance + 1, command, copiedComputer)
+                newRobot = Robot(position, None, queuedRobot.distance + 1, command, copiedComputer)
                 newRobot.process_movement()
                 # print(newRobot.key)
                 # print(position)
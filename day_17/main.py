@@ -8,9 +8,12 @@ import enum
 import copy
 import re
 
-from general.intcode_computer.main import IntcodeComputer
+from general.intcode_computer.ascii import AsciiComputer
+from general.intcode_computer.backends import backend
 from general.position import Position
 
+IntcodeComputer = backend("jit")
+
 class NeighborDirection(enum.Enum):
     NORTH = Position(0, -1)
     EAST = Position(1, 0)
@@ -187,60 +190,31 @@ def cameraView( computer, printOut=False ):
     Builds a graph of what the camera currently sees.
     Root is at the initial position, (0,0)
     '''
-    position_x = 0
-    position_y = 0
-    locations = {}
-    while True:
-        charCode = computer.process_intcode()
-        # print(charCode)
-        if not charCode:
-            break
-
-        if charCode == 10:
-            position_y += 1
-            position_x = 0
-            if printOut:
-                print("\n")
-            continue
-
-        currentPosition = Position(position_x, position_y)
-
-        '''
-        When reaching end of all processing. Our charcode will actually be a large, non ASCII value.
-        This could make setting our currentLocation raise an error
-        '''
-        try:
-            currentLocation = Location(currentPosition, charCode)
-        except ValueError:
-            return charCode
+    camera = AsciiComputer(computer)
+    # The whole camera feed comes back as the first frame of text
+    view = next(camera.frames(), "")
 
-        locations[currentPosition] = currentLocation
+    if printOut:
+        print(view)
 
-        westPosition = Position(position_x - 1, position_y)
-
-        if westPosition in locations:
-            currentLocation.addNeighbor(locations[westPosition])
-            locations[westPosition].addNeighbor(currentLocation)
-
-        northPosition = Position(position_x, position_y - 1)
-        if northPosition in locations:
-            currentLocation.addNeighbor(locations[northPosition])
-            locations[northPosition].addNeighbor(currentLocation)
-
-        eastPosition = Position(position_x + 1, position_y)
-        if eastPosition in locations:
-            currentLocation.addNeighbor(locations[eastPosition])
-            locations[eastPosition].addNeighbor(currentLocation)
-
-        southPosition = Position(position_x, position_y + 1)
-        if southPosition in locations:
-            currentLocation.addNeighbor(locations[southPosition])
-            locations[southPosition].addNeighbor(currentLocation)
-
-        if printOut:
-            print(chr(charCode), end=" ")
+    '''
+    When the robot is done collecting dust, the amount collected comes out as a large, non ASCII value.
+    '''
+    if camera.values:
+        return camera.values[-1]
 
-        position_x += 1
+    locations = {}
+    for position_y, line in enumerate(view.split("\n")):
+        for position_x, character in enumerate(line):
+            currentPosition = Position(position_x, position_y)
+            currentLocation = Location(currentPosition, ord(character))
+            locations[currentPosition] = currentLocation
+
+            # Everything to the west and north of us is already in the graph
+            for neighborPosition in [ Position(position_x - 1, position_y), Position(position_x, position_y - 1) ]:
+                if neighborPosition in locations:
+                    currentLocation.addNeighbor(locations[neighborPosition])
+                    locations[neighborPosition].addNeighbor(currentLocation)
 
     return locations[Position(0,0)]
 
@@ -385,16 +359,6 @@ def convertMoveFunctionsToStrings(moveFns):
 
     return stringPatterns
 
-def convertToASCII(initial):
-    return [ord(char) for char in list(initial)] + [ord("\n")]
-
-def convertMoveFunctionsToASCII(moveFns):
-    returnValue = []
-    for fn in moveFns:
-        returnValue += convertToASCII(fn)
-    return returnValue
-    # return [ convertToASCII(function) for function in moveFns ]
-
 def createMainRoutine( patterns, path ):
     mainRoutine = path
     patterns = sorted(patterns, key=lambda arr: len(arr), reverse=True)
@@ -445,16 +409,12 @@ if __name__ == "__main__":
 
     moveFunctions = convertMoveFunctionsToStrings(moveFunctions)
     mainRoutine = createMainRoutine(moveFunctions, path)
-    convertedMoveFunctions = convertMoveFunctionsToASCII(moveFunctions)
-    convertedMainRoutine = convertToASCII(mainRoutine)
     print(mainRoutine)
-    print(convertedMoveFunctions)
-    print(convertedMainRoutine)
-    print(convertedMainRoutine + convertedMoveFunctions)
 
     # print(instructions)
     newComputer = IntcodeComputer(instructions, True, True, True, False, True, False)
-    newComputer.set_input_queue(convertedMainRoutine + convertedMoveFunctions + [110, 10])
+    # Lines are queued as ASCII codes, "n" turning the video feed off
+    AsciiComputer(newComputer).send(mainRoutine, *moveFunctions, "n")
     dustCollected = cameraView(newComputer, True)
     print(f"Dust Collected: {dustCollected}")
 
@@ -25,6 +25,9 @@ Opcodes (like 1, 2, or 99) mark the beginning of an instruction. The values used
 The address of the current instruction is called the instruction pointer; it starts at 0. After an instruction finishes, the instruction pointer increases by the number of values in the instruction; until you add more instructions to the computer, this is always 4 (1 opcode + 3 parameters) for the add and multiply instructions. (The halt instruction would increase the instruction pointer by 1, but it halts the program instead.)
 '''
 import sys
+sys.path.append("..")
+
+from general.intcode_computer.symbolic import SymbolicIntcodeComputer, solve
 
 def assertEquals( target, guess ):
     '''
@@ -109,27 +112,17 @@ if __name__ == '__main__':
     input_intcode_file = open('input.txt', 'r')
 
     with input_intcode_file:
-        input_intcode = input_intcode_file.read()
-        verb = 0
-        noun = 0
-        output = 0
-
-        while True:
-            initialized = [int(val) for val in input_intcode.split(",")]
-            initialized[1] = noun
-            initialized[2] = verb
-
-            processed_intcode = process_intcode(",".join([str(val) for val in initialized]))
-            output = [int(val) for val in processed_intcode.split(",")][0]
-            print(output)
-            if output == 19690720:
-                break;
-
-            verb += 1
-
-            if verb == 100:
-                verb = 0
-                noun += 1
+        input_intcode = input_intcode_file.read().strip()
+
+    # Noun goes into address 1 and verb into address 2. Run the program once with both of them
+    # unknown, which leaves the expression of noun and verb it computes at address 0, then
+    # solve that for 19690720 instead of trying every noun and verb.
+    computer = SymbolicIntcodeComputer(input_intcode, False, False, True, symbols={ 1: "noun", 2: "verb" })
+    computer.run_until_input_needed()
+    print(f"Address 0 = {computer.memory[0]}")
+
+    solution = solve(computer.memory[0], 19690720, { "noun": range(100), "verb": range(100) })
+    noun, verb = solution["noun"], solution["verb"]
 
 
     '''
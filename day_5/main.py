@@ -0,0 +1,32 @@
+import sys
+sys.path.append("..")
+
+from general.intcode_computer.backends import backend
+from general.intcode_computer.memo import RunCache
+
+# The diagnostic program is over in a few hundred instructions, too few for the JIT to pay off
+IntcodeComputer = backend("dispatch")
+
+if __name__ == '__main__':
+    # ex_1 & ex_2 take an input and output 0 if the input was 0, 1 if it was non-zero
+    for example in ['ex_1.txt', 'ex_2.txt']:
+        with open(example) as f:
+            instructions = f.read()
+            assert IntcodeComputer(instructions, True, True).run_until_halt([0]) == [0]
+            assert IntcodeComputer(instructions, True, True).run_until_halt([5]) == [1]
+
+    # ex_3 outputs 999 if the input is below 8, 1000 if it's equal to 8 and 1001 if it's greater than 8
+    with open('ex_3.txt') as f:
+        instructions = f.read()
+        for value, expected in [(7, 999), (8, 1000), (9, 1001)]:
+            assert IntcodeComputer(instructions, True, True).run_until_halt([value]) == [expected]
+
+    with open('input.txt') as f:
+        instructions = f.read()
+
+    # System 1 is the ship's air conditioner, system 5 its thermal radiator controller.
+    # Set INTCODE_RUN_CACHE to a directory to have reruns come straight from disk.
+    runs = RunCache()
+    for system_id in [1, 5]:
+        outputs, computer = runs.run(instructions, [system_id])
+        print(f"Diagnostic code for system {system_id}: {outputs[-1]}")
@@ -1,8 +1,18 @@
-from intcode_computer import IntcodeComputer
+import sys
+sys.path.append("..")
+
+from general.intcode_computer.backends import backend
+from general.intcode_computer.sweep import sweep, run_amplifiers
+from general.intcode_computer.memo import RunCache
+from general.intcode_computer.scheduler import Scheduler
+from general.intcode_computer.image import ProgramImage
 from assertions import assertEquals
 import uuid
 import itertools
 
+# Amplifier programs only run a few dozen instructions at a time, too few for the JIT to pay off
+IntcodeComputer = backend("dispatch")
+
 def get_computer_output( computer, instruction_1, instruction_2 = 0):
     '''
     Need to take in a phase setting and provide it and an
@@ -53,17 +63,21 @@ def process_amplifiers( amplifiers, previous_amplifier_output = 0):
     )
 
 def feedback_loop_sequence( amplifiers ):
-    def feedback_loop(previous, current=0, count=0):
-        if current is None:
-            return previous
-
-        return feedback_loop(
-            current,
-            process_amplifiers(amplifiers , current),
-            count + 1
-        )
+    '''
+    Runs the amplifiers in a loop, each one's output going into the next, until they've all halted.
+    The scheduler takes turns running them, so long loops don't grow the stack.
+    '''
+    scheduler = Scheduler()
+    machines = [ scheduler.add(amp.computer, [amp.phase]) for amp in amplifiers ]
 
-    return feedback_loop(0)
+    for source, target in zip(machines, machines[1:] + machines[:1]):
+        scheduler.connect(source, target)
+
+    scheduler.send(machines[0], 0)
+    scheduler.run()
+
+    # The last amplifier's final signal ends up waiting in the first one's channel
+    return machines[0].channel.items[-1]
 
 def generate_phase_sequences( min_phase_setting, max_phase_setting, phase_sequence_len = 5 ):
     '''
@@ -147,11 +161,13 @@ def computer_factory(instructions, params={}, type="default"):
         return AmplifierController( instructions, test, False, debug )
 
 def partial_computer_factory(instructions, params={}):
-    return lambda comp_type='default': computer_factory(instructions, params, comp_type )
+    # Parsed once here, every computer the factory makes boots straight from the image
+    image = ProgramImage(instructions)
+    return lambda comp_type='default': computer_factory(image, params, comp_type )
 
 class AmplifierController(IntcodeComputer):
     def __init__(self, instructions, test=False, persist=False, debug=False):
-        super().__init__(instructions, True, True, persist, test, debug)
+        super().__init__(instructions, True, True, persist, test, debug=debug)
         self.name = str(uuid.uuid4())
 
 if __name__ == '__main__':
@@ -193,7 +209,20 @@ if __name__ == '__main__':
         assertEquals(18216, get_max_feedback_loop_output(factory))
 
     with open('input.txt') as f:
-        factory = partial_computer_factory(f.read())
+        instructions = f.read()
+        # Amplifiers in series. Every permutation starting with the same phases feeds the same
+        # signals through them, so those runs come straight out of the cache.
+        runs = RunCache()
+        best = 0
+        for phases in generate_phase_sequences(0, 4):
+            signal = 0
+            for phase in phases:
+                signal = runs.run(instructions, [phase, signal])[0][-1]
+            best = max(best, signal)
+        print("Max Series Output")
+        print(best)
+
+        # Every phase setting permutation, spread over all of the cores
         print("Max Output")
-        print(get_max_feedback_loop_output(factory))
+        print(sweep(instructions, itertools.permutations(range(5, 10)), run_amplifiers, reduce=max))
 
@@ -0,0 +1,44 @@
+import sys
+sys.path.append("..")
+
+from general.intcode_computer.backends import backend
+from general.intcode_computer.memo import RunCache
+from assertions import assertEquals
+
+IntcodeComputer = backend("jit")
+
+if __name__ == '__main__':
+    ''' Blackbox testing '''
+    test2 = IntcodeComputer("1,0,0,0,99", False, False, True, True)
+    assertEquals("2,0,0,0,99", test2.process_intcode())
+    test3 = IntcodeComputer("2,3,0,3,99", False, False, True, True)
+    assertEquals("2,3,0,6,99", test3.process_intcode())
+    test4 = IntcodeComputer("2,4,4,5,99,0", False, False, True, True)
+    assertEquals("2,4,4,5,99,9801", test4.process_intcode())
+    test5 = IntcodeComputer("1,1,1,4,99,5,6,0,99", False, False, True, True)
+    assertEquals("30,1,1,4,2,5,6,0,99", test5.process_intcode())
+
+    # Outputs a copy of itself
+    with open('test_1.txt', 'r') as f:
+        instructions = f.read().strip()
+        test6 = IntcodeComputer(instructions, True, True, False, False, True)
+        assertEquals(instructions, ",".join(str(value) for value in test6.run_until_halt()))
+
+    # Outputs a 16 digit number
+    with open('test_2.txt', 'r') as f:
+        test7 = IntcodeComputer(f.read(), True, True, False, False, True)
+        assertEquals(16, len(str(test7.run_until_halt()[0])))
+
+    # Outputs the large number in the middle
+    with open('test_3.txt', 'r') as f:
+        test8 = IntcodeComputer(f.read(), True, True, False, False, True)
+        assertEquals([1125899906842624], test8.run_until_halt())
+
+    with open('input.txt', 'r') as f:
+        instructions = f.read()
+
+    # Test mode (1) and sensor boost mode (2).
+    # Set INTCODE_RUN_CACHE to a directory to have reruns come straight from disk.
+    runs = RunCache(backend_name="jit")
+    print(f"BOOST keycode: {runs.run(instructions, [1])[0]}")
+    print(f"Distress signal coordinates: {runs.run(instructions, [2])[0]}")
@@ -0,0 +1,303 @@
+'''
+Ahead of time compiler for Intcode programs.
+
+transpile() disassembles the program (see disassembler.py) and turns the code reachable
+from address 0 into a Python module holding one function per block, generated the same
+way JitIntcodeComputer generates them. Blocks start at the disassembler's basic blocks
+(address 0, jump targets, right after jumps and the return addresses calls push) and right
+after every input and output, which is everywhere execution can come back to after leaving
+a block.
+
+Writes with a position mode target are known before the program runs, and parameters
+they land on are volatile from the start (see JitIntcodeComputer). So are the addresses
+the caller patches before running, such as day 2's noun and verb:
+
+	AotIntcodeComputer(instructions, persistence=True, patched_addresses=[1, 2])
+
+Writes landing on the opcode of compiled code are handled the same way as in the JIT:
+the block bails out and is thrown away, and that region of the program goes back to the
+interpreter (and the JIT, if it gets hot).
+
+Generated modules and their bytecode are cached on disk, keyed by the hash of the program,
+so every run of the same program after the first one skips straight to compiled code:
+
+	python3 -m general.intcode_computer.aot day_9/input.txt
+
+	computer = AotIntcodeComputer(instructions, True, True, True, False, True)
+	computer.run_until_halt([2])
+
+Patching a program before running it has to go through IntcodeComputer.store rather
+than writing to memory directly, so compiled code that depends on it gets thrown away.
+'''
+import importlib.util
+import os
+import py_compile
+import sys
+
+from general.intcode_computer.main import build_intcode_array
+from general.intcode_computer.image import program_hash
+from general.intcode_computer.disassembler import analyze
+from general.intcode_computer.instructions import Opcode, NEGATIVE_ADDRESS
+from general.intcode_computer.jit import JitIntcodeComputer, JUMPS
+
+CACHE_DIRECTORY = os.environ.get("INTCODE_AOT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "intcode_aot"))
+
+# Instructions execution can only come back from at the following instruction
+RETURNS_AFTER = frozenset([ Opcode.INPUT, Opcode.OUTPUT ])
+
+# Loaded programs by cache key, as tuples of (module, state installed on every computer running it)
+LOADED = {}
+
+# Program hashes by instructions string, so booting the same program again doesn't hash it again
+HASHES = {}
+
+# Bumped whenever the generated code changes, so modules cached by older versions aren't loaded
+FORMAT_VERSION = 2
+
+def cache_key(digest, patched_addresses=()):
+	'''
+	Name of the compiled module for a program hash and set of patched addresses
+	'''
+	key = f"intcode_v{FORMAT_VERSION}_{digest[:32]}"
+
+	if patched_addresses:
+		key += "_" + "_".join(str(address) for address in sorted(patched_addresses))
+
+	return key
+
+def find_blocks(computer, disassembly):
+	'''
+	Works out where compiled blocks start, from the program's disassembly.
+	Returns the instruction addresses of every block, by start address.
+	'''
+	memory = list(disassembly.memory)
+	pending = []
+
+	# Execution enters compiled code at the start of basic blocks, and comes back
+	# from the interpreter right after inputs and outputs. Blocks whose opcodes get
+	# written over are compiled too, they bail out and are thrown away when that happens.
+	for start, block in disassembly.blocks.items():
+		pending.append(start)
+		pending += [ instruction.address + instruction.length for instruction in block.instructions if instruction.opcode in RETURNS_AFTER ]
+
+	blocks = {}
+
+	while pending:
+		start = pending.pop()
+
+		if start in blocks:
+			continue
+
+		generated = computer.block_source(memory, start)
+		blocks[start] = [] if generated is None else generated[1]
+
+		# Blocks cut short by max_block_instructions carry on in another one
+		if generated is not None:
+			last = disassembly.instructions[generated[1][-1]]
+			if last.opcode not in JUMPS:
+				pending.append(last.address + last.length)
+
+	return { start: pointers for start, pointers in blocks.items() if pointers }
+
+def transpile(instructions, patched_addresses=()):
+	'''
+	Returns the source of the Python module running the Intcode program
+	'''
+	disassembly = analyze(instructions)
+	computer = JitIntcodeComputer(instructions)
+	blocks = find_blocks(computer, disassembly)
+
+	# Operand cells of the compiled code that get written to
+	writes = disassembly.self_modifying | set(patched_addresses)
+	computer.volatile_addresses = set()
+
+	for pointers in blocks.values():
+		for pointer in pointers:
+			instruction = disassembly.instructions[pointer]
+			computer.volatile_addresses.update(writes.intersection(range(pointer + 1, pointer + instruction.length)))
+
+	functions = []
+	table = []
+
+	for start in sorted(blocks):
+		source, pointers = computer.block_source(list(disassembly.memory), start)
+		functions.append(source)
+		table.append(f"	{start}: (block_{start}, {tuple(pointers)!r}),")
+
+	return "\n".join([
+		"'''",
+		"Generated by general.intcode_computer.aot. Do not edit.",
+		"'''",
+		f"PROGRAM_HASH = {program_hash(disassembly.memory)!r}",
+		f"NEGATIVE_ADDRESS = {NEGATIVE_ADDRESS!r}",
+		f"VOLATILE_ADDRESSES = frozenset({sorted(computer.volatile_addresses)!r})",
+		"",
+	] + [ function + "\n" for function in functions ] + [
+		"# Compiled blocks by start address, with the addresses of their instructions",
+		"BLOCKS = {",
+	] + table + [
+		"}",
+		"",
+	])
+
+def compile_program(instructions, cache_directory=CACHE_DIRECTORY, patched_addresses=()):
+	'''
+	Transpiles the program into the cache unless it's already there. Returns the module's path.
+	'''
+	key = cache_key(program_hash(build_intcode_array(instructions)), patched_addresses)
+	path = os.path.join(cache_directory, f"{key}.py")
+
+	if not os.path.exists(path):
+		os.makedirs(cache_directory, exist_ok=True)
+		partial = f"{path}.{os.getpid()}.tmp"
+
+		with open(partial, "w") as f:
+			f.write(transpile(instructions, patched_addresses))
+
+		os.replace(partial, path)
+
+	# Write the bytecode out even when Python has been told not to, compiling
+	# a big program's module takes longer than running it
+	if not os.path.exists(importlib.util.cache_from_source(path)):
+		py_compile.compile(path, doraise=True)
+
+	return path
+
+def load_program(instructions, cache_directory=CACHE_DIRECTORY, patched_addresses=()):
+	'''
+	Returns the cache key and compiled module of the program, compiling it first if needed
+	'''
+	digest = HASHES.get(instructions)
+
+	if digest is None:
+		digest = HASHES[instructions] = program_hash(build_intcode_array(instructions))
+
+	key = cache_key(digest, patched_addresses)
+
+	if key not in LOADED:
+		path = compile_program(instructions, cache_directory, patched_addresses)
+		spec = importlib.util.spec_from_file_location(key, path)
+		module = importlib.util.module_from_spec(spec)
+		spec.loader.exec_module(module)
+		LOADED[key] = ( module, None )
+
+	return key, LOADED[key][0]
+
+class AotIntcodeComputer(JitIntcodeComputer):
+	'''
+	Same as JitIntcodeComputer, but starts out with the program's ahead of time compiled blocks.
+
+	@param list patched_addresses	- Addresses the caller writes to before running the program.
+	'''
+	cache_directory = CACHE_DIRECTORY
+
+	def __init__(self, *args, patched_addresses=(), **kwargs):
+		self.patched_addresses = tuple(patched_addresses)
+		super().__init__(*args, **kwargs)
+
+	def load_memory(self):
+		memory = super().load_memory()
+		key, module = load_program(str(self._instructions), self.cache_directory, self.patched_addresses)
+		installed = LOADED[key][1]
+
+		if installed is None:
+			self.volatile_addresses = set(module.VOLATILE_ADDRESSES)
+
+			for start, ( function, pointers ) in module.BLOCKS.items():
+				for pointer in pointers:
+					if pointer not in self.decoded:
+						self.decode_instruction(memory, pointer)
+
+				self.add_block(start, function, pointers)
+
+			installed = ( self.decoded, self.decoded_addresses, self.compiled, self.blocks_by_instruction, self.volatile_addresses )
+			LOADED[key] = ( module, installed )
+
+		# Every computer running the program gets its own copy of the installed state
+		decoded, decoded_addresses, compiled, blocks_by_instruction, volatile_addresses = installed
+		self.decoded = decoded.copy()
+		self.decoded_addresses = decoded_addresses.copy()
+		self.compiled = compiled.copy()
+		self.blocks_by_instruction = blocks_by_instruction.copy()
+		self.volatile_addresses = volatile_addresses.copy()
+
+		return memory
+
+if __name__ == '__main__':
+	if sys.argv[1:]:
+		for filename in sys.argv[1:]:
+			with open(filename) as f:
+				print(compile_program(f.read()))
+		sys.exit()
+
+	import itertools
+	import tempfile
+
+	from general.intcode_computer.main import IntcodeComputer
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	def read_program(day, filename="input.txt"):
+		with open(os.path.join(repository, day, filename)) as f:
+			return f.read()
+
+	with tempfile.TemporaryDirectory() as cache_directory:
+		AotIntcodeComputer.cache_directory = cache_directory
+
+		''' Compiled programs give the same results as the interpreter '''
+		instructions = read_program("day_9")
+
+		for boost_input in [1, 2]:
+			interpreted = IntcodeComputer(instructions, True, True, True, False, True)
+			compiled = AotIntcodeComputer(instructions, True, True, True, False, True)
+			assert interpreted.run_until_halt([boost_input]) == compiled.run_until_halt([boost_input])
+			assert interpreted.process_count == compiled.process_count
+
+		# Compiled once, then loaded from the cache
+		modules = [ filename for filename in os.listdir(cache_directory) if filename.endswith(".py") ]
+		assert modules == [ cache_key(program_hash(build_intcode_array(instructions))) + ".py" ]
+
+		''' Day 7 amplifier permutations '''
+		def amplify(computer_class, instructions, phases):
+			signal = 0
+			for phase in phases:
+				signal = computer_class(instructions, True, True).run_until_halt([phase, signal])[0]
+			return signal
+
+		instructions = read_program("day_7")
+		assert max(amplify(AotIntcodeComputer, instructions, phases) for phases in itertools.permutations(range(5))) == \
+			max(amplify(IntcodeComputer, instructions, phases) for phases in itertools.permutations(range(5)))
+
+		''' Day 2 noun and verb are written over the first instruction '''
+		instructions = read_program("day_2")
+
+		def gravity_assist(computer_class, noun, verb, **kwargs):
+			computer = computer_class(instructions, False, False, True, **kwargs)
+			computer.boot()
+			computer.store(computer.memory, 1, noun)
+			computer.store(computer.memory, 2, verb)
+			computer.resume()
+			return computer.memory[0]
+
+		for noun, verb in [ (12, 2), (0, 0), (99, 99), (64, 21) ]:
+			expected = gravity_assist(IntcodeComputer, noun, verb)
+			assert gravity_assist(AotIntcodeComputer, noun, verb) == expected
+			assert gravity_assist(AotIntcodeComputer, noun, verb, patched_addresses=[1, 2]) == expected
+
+		''' Parameters that get written over are read from memory '''
+		program = "1001,30,1,30,1008,30,50,31,1006,31,15,1101,0,2,2,1007,30,101,31,1005,31,0,99,0,0,0,0,0,0,0,0,0"
+		compiled = AotIntcodeComputer(program, False, False, True, True)
+		interpreted = IntcodeComputer(program, False, False, True, True)
+		assert compiled.process_intcode() == interpreted.process_intcode()
+		assert compiled.process_count == interpreted.process_count
+		key, module = load_program(program, cache_directory)
+		assert 0 in module.BLOCKS
+		assert module.VOLATILE_ADDRESSES == {2}
+
+		''' Code whose opcode gets written over is left to the interpreter '''
+		# Turns the add at 8 into a multiply before jumping to it
+		program = "1101,0,2,8,1105,1,8,99,1,9,9,9,4,9,99"
+		compiled = AotIntcodeComputer(program, True, True, True, False)
+		assert compiled.run_until_halt() == IntcodeComputer(program, True, True, True, False).run_until_halt() == [81]
+		assert 8 not in compiled.compiled
+		assert 0 in compiled.compiled
@@ -0,0 +1,196 @@
+'''
+Line based text I/O for Intcode programs that talk ASCII.
+
+Text mode programs (day 17's vacuum robot and friends) read their input and write their
+output one character code at a time. AsciiComputer wraps a computer so lines go in as
+strings or bytes and come back out decoded, without any per character work in Python:
+
+	robot = AsciiComputer(IntcodeComputer(instructions, True, True, True, False, True))
+	camera = next(robot.frames())
+
+	robot.send("A,B,A,A,B,C,B,C,C,B", "L,12,R,8,L,6,R,8,L,6", ...)
+	transcript = robot.read()
+	dust, = robot.values
+
+Input is encoded in bulk and queued as is, a newline being added to lines missing one.
+Output is taken off the computer a run at a time and decoded with a single bytes() call,
+partial lines staying buffered until the rest of them turns up. Values that aren't ASCII
+(the dust count above) can't be text, so they're kept apart in values.
+
+lines() and frames() are generators running the computer as they go, a frame being the
+lines up to a blank one. By default the computer runs until it needs input or halts before
+anything is handed out. Giving slice_instructions runs it that many instructions at a time
+instead, so text streams out while the program is still going.
+'''
+from collections import deque
+
+from general.intcode_computer.main import Status
+
+NEWLINE = "\n"
+
+class AsciiComputer:
+	'''
+	@param IntcodeComputer computer 	- Computer running a text mode program.
+	@param int slice_instructions 	- Instructions run between looks at the output. None runs until the program stops.
+	'''
+	def __init__(self, computer, slice_instructions=None):
+		self.computer = computer
+		self.slice_instructions = slice_instructions
+		# Complete lines output that haven't been handed out yet, without their newline
+		self.pending = deque()
+		# Text output after the last newline
+		self.partial = ""
+		# Output values that aren't ASCII, in the order they were output
+		self.values = []
+		# Status of the last run, None when there is input it hasn't seen yet
+		self.status = None
+
+	@property
+	def halted(self):
+		return self.computer.halted
+
+	@property
+	def stopped(self):
+		'''
+		The computer won't output anything else until it's sent more input, if ever
+		'''
+		return self.status is not None and self.status is not Status.BUDGET_EXHAUSTED
+
+	def send(self, *lines):
+		'''
+		Queues lines of input, given as str or bytes
+		'''
+		for line in lines:
+			if isinstance(line, str):
+				line = line.encode("ascii")
+
+			if not line.endswith(b"\n"):
+				line += b"\n"
+
+			# Iterating bytes gives their character codes, so the whole line is queued at once
+			self.computer.queue_input(line)
+
+		self.status = None
+		return self
+
+	def run(self):
+		'''
+		Runs the computer for a slice, buffering what it outputs. Returns the run's Status.
+		'''
+		self.status, count = self.computer.run_for(self.slice_instructions, None, False)
+		self.decode(self.computer.take_outputs())
+		return self.status
+
+	def decode(self, outputs):
+		if not outputs:
+			return
+
+		try:
+			text = bytes(outputs).decode("ascii")
+		except ValueError:
+			text = bytes([ value for value in outputs if 0 <= value < 128 ]).decode("ascii")
+			self.values.extend([ value for value in outputs if not 0 <= value < 128 ])
+
+		*complete, self.partial = (self.partial + text).split(NEWLINE)
+		self.pending.extend(complete)
+
+	def lines(self):
+		'''
+		Yields lines of output as they're completed, running the computer until it stops.
+		Text after the last newline is handed out as a line of its own once the computer stops.
+		'''
+		pending = self.pending
+
+		while True:
+			while pending:
+				yield pending.popleft()
+
+			if self.stopped:
+				break
+
+			self.run()
+
+		if self.partial:
+			partial, self.partial = self.partial, ""
+			yield partial
+
+	def frames(self):
+		'''
+		Yields blocks of lines ending at a blank line as text, running the computer until it stops
+		'''
+		frame = []
+
+		for line in self.lines():
+			if line:
+				frame.append(line)
+			elif frame:
+				yield NEWLINE.join(frame)
+				frame = []
+
+		if frame:
+			yield NEWLINE.join(frame)
+
+	def read(self):
+		'''
+		Runs the computer until it stops, returning all of the text output that hasn't been handed out yet
+		'''
+		while not self.stopped:
+			self.run()
+
+		text = "".join([ line + NEWLINE for line in self.pending ]) + self.partial
+		self.pending.clear()
+		self.partial = ""
+
+		return text
+
+if __name__ == '__main__':
+	import os
+
+	from general.intcode_computer.main import IntcodeComputer
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	''' Output is decoded into lines, values that aren't ASCII kept apart '''
+	# Prints "Hi", "there" and 200, then "!" without a newline
+	greeting = "104,72,104,105,104,10,104,116,104,104,104,101,104,114,104,101,104,10,104,200,104,33,99"
+	assert list(AsciiComputer(IntcodeComputer(greeting, True, True, True)).lines()) == [ "Hi", "there", "!" ]
+
+	robot = AsciiComputer(IntcodeComputer(greeting, True, True, True))
+	assert robot.read() == "Hi\nthere\n!"
+	assert robot.values == [ 200 ] and robot.halted
+	assert robot.read() == ""
+
+	''' Lines go in as str or bytes '''
+	# Echoes a line of input back
+	echo = "3,12,4,12,1008,12,10,13,1006,13,0,99,0,0"
+	robot = AsciiComputer(IntcodeComputer(echo, True, True, True))
+	assert list(robot.send("hello").lines()) == [ "hello" ] and robot.halted
+
+	robot = AsciiComputer(IntcodeComputer(echo, True, True, True))
+	assert list(robot.lines()) == [] and robot.status is Status.NEEDS_INPUT
+	assert robot.send(b"bytes\n").read() == "bytes\n"
+
+	# Slices of a single instruction hand out the same lines
+	robot = AsciiComputer(IntcodeComputer(greeting, True, True, True), slice_instructions=1)
+	assert list(robot.lines()) == [ "Hi", "there", "!" ]
+
+	''' Day 17 '''
+	with open(os.path.join(repository, "day_17", "input.txt")) as f:
+		instructions = f.read().strip()
+
+	# The camera feed is a single frame
+	view = next(AsciiComputer(IntcodeComputer(instructions, True, True, True, False, True)).frames()).split(NEWLINE)
+	alignment = 0
+
+	for y in range(1, len(view) - 1):
+		for x in range(1, len(view[y]) - 1):
+			if all(view[y + dy][x + dx] == "#" for dx, dy in [ (0, 0), (1, 0), (-1, 0), (0, 1), (0, -1) ]):
+				alignment += x * y
+
+	assert alignment == 5068
+
+	robot = AsciiComputer(IntcodeComputer("2" + instructions[1:], True, True, True, False, True))
+	robot.send("A,B,A,A,B,C,B,C,C,B", "L,12,R,8,L,6,R,8,L,6", b"R,8,L,12,L,12,R,8", b"L,6,R,6,L,12\n", "n")
+	transcript = robot.read()
+	assert "Main:" in transcript and "Continuous video feed?" in transcript
+	assert robot.values == [ 1415975 ] and robot.halted
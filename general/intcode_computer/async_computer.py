@@ -0,0 +1,154 @@
+'''
+Intcode computer that runs on asyncio.
+
+Input is awaited from an input channel and output is put on an output channel, both asyncio.Queues.
+The computer hands control back to the event loop every `yield_every` instructions, so any number
+of computers can run side by side in one event loop without starving each other.
+
+Wiring the output channel of one computer to the input channel of the next one gives the
+day 7 amplifier chain, and wiring the last back to the first gives its feedback loop:
+
+	amplifiers = [AsyncIntcodeComputer(instructions) for phase in phases]
+	connect_in_series(amplifiers, feedback=True)
+	await run_computers(amplifiers)
+'''
+import asyncio
+from collections import deque
+
+from general.intcode_computer.main import IntcodeComputer
+
+class AsyncIntcodeComputer(IntcodeComputer):
+	'''
+	@param str instructions 			- Memory state required to run the computer.
+	@param asyncio.Queue input_channel 	- Channel Opcode.INPUT instructions read from.
+	@param asyncio.Queue output_channel	- Channel Opcode.OUTPUT instructions write to.
+	@param int yield_every 				- How many instructions to run before letting other tasks run.
+	@param bool extra_processing_memory - Same as IntcodeComputer.
+	'''
+	def __init__(self, instructions, input_channel=None, output_channel=None, yield_every=10000, extra_processing_memory=False):
+		super().__init__(instructions, True, True, True, False, extra_processing_memory)
+		self.input_channel = input_channel if input_channel is not None else asyncio.Queue()
+		self.output_channel = output_channel if output_channel is not None else asyncio.Queue()
+		self.yield_every = yield_every
+		self.input_queue = deque()
+
+	async def run_async(self):
+		'''
+		Runs the program until it halts. Raises BreakpointReached if a tracer stops it first.
+		'''
+		self.boot()
+		self.collect_outputs = True
+		self.stop_on_output = False
+
+		while True:
+			self.waiting_for_input = False
+			# Through resume, so profilers, tracers and debug output all work here too
+			self.resume(self.yield_every)
+
+			for value in self.outputs:
+				await self.output_channel.put(value)
+			self.outputs.clear()
+
+			# Running the computer again after a tracer stopped it carries on from there
+			self.check_tracer()
+
+			if self.halted:
+				return
+
+			if self.waiting_for_input:
+				self.input_queue.append(await self.input_channel.get())
+
+				# Take everything else that is already waiting so we don't come back for each value
+				while not self.input_channel.empty():
+					self.input_queue.append(self.input_channel.get_nowait())
+			else:
+				# Used up our instructions. Give everybody else a turn.
+				await asyncio.sleep(0)
+
+def connect_in_series(computers, feedback=False):
+	'''
+	Feeds the output of each computer into the input of the next one.
+	With feedback, the output of the last computer goes back into the first one.
+	'''
+	for current, following in zip(computers, computers[1:]):
+		following.input_channel = current.output_channel
+
+	if feedback:
+		computers[0].input_channel = computers[-1].output_channel
+
+	return computers
+
+async def run_computers(computers):
+	'''
+	Runs all of the computers concurrently until every one of them has halted
+	'''
+	await asyncio.gather(*[computer.run_async() for computer in computers])
+	return computers
+
+async def run_amplifiers(instructions, phase_sequence, feedback=False):
+	'''
+	Runs a day 7 amplifier chain for the phase sequence and returns the last signal it put out
+	'''
+	amplifiers = connect_in_series([AsyncIntcodeComputer(instructions) for phase in phase_sequence], feedback)
+
+	for amplifier, phase in zip(amplifiers, phase_sequence):
+		amplifier.input_channel.put_nowait(phase)
+
+	amplifiers[0].input_channel.put_nowait(0)
+	await run_computers(amplifiers)
+
+	signal = None
+	while not amplifiers[-1].output_channel.empty():
+		signal = amplifiers[-1].output_channel.get_nowait()
+
+	return signal
+
+if __name__ == '__main__':
+	import os
+
+	day_7 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "day_7")
+
+	with open(os.path.join(day_7, "ex_1.txt")) as f:
+		assert asyncio.run(run_amplifiers(f.read(), [4,3,2,1,0])) == 43210
+
+	with open(os.path.join(day_7, "ex_4.txt")) as f:
+		assert asyncio.run(run_amplifiers(f.read(), [9,8,7,6,5], True)) == 139629729
+
+	with open(os.path.join(day_7, "ex_5.txt")) as f:
+		assert asyncio.run(run_amplifiers(f.read(), [9,7,8,5,6], True)) == 18216
+
+	''' Hundreds of computers running side by side in one event loop '''
+	with open(os.path.join(day_7, "ex_4.txt")) as f:
+		instructions = f.read()
+
+	async def run_many():
+		return await asyncio.gather(*[
+			run_amplifiers(instructions, [9,8,7,6,5], True) for loop in range(100)
+		])
+
+	assert asyncio.run(run_many()) == [139629729] * 100
+
+	''' Profilers and tracers see what async computers run '''
+	from general.intcode_computer.main import BreakpointReached
+	from general.intcode_computer.profiler import IntcodeProfiler
+	from general.intcode_computer.tracer import IntcodeTracer
+
+	with open(os.path.join(day_7, "ex_1.txt")) as f:
+		instructions = f.read()
+
+	computer = AsyncIntcodeComputer(instructions)
+	profiler = IntcodeProfiler().attach(computer)
+	computer.input_channel.put_nowait(4)
+	computer.input_channel.put_nowait(0)
+	asyncio.run(computer.run_async())
+	assert computer.output_channel.get_nowait() == 4
+	assert sum(profiler.opcodes.values()) == computer.process_count > 0
+
+	computer = AsyncIntcodeComputer(instructions)
+	IntcodeTracer().attach(computer).break_at(0)
+
+	try:
+		asyncio.run(computer.run_async())
+		assert False
+	except BreakpointReached as stop:
+		assert stop.stopped == ( "breakpoint", 0 )
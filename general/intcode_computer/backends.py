@@ -0,0 +1,51 @@
+'''
+Backends of the Intcode computer.
+
+Every backend is an IntcodeComputer with the same constructor and API, differing only in
+how instructions get run:
+
+	reference 	- Runs every instruction through the reference interpreter. Slow, easy to follow.
+	dispatch 	- Specialized handler per instruction, dispatched from the decode cache.
+	jit 		- dispatch, plus hot blocks compiled into Python functions. See jit.py.
+	aot 		- jit, plus the whole program compiled ahead of time and cached on disk. See aot.py.
+	fastforward - dispatch, plus loops that only count skipped over in one go. See loops.py.
+
+Days pick the backend that runs their program fastest (see benchmark.py):
+
+	IntcodeComputer = backend("jit")
+
+Setting the INTCODE_BACKEND environment variable overrides every day's choice, which is
+handy for running a day on the reference interpreter when something looks off.
+'''
+import os
+
+from general.intcode_computer.main import IntcodeComputer
+from general.intcode_computer.jit import JitIntcodeComputer
+from general.intcode_computer.aot import AotIntcodeComputer
+from general.intcode_computer.loops import FastForwardIntcodeComputer
+
+class ReferenceComputer(IntcodeComputer):
+	'''
+	Computer that runs everything through the reference interpreter
+	'''
+	def execute(self, max_instructions=None):
+		return self.interpret(max_instructions)
+
+BACKENDS = {
+	"reference": ReferenceComputer,
+	"dispatch": IntcodeComputer,
+	"jit": JitIntcodeComputer,
+	"aot": AotIntcodeComputer,
+	"fastforward": FastForwardIntcodeComputer,
+}
+
+def backend(name="dispatch"):
+	'''
+	Returns the computer class of the named backend, unless INTCODE_BACKEND says otherwise
+	'''
+	name = os.environ.get("INTCODE_BACKEND", name)
+
+	try:
+		return BACKENDS[name]
+	except KeyError:
+		raise ValueError(f"backend(): Unknown Intcode backend {name}, pick one of {', '.join(BACKENDS)}")
@@ -0,0 +1,405 @@
+'''
+Batch Intcode computer: many copies of the same program, run in lockstep.
+
+Sweeps like day 2's noun and verb search or day 7's phase settings run one program
+over and over with different inputs. BatchIntcodeComputer holds the memory of every
+copy ("lane") as the rows of a single 2-D NumPy int64 array and runs each instruction
+for every lane at once:
+
+	batch = BatchIntcodeComputer(instructions, 10000)
+	batch.store(1, [ noun for noun in range(100) for verb in range(100) ])
+	batch.store(2, [ verb for noun in range(100) for verb in range(100) ])
+	batch.run_until_input_needed()
+	batch.read(0) 		# -> address 0 of every lane
+
+Every step, lanes are grouped by their instruction pointer and the instruction found
+there, and each group runs as one vectorized instruction. Lanes that diverge just end
+up in different groups. Since instructions are read from each lane's own memory every
+step, self modifying programs need nothing special.
+
+A lane that does something int64 rows can't (a value outgrowing 64 bits, an address past
+memory_size, an unknown instruction) is moved to an ordinary IntcodeComputer and carries on
+from there on its own. Without NumPy installed, every lane is run that way from the start.
+'''
+from collections import deque
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from general.intcode_computer.backends import backend
+from general.intcode_computer.main import build_intcode_array
+from general.intcode_computer.instructions import Opcode, Mode, INSTRUCTION_VALUES, INSTRUCTION_HANDLERS
+
+# Results at or beyond this size send the lane to scalar execution before they could overflow int64
+INT64_LIMIT = 2.0 ** 62
+
+# Decoded instructions by instruction value, as (opcode, parameter modes, instruction values)
+DECODED = {
+	value: ( Opcode(value % 100), ( value // 100 % 10, value // 1000 % 10, value // 10000 % 10 ), INSTRUCTION_VALUES[Opcode(value % 100)] )
+	for value in INSTRUCTION_HANDLERS
+}
+
+# One past the largest instruction value, so (pointer, instruction) pairs pack into a single int
+INSTRUCTION_RANGE = max(DECODED) + 1
+
+class BatchIntcodeComputer:
+	'''
+	@param str instructions 	- Program every lane runs.
+	@param int lanes 			- Number of copies of the program.
+	@param int memory_size 		- Memory of each lane, at least as long as the program. Lanes touching
+								  addresses past it carry on as scalar computers, which have unlimited memory.
+	@param str scalar_backend 	- Backend lanes that leave the batch run on, see backends.py.
+	'''
+	def __init__(self, instructions, lanes, memory_size=None, scalar_backend="dispatch"):
+		self.instructions = instructions
+		self.lanes = lanes
+		self.scalar_backend = scalar_backend
+		self.process_count = 0
+		self.input_queues = [ deque() for lane in range(lanes) ]
+		self.outputs = [ [] for lane in range(lanes) ]
+		# Lanes that left the batch, by lane number
+		self.scalar = {}
+
+		program = build_intcode_array(instructions)
+		self.memory_size = max(memory_size or 0, len(program))
+
+		self.memory = None
+		if numpy is not None and all(-2 ** 63 <= value < 2 ** 63 for value in program):
+			self.memory = numpy.zeros((lanes, self.memory_size), dtype=numpy.int64)
+			self.memory[:, :len(program)] = program
+			self.pointers = numpy.zeros(lanes, dtype=numpy.int64)
+			self.relative_bases = numpy.zeros(lanes, dtype=numpy.int64)
+			self.running = numpy.ones(lanes, dtype=bool)
+			self.finished = numpy.zeros(lanes, dtype=bool)
+		else:
+			for lane in range(lanes):
+				self.scalar[lane] = self.scalar_computer()
+				self.scalar[lane].boot()
+				self.scalar[lane].input_queue = self.input_queues[lane]
+
+	def scalar_computer(self):
+		return backend(self.scalar_backend)(self.instructions, True, True, True, False, True)
+
+	def leave_batch(self, lanes):
+		'''
+		Moves the lanes out of the batch into scalar computers that carry on from the same state
+		'''
+		for lane in lanes.tolist() if numpy is not None and isinstance(lanes, numpy.ndarray) else lanes:
+			if lane in self.scalar:
+				continue
+
+			computer = self.scalar_computer()
+			computer.memory = self.memory[lane].tolist()
+			computer.instruction_pointer = int(self.pointers[lane])
+			computer.relative_base = int(self.relative_bases[lane])
+			computer.input_queue = self.input_queues[lane]
+			computer.halted = bool(self.finished[lane])
+			self.scalar[lane] = computer
+
+			self.running[lane] = False
+			self.finished[lane] = True
+
+	def values_per_lane(self, values):
+		return [ values ] * self.lanes if isinstance(values, int) else list(values)
+
+	def store(self, address, values):
+		'''
+		Writes to an address of every lane
+
+		@param values - Value for every lane, or a single value for all of them
+		'''
+		values = self.values_per_lane(values)
+
+		if self.memory is not None:
+			fits = [ lane for lane, value in enumerate(values) if lane not in self.scalar and -INT64_LIMIT < value < INT64_LIMIT ]
+			if 0 <= address < self.memory_size:
+				self.memory[fits, address] = [ values[lane] for lane in fits ]
+				self.leave_batch(set(range(self.lanes)) - set(fits))
+			else:
+				self.leave_batch(range(self.lanes))
+
+		for lane, computer in self.scalar.items():
+			computer.store(computer.memory, address, values[lane])
+
+	def read(self, address):
+		'''
+		Returns the list of the value at the address in every lane
+		'''
+		values = self.memory[:, address].tolist() if self.memory is not None and 0 <= address < self.memory_size else [ 0 ] * self.lanes
+
+		for lane, computer in self.scalar.items():
+			values[lane] = computer.read(computer.memory, address)
+
+		return values
+
+	def queue_input(self, input_items):
+		'''
+		@param list input_items - List of input for every lane
+		'''
+		for queue, items in zip(self.input_queues, input_items):
+			queue.extend(items)
+
+	@property
+	def halted(self):
+		'''
+		List of whether each lane has halted
+		'''
+		halted = self.finished.tolist() if self.memory is not None else [ False ] * self.lanes
+
+		for lane, computer in self.scalar.items():
+			halted[lane] = computer.halted
+
+		return halted
+
+	def run_until_input_needed(self, input_items=None):
+		'''
+		Runs every lane until it halts or wants input that has not been queued yet.
+		Returns the list of values each lane output on the way.
+
+		@param list input_items - Optional list of input to queue up for every lane
+		'''
+		if input_items is not None:
+			self.queue_input(input_items)
+
+		if self.memory is not None:
+			# Lanes that were waiting on input carry on
+			self.running |= ~self.finished
+			self.execute()
+
+		for lane, computer in self.scalar.items():
+			if not computer.halted:
+				count = computer.process_count
+				self.outputs[lane].extend(computer.run_until_input_needed())
+				self.process_count += computer.process_count - count
+
+		outputs = self.outputs
+		self.outputs = [ [] for lane in range(self.lanes) ]
+		return outputs
+
+	def run_until_halt(self, input_items=None):
+		'''
+		Runs every lane to completion and returns the list of values each lane output
+		'''
+		outputs = self.run_until_input_needed(input_items)
+
+		if not all(self.halted):
+			raise Exception("run_until_halt(): A lane wants more input than it was given")
+
+		return outputs
+
+	def execute(self):
+		'''
+		Runs the lanes still in the batch in lockstep until none of them can go on
+		'''
+		memory = self.memory
+		pointers = self.pointers
+
+		while True:
+			lanes = numpy.flatnonzero(self.running)
+			if not len(lanes):
+				return
+
+			lane_pointers = pointers[lanes]
+			outside = (lane_pointers < 0) | (lane_pointers >= self.memory_size)
+			if outside.any():
+				self.leave_batch(lanes[outside])
+				continue
+
+			words = memory[lanes, lane_pointers]
+			pointer, word = int(lane_pointers[0]), int(words[0])
+
+			if (lane_pointers == pointer).all() and (words == word).all():
+				groups = [ ( pointer, word, lanes ) ]
+			else:
+				unknown = (words < 0) | (words >= INSTRUCTION_RANGE)
+				if unknown.any():
+					self.leave_batch(lanes[unknown])
+					continue
+
+				keys, group_of_lane = numpy.unique(lane_pointers * INSTRUCTION_RANGE + words, return_inverse=True)
+				groups = [ ( int(key) // INSTRUCTION_RANGE, int(key) % INSTRUCTION_RANGE, lanes[group_of_lane == group] ) for group, key in enumerate(keys.tolist()) ]
+
+			for pointer, word, group in groups:
+				self.execute_group(pointer, word, group)
+
+	def execute_group(self, pointer, word, lanes):
+		'''
+		Runs the instruction at the pointer for every lane in the group
+		'''
+		memory = self.memory
+
+		if word not in DECODED or pointer + DECODED[word][2] > self.memory_size:
+			self.leave_batch(lanes)
+			return
+
+		opcode, modes, instruction_values = DECODED[word]
+		parameters = memory[lanes, pointer + 1:pointer + instruction_values]
+
+		# Addresses of every parameter that isn't immediate. Lanes with one outside of memory leave the batch.
+		addresses = [ None ] * (instruction_values - 1)
+		inside = numpy.ones(len(lanes), dtype=bool)
+
+		for index in range(instruction_values - 1):
+			if modes[index] != Mode.IMMEDIATE:
+				address = parameters[:, index]
+				if modes[index] == Mode.RELATIVE:
+					address = address + self.relative_bases[lanes]
+				inside &= (address >= 0) & (address < self.memory_size)
+				addresses[index] = address
+
+		if not inside.all():
+			self.leave_batch(lanes[~inside])
+			lanes = lanes[inside]
+			parameters = parameters[inside]
+			addresses = [ address if address is None else address[inside] for address in addresses ]
+
+			if not len(lanes):
+				return
+
+		def value(index):
+			if addresses[index] is None:
+				return parameters[:, index]
+			return memory[lanes, addresses[index]]
+
+		if opcode in (Opcode.ADDITION, Opcode.MULTIPLICATION):
+			value_1, value_2 = value(0), value(1)
+
+			# Work out in floating point which results would overflow, they get done in Python instead
+			if opcode == Opcode.ADDITION:
+				estimate = value_1.astype(numpy.float64) + value_2
+			else:
+				estimate = value_1.astype(numpy.float64) * value_2
+
+			overflows = numpy.abs(estimate) >= INT64_LIMIT
+			if overflows.any():
+				self.leave_batch(lanes[overflows])
+				keep = ~overflows
+				lanes, value_1, value_2, addresses[2] = lanes[keep], value_1[keep], value_2[keep], addresses[2][keep]
+
+			memory[lanes, addresses[2]] = value_1 + value_2 if opcode == Opcode.ADDITION else value_1 * value_2
+			self.pointers[lanes] = pointer + instruction_values
+		elif opcode in (Opcode.LESS_THAN, Opcode.EQUALS):
+			if opcode == Opcode.LESS_THAN:
+				result = value(0) < value(1)
+			else:
+				result = value(0) == value(1)
+
+			memory[lanes, addresses[2]] = result
+			self.pointers[lanes] = pointer + instruction_values
+		elif opcode in (Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE):
+			jump = (value(0) != 0) == (opcode == Opcode.JUMP_IF_TRUE)
+			self.pointers[lanes] = numpy.where(jump, value(1), pointer + instruction_values)
+		elif opcode == Opcode.ADJUST:
+			self.relative_bases[lanes] += value(0)
+			self.pointers[lanes] = pointer + instruction_values
+		elif opcode == Opcode.OUTPUT:
+			for lane, output in zip(lanes.tolist(), value(0).tolist()):
+				self.outputs[lane].append(output)
+			self.pointers[lanes] = pointer + instruction_values
+		elif opcode == Opcode.INPUT:
+			# Only lanes given their input are counted, the others run the instruction later
+			for lane, address in zip(lanes.tolist(), addresses[0].tolist()):
+				queue = self.input_queues[lane]
+
+				if not queue:
+					self.running[lane] = False
+				elif -INT64_LIMIT < queue[0] < INT64_LIMIT:
+					memory[lane, address] = queue.popleft()
+					self.pointers[lane] = pointer + instruction_values
+					self.process_count += 1
+				else:
+					self.leave_batch([lane])
+
+			return
+		else:
+			self.running[lanes] = False
+			self.finished[lanes] = True
+
+		self.process_count += len(lanes)
+
+if __name__ == '__main__':
+	import itertools
+	import os
+
+	from general.intcode_computer.main import IntcodeComputer
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	def read_program(day, filename="input.txt"):
+		with open(os.path.join(repository, day, filename)) as f:
+			return f.read().strip()
+
+	''' Day 2: every noun and verb at once '''
+	instructions = read_program("day_2")
+	pairs = list(itertools.product(range(100), repeat=2))
+
+	batch = BatchIntcodeComputer(instructions, len(pairs))
+	batch.store(1, [ noun for noun, verb in pairs ])
+	batch.store(2, [ verb for noun, verb in pairs ])
+	batch.run_until_input_needed()
+	results = batch.read(0)
+
+	noun, verb = pairs[results.index(19690720)]
+	assert 100 * noun + verb == 7014
+
+	for lane in [0, 1234, 9999]:
+		computer = IntcodeComputer(instructions, False, False, True)
+		computer.boot()
+		computer.store(computer.memory, 1, pairs[lane][0])
+		computer.store(computer.memory, 2, pairs[lane][1])
+		computer.resume()
+		assert computer.memory[0] == results[lane]
+
+	''' Day 5: lanes taking different branches '''
+	instructions = read_program("day_5", "ex_3.txt")
+	batch = BatchIntcodeComputer(instructions, 3)
+	assert batch.run_until_halt([ [7], [8], [9] ]) == [ [999], [1000], [1001] ]
+
+	# Diagnostics, with lanes waiting on input until they get it
+	batch = BatchIntcodeComputer(read_program("day_5"), 2)
+	outputs = batch.run_until_input_needed()
+	assert outputs == [ [], [] ] and batch.halted == [ False, False ]
+	assert [ lane[-1] for lane in batch.run_until_halt([ [1], [5] ]) ] == [ 10987514, 14195011 ]
+
+	''' Day 7: every phase setting, one batch per amplifier '''
+	instructions = read_program("day_7", "ex_4.txt")
+	settings = list(itertools.permutations(range(5, 10)))
+	amplifiers = [ BatchIntcodeComputer(instructions, len(settings)) for amplifier in range(5) ]
+
+	for amplifier, phases in zip(amplifiers, zip(*settings)):
+		amplifier.queue_input([ [ phase ] for phase in phases ])
+
+	signals = [ [ 0 ] for phases in settings ]
+	while not all(amplifiers[-1].halted):
+		for amplifier in amplifiers:
+			signals = amplifier.run_until_input_needed(signals)
+
+	assert max(lane[-1] for lane in signals) == 139629729
+
+	''' Day 9: values outgrowing int64 and addresses past memory leave the batch '''
+	batch = BatchIntcodeComputer(read_program("day_9", "test_3.txt"), 2)
+	assert batch.run_until_halt() == [ [1125899906842624] ] * 2
+
+	# 2 ** 40 squared only fits in Python
+	batch = BatchIntcodeComputer("2,9,9,9,4,9,99,0,0," + str(2 ** 40), 2)
+	assert batch.run_until_halt() == [ [ 2 ** 80 ] ] * 2 and batch.scalar.keys() == { 0, 1 }
+
+	instructions = read_program("day_9", "test_1.txt")
+	batch = BatchIntcodeComputer(instructions, 3)
+	assert batch.run_until_halt() == [ build_intcode_array(instructions) ] * 3
+
+	# Same again with enough memory that nothing leaves the batch
+	batch = BatchIntcodeComputer(instructions, 3, memory_size=256)
+	assert batch.run_until_halt() == [ build_intcode_array(instructions) ] * 3
+	assert not batch.scalar or numpy is None
+
+	batch = BatchIntcodeComputer(read_program("day_9"), 2, memory_size=2048)
+	assert [ lane[-1] for lane in batch.run_until_halt([ [1], [2] ]) ] == [ 2427443564, 87221 ]
+
+	''' Self modifying lanes '''
+	# Lane 0 rewrites its halt into an output of the 1 after it, lane 1 rewrites it into another halt
+	batch = BatchIntcodeComputer("1,7,8,4,99,1,99,0,0", 2)
+	batch.store(8, [ 104, 99 ])
+	assert batch.run_until_halt() == [ [ 1 ], [] ]
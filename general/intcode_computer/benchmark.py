@@ -0,0 +1,351 @@
+'''
+Benchmark suite for the Intcode computer.
+
+Runs every Intcode puzzle in the repository (days 2, 5, 7, 9, 11, 13, 15 and 17) to its
+answer, driving each one with a scripted player instead of the day's own code, and
+reports for each of them:
+
+	- instructions per second
+	- wall time
+	- peak resident set size
+	- outputs per second
+	- the puzzle answer, so a faster computer that gets the wrong answer doesn't pass
+
+Each workload runs in a freshly spawned process so peak RSS belongs to that workload alone.
+Forked processes would start out with whatever memory the harness already had.
+
+Run from the top level of the repository:
+
+	python -m general.intcode_computer.benchmark
+	python -m general.intcode_computer.benchmark day_13 day_17 --backend dispatch jit
+	python -m general.intcode_computer.benchmark --save baseline.json
+	python -m general.intcode_computer.benchmark --compare baseline.json
+
+--compare reports each workload's speed against the saved baseline, and exits with an
+error if any workload got slower than --tolerance allows or came up with a different answer.
+'''
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from general.intcode_computer.backends import BACKENDS
+
+REPOSITORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+def read_program(day):
+	with open(os.path.join(REPOSITORY, f"day_{day}", "input.txt")) as f:
+		return f.read().strip()
+
+def insert_quarters(instructions):
+	'''
+	Sets address 0 to 2, which is how days 13 and 17 get switched into their second part
+	'''
+	return "2" + instructions[instructions.index(","):]
+
+class Workload:
+	'''
+	Boots computers for a workload and adds up the instructions they run and the values they output
+	'''
+	def __init__(self, computer_class):
+		self.computer_class = type(computer_class.__name__, (Counting, computer_class), {})
+		self.instructions = 0
+		self.outputs = 0
+
+	def computer(self, instructions):
+		computer = self.computer_class(instructions, True, True, True, False, True)
+		computer.workload = self
+		return computer
+
+class Counting:
+	'''
+	Mixin reporting everything a computer runs back to its workload
+	'''
+	def execute(self, max_instructions=None):
+		outputs = len(self.outputs)
+		count = super().execute(max_instructions)
+		self.workload.instructions += count
+		self.workload.outputs += len(self.outputs) - outputs
+		return count
+
+def day_2(workload):
+	'''
+	Part 2: tries nouns and verbs until the program ends up with 19690720 at address 0
+	'''
+	instructions = read_program(2)
+
+	for noun, verb in itertools.product(range(100), repeat=2):
+		computer = workload.computer(instructions)
+		computer.boot()
+		computer.store(computer.memory, 1, noun)
+		computer.store(computer.memory, 2, verb)
+		computer.resume()
+
+		if computer.memory[0] == 19690720:
+			return 100 * noun + verb
+
+def day_5(workload):
+	'''
+	Diagnostics for the air conditioner (1) and the thermal radiator controller (5)
+	'''
+	instructions = read_program(5)
+	return [ workload.computer(instructions).run_until_halt([system])[-1] for system in [1, 5] ]
+
+def day_7(workload):
+	'''
+	Highest signal of every amplifier phase setting, in series and in a feedback loop
+	'''
+	instructions = read_program(7)
+	series = 0
+
+	for phases in itertools.permutations(range(5)):
+		signal = 0
+		for phase in phases:
+			signal = workload.computer(instructions).run_until_halt([phase, signal])[-1]
+		series = max(series, signal)
+
+	feedback = 0
+
+	for phases in itertools.permutations(range(5, 10)):
+		amplifiers = [ workload.computer(instructions) for phase in phases ]
+		for amplifier, phase in zip(amplifiers, phases):
+			amplifier.queue_input([phase])
+
+		signal = 0
+		while not amplifiers[-1].halted:
+			for amplifier in amplifiers:
+				signal = amplifier.run_until_input_needed([signal])[-1]
+		feedback = max(feedback, signal)
+
+	return [series, feedback]
+
+def day_9(workload):
+	'''
+	BOOST keycode (1) and distress signal coordinates (2)
+	'''
+	instructions = read_program(9)
+	return [ workload.computer(instructions).run_until_halt([mode])[-1] for mode in [1, 2] ]
+
+def day_11(workload):
+	'''
+	Number of panels the hull painting robot paints when starting on a black panel
+	'''
+	computer = workload.computer(read_program(11))
+	directions = [ (0, -1), (1, 0), (0, 1), (-1, 0) ]
+	facing = 0
+	position = (0, 0)
+	panels = {}
+
+	while True:
+		outputs = computer.run_until_input_needed([panels.get(position, 0)])
+
+		if not outputs:
+			return len(panels)
+
+		color, turn = outputs
+		panels[position] = color
+		facing = (facing + (1 if turn else -1)) % 4
+		position = (position[0] + directions[facing][0], position[1] + directions[facing][1])
+
+def day_13(workload):
+	'''
+	Number of blocks on screen, then the final score of a game where the paddle follows the ball
+	'''
+	instructions = read_program(13)
+	screen = workload.computer(instructions).run_until_halt()
+	blocks = screen[2::3].count(2)
+
+	computer = workload.computer(insert_quarters(instructions))
+	joystick = None
+	ball = paddle = score = 0
+
+	while not computer.halted:
+		outputs = computer.run_until_input_needed(joystick)
+
+		for x, y, tile in zip(outputs[0::3], outputs[1::3], outputs[2::3]):
+			if x == -1:
+				score = tile
+			elif tile == 3:
+				paddle = x
+			elif tile == 4:
+				ball = x
+
+		joystick = [ (ball > paddle) - (ball < paddle) ]
+
+	return [blocks, score]
+
+def day_15(workload):
+	'''
+	Explores the whole maze depth first, backing the droid up at every dead end.
+	Returns how many moves the oxygen system is from the start.
+	'''
+	computer = workload.computer(read_program(15))
+	moves = { 1: (0, -1), 2: (0, 1), 3: (-1, 0), 4: (1, 0) }
+	backwards = { 1: 2, 2: 1, 3: 4, 4: 3 }
+	position = (0, 0)
+	seen = { position }
+	path = []
+	oxygen = None
+
+	while True:
+		for move, ( dx, dy ) in moves.items():
+			target = (position[0] + dx, position[1] + dy)
+			if target in seen:
+				continue
+
+			seen.add(target)
+			status = computer.run_until_input_needed([move])[0]
+
+			if status:
+				position = target
+				path.append(move)
+				if status == 2:
+					oxygen = len(path)
+				break
+		else:
+			if not path:
+				return oxygen
+
+			move = backwards[path.pop()]
+			computer.run_until_input_needed([move])
+			position = (position[0] + moves[move][0], position[1] + moves[move][1])
+
+# Movement routine for our scaffolding, worked out by day 17's part 2
+DAY_17_ROUTINE = "A,B,A,A,B,C,B,C,C,B\nL,12,R,8,L,6,R,8,L,6\nR,8,L,12,L,12,R,8\nL,6,R,6,L,12\nn\n"
+
+def day_17(workload):
+	'''
+	Sum of the alignment parameters of the scaffold intersections,
+	then the dust collected by walking the vacuum robot over the scaffolding
+	'''
+	instructions = read_program(17)
+	view = "".join(chr(value) for value in workload.computer(instructions).run_until_halt()).split()
+	alignment = 0
+
+	for y in range(1, len(view) - 1):
+		for x in range(1, len(view[y]) - 1):
+			if all(view[y + dy][x + dx] == "#" for dx, dy in [ (0, 0), (1, 0), (-1, 0), (0, 1), (0, -1) ]):
+				alignment += x * y
+
+	outputs = workload.computer(insert_quarters(instructions)).run_until_halt([ ord(character) for character in DAY_17_ROUTINE ])
+	return [alignment, outputs[-1]]
+
+WORKLOADS = {
+	"day_2": day_2,
+	"day_5": day_5,
+	"day_7": day_7,
+	"day_9": day_9,
+	"day_11": day_11,
+	"day_13": day_13,
+	"day_15": day_15,
+	"day_17": day_17,
+}
+
+def peak_rss():
+	'''
+	Peak resident set size of this process in bytes
+	'''
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# Linux reports kilobytes, macOS reports bytes
+	return peak if sys.platform == "darwin" else peak * 1024
+
+def measure(workload_name, backend):
+	'''
+	Runs a workload on a backend. Returns a dict of everything measured.
+	'''
+	workload = Workload(BACKENDS[backend])
+
+	start = perf_counter()
+	answer = WORKLOADS[workload_name](workload)
+	elapsed = perf_counter() - start
+
+	instructions = workload.instructions
+	outputs = workload.outputs
+
+	return {
+		"workload": workload_name,
+		"backend": backend,
+		"answer": answer,
+		"instructions": instructions,
+		"outputs": outputs,
+		"seconds": elapsed,
+		"instructions_per_second": instructions / elapsed,
+		"outputs_per_second": outputs / elapsed,
+		"peak_rss": peak_rss(),
+	}
+
+def measure_in_new_process(workload_name, backend):
+	with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+		return executor.submit(measure, workload_name, backend).result()
+
+def format_result(result):
+	return (
+		f"{result['workload']:>7} {result['backend']:>9}: "
+		f"{result['instructions']:>9} instructions in {result['seconds']:7.3f}s "
+		f"({result['instructions_per_second']:>12,.0f}/s), "
+		f"{result['outputs_per_second']:>10,.0f} outputs/s, "
+		f"peak RSS {result['peak_rss'] / 2 ** 20:6.1f} MiB -> {result['answer']}"
+	)
+
+def compare(results, baseline, tolerance):
+	'''
+	Prints how each result did against the baseline.
+	Returns the list of results that got slower than the tolerance allows or changed their answer.
+	'''
+	saved = { (result["workload"], result["backend"]): result for result in baseline }
+	regressions = []
+
+	for result in results:
+		before = saved.get((result["workload"], result["backend"]))
+		if before is None:
+			continue
+
+		speedup = result["instructions_per_second"] / before["instructions_per_second"]
+		regressed = speedup < 1 - tolerance or result["answer"] != before["answer"]
+
+		if regressed:
+			regressions.append(result)
+
+		print(f"{result['workload']:>7} {result['backend']:>9}: {speedup:5.2f}x baseline{'  <-- REGRESSION' if regressed else ''}")
+
+	return regressions
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Benchmarks the Intcode computer on every Intcode puzzle")
+	parser.add_argument("workloads", nargs="*", help=f"Workloads to run, all of them by default: {', '.join(WORKLOADS)}")
+	parser.add_argument("--backend", nargs="+", choices=list(BACKENDS), default=["dispatch"])
+	parser.add_argument("--save", metavar="FILE", help="Save the results as a baseline")
+	parser.add_argument("--compare", metavar="FILE", help="Compare the results with a saved baseline")
+	parser.add_argument("--tolerance", type=float, default=0.2, help="How much slower than the baseline counts as a regression")
+	arguments = parser.parse_args()
+
+	for workload_name in arguments.workloads:
+		if workload_name not in WORKLOADS:
+			parser.error(f"Unknown workload {workload_name}")
+
+	results = []
+
+	for workload_name in arguments.workloads or list(WORKLOADS):
+		for backend in arguments.backend:
+			result = measure_in_new_process(workload_name, backend)
+			results.append(result)
+			print(format_result(result))
+
+	answers = {}
+	for result in results:
+		answers.setdefault(result["workload"], []).append(result["answer"])
+	assert all(answer == same[0] for same in answers.values() for answer in same), "Backends disagree on an answer"
+
+	if arguments.save:
+		with open(arguments.save, "w") as f:
+			json.dump(results, f, indent=4)
+
+	if arguments.compare:
+		with open(arguments.compare) as f:
+			if compare(results, json.load(f), arguments.tolerance):
+				sys.exit(1)
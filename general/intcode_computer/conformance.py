@@ -0,0 +1,136 @@
+'''
+Conformance suite for the Intcode computer backends.
+
+Runs the example programs from days 2, 5, 7 and 9 (plus the day 5 and day 9 puzzle inputs,
+and programs touching negative addresses) on every backend in backends.BACKENDS. Every backend has to come up with the same outputs,
+final memory and instruction count as the reference interpreter, and the reference
+interpreter has to come up with the answers the puzzles give.
+
+	python -m general.intcode_computer.conformance
+'''
+import itertools
+import os
+
+from general.intcode_computer.backends import BACKENDS
+
+REPOSITORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+def read_program(day, filename):
+	with open(os.path.join(REPOSITORY, day, filename)) as f:
+		return f.read().strip()
+
+def final_memory(computer_class, instructions):
+	'''
+	Runs a day 2 style program and returns its memory once it halts, with the instruction count
+	'''
+	computer = computer_class(instructions, False, False, True, True)
+	return computer.process_intcode(), computer.process_count
+
+def outputs(computer_class, instructions, input_items):
+	'''
+	Runs a program to completion and returns everything it output, with the instruction count
+	'''
+	computer = computer_class(instructions, True, True, True, False, True)
+	return computer.run_until_halt(input_items), computer.process_count
+
+def error(computer_class, instructions, input_items):
+	'''
+	Runs a program that reads outside of memory. Returns the error it stopped with, or its outputs if it didn't.
+	'''
+	try:
+		return outputs(computer_class, instructions, input_items)
+	except IndexError as error:
+		return str(error)
+
+def amplifiers(computer_class, instructions, phases, feedback):
+	'''
+	Highest day 7 amplifier signal for the phases, in series or in a feedback loop
+	'''
+	best = 0
+
+	for sequence in itertools.permutations(phases):
+		computers = [ computer_class(instructions, True, True, True) for phase in sequence ]
+		for computer, phase in zip(computers, sequence):
+			computer.queue_input([phase])
+
+		signal = 0
+		while True:
+			for computer in computers:
+				signal = computer.run_until_input_needed([signal])[-1]
+
+			if not feedback or computers[-1].halted:
+				break
+
+		best = max(best, signal)
+
+	return best
+
+# Tuples of (name, function, arguments after the computer class, expected result or None)
+CASES = [
+	("day 2 addition", final_memory, ("1,0,0,0,99",), ("2,0,0,0,99", 2)),
+	("day 2 multiplication", final_memory, ("2,3,0,3,99",), ("2,3,0,6,99", 2)),
+	("day 2 square", final_memory, ("2,4,4,5,99,0",), ("2,4,4,5,99,9801", 2)),
+	("day 2 overwritten halt", final_memory, ("1,1,1,4,99,5,6,0,99",), ("30,1,1,4,2,5,6,0,99", 3)),
+	("day 5 jump position mode, zero", outputs, (read_program("day_5", "ex_1.txt"), [0]), None),
+	("day 5 jump position mode, non zero", outputs, (read_program("day_5", "ex_1.txt"), [5]), None),
+	("day 5 jump immediate mode, zero", outputs, (read_program("day_5", "ex_2.txt"), [0]), None),
+	("day 5 jump immediate mode, non zero", outputs, (read_program("day_5", "ex_2.txt"), [5]), None),
+	("day 5 compare below 8", outputs, (read_program("day_5", "ex_3.txt"), [7]), None),
+	("day 5 compare equal to 8", outputs, (read_program("day_5", "ex_3.txt"), [8]), None),
+	("day 5 compare above 8", outputs, (read_program("day_5", "ex_3.txt"), [9]), None),
+	("day 5 air conditioner", outputs, (read_program("day_5", "input.txt"), [1]), None),
+	("day 5 thermal radiator", outputs, (read_program("day_5", "input.txt"), [5]), None),
+	("day 7 example 1", amplifiers, (read_program("day_7", "ex_1.txt"), range(5), False), 43210),
+	("day 7 example 2", amplifiers, (read_program("day_7", "ex_2.txt"), range(5), False), 54321),
+	("day 7 example 3", amplifiers, (read_program("day_7", "ex_3.txt"), range(5), False), 65210),
+	("day 7 feedback example 4", amplifiers, (read_program("day_7", "ex_4.txt"), range(5, 10), True), 139629729),
+	("day 7 feedback example 5", amplifiers, (read_program("day_7", "ex_5.txt"), range(5, 10), True), 18216),
+	("day 9 quine", outputs, (read_program("day_9", "test_1.txt"), []), None),
+	("day 9 sixteen digits", outputs, (read_program("day_9", "test_2.txt"), []), None),
+	("day 9 large number", outputs, (read_program("day_9", "test_3.txt"), []), ([1125899906842624], 2)),
+	("day 9 BOOST", outputs, (read_program("day_9", "input.txt"), [1]), None),
+	# Negative addresses mustn't wrap around to the end of memory. Writes to them are dropped,
+	# reads from them are errors. The loops run long enough for the JIT to compile them.
+	("negative write", final_memory, ("1101,2,3,-1,99",), ("1101,2,3,-1,99", 2)),
+	("negative write in a loop", final_memory, ("1101,0,0,-1,1001,20,1,20,1007,20,30,21,1005,21,0,99,0,0,0,0,0,0",), None),
+	("negative relative write in a loop", final_memory, ("109,-3,21101,0,0,1,1001,22,1,22,1007,22,30,23,1005,23,2,99,0,0,0,0,0,0",), None),
+	("negative read", error, ("4,-1,99", []), "read(): Address -1 is outside of memory"),
+	("negative relative read in a loop", error, ("109,30,109,-1,1201,5,0,20,1105,1,2,0,0,0,0,0,0,0,0,0,0", []), "read(): Address -1 is outside of memory"),
+]
+
+def check_backends(backends=BACKENDS):
+	'''
+	Runs every case on every backend. Returns a list of (case, backend, result, expected) failures.
+	'''
+	failures = []
+
+	for name, function, arguments, expected in CASES:
+		reference = function(backends["reference"], *arguments)
+
+		if expected is not None and reference != expected:
+			failures.append((name, "reference", reference, expected))
+
+		for backend, computer_class in backends.items():
+			result = function(computer_class, *arguments)
+			if result != reference:
+				failures.append((name, backend, result, reference))
+
+	return failures
+
+if __name__ == '__main__':
+	failures = check_backends()
+
+	for name, backend, result, expected in failures:
+		print(f"{name} on {backend}: got {result}, expected {expected}")
+
+	assert not failures
+
+	''' Spot checks of answers the cases above only compare between backends '''
+	dispatch = BACKENDS["dispatch"]
+	assert outputs(dispatch, read_program("day_5", "ex_3.txt"), [7])[0] == [999]
+	assert outputs(dispatch, read_program("day_5", "ex_3.txt"), [8])[0] == [1000]
+	assert outputs(dispatch, read_program("day_5", "ex_3.txt"), [9])[0] == [1001]
+	assert outputs(dispatch, read_program("day_9", "test_1.txt"), [])[0] == [ int(value) for value in read_program("day_9", "test_1.txt").split(",") ]
+	assert len(str(outputs(dispatch, read_program("day_9", "test_2.txt"), [])[0][0])) == 16
+
+	print(f"{len(CASES)} cases passed on {', '.join(BACKENDS)}")
@@ -0,0 +1,418 @@
+'''
+Static disassembler and control flow analysis of Intcode programs.
+
+analyze() builds a model of a program without running it:
+
+	disassembly = analyze(image)
+	disassembly.blocks[0].successors
+	disassembly.self_modifying
+	disassembly.is_stable(block.start, block.end)
+
+	python3 -m general.intcode_computer.disassembler day_9/input.txt
+
+Code is found two ways. A linear sweep decodes the program front to back, stepping over
+cells that aren't valid instructions one at a time. Recursive descent follows execution
+from address 0: falling through, immediate jump targets and return addresses. Intcode has
+no call instruction, calls push their return address with an immediate add and jump away.
+So the address right after a jump that always jumps is only followed when some instruction
+pushes it as a constant. What recursive descent reaches is code, everything else is data.
+
+Reachable code is split into basic blocks, which end on jumps and halts. Writes whose target
+is known before running (position mode) that land on code are the self modifying ones.
+Writes through the relative base can't be placed statically and are listed separately.
+
+Analyses of a ProgramImage are kept in its analysis dict, so only the first thing asking for
+one pays for it. The ahead of time compiler (aot.py) compiles the blocks found here.
+'''
+import sys
+from collections import namedtuple
+
+from general.intcode_computer.image import ProgramImage
+from general.intcode_computer.instructions import Opcode, Mode, INSTRUCTION_VALUES, WRITE_PARAMETERS
+
+Instruction = namedtuple("Instruction", [ "address", "opcode", "modes", "length", "parameters" ])
+
+JUMPS = frozenset([ Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE ])
+
+# Instructions whose result is known when both of their inputs are immediate
+CONSTANT_FOLDS = {
+	Opcode.ADDITION: lambda value_1, value_2: value_1 + value_2,
+	Opcode.MULTIPLICATION: lambda value_1, value_2: value_1 * value_2,
+}
+
+def decode(memory, pointer):
+	'''
+	Returns the opcode, parameter modes and length of the instruction at the address,
+	or None if there's no valid instruction there
+	'''
+	if not 0 <= pointer < len(memory):
+		return None
+
+	value = memory[pointer]
+
+	try:
+		opcode = Opcode(value % 100)
+		modes = [ Mode(value // 100 % 10), Mode(value // 1000 % 10), Mode(value // 10000 % 10) ]
+	except ValueError:
+		return None
+
+	if pointer + INSTRUCTION_VALUES[opcode] > len(memory):
+		return None
+
+	return opcode, modes, INSTRUCTION_VALUES[opcode]
+
+def decode_instruction(memory, pointer):
+	'''
+	Returns the Instruction at the address, or None
+	'''
+	decoded = decode(memory, pointer)
+
+	if decoded is None:
+		return None
+
+	opcode, modes, length = decoded
+
+	# Immediate mode writes don't exist
+	write_parameter = WRITE_PARAMETERS.get(opcode)
+	if write_parameter is not None and modes[write_parameter - 1] == Mode.IMMEDIATE:
+		return None
+
+	return Instruction(pointer, opcode, tuple(modes[:length - 1]), length, tuple(memory[pointer + 1:pointer + length]))
+
+def jump_behaviour(instruction):
+	'''
+	Returns (may jump, may fall through) for a jump, judging by an immediate condition
+	'''
+	if instruction.modes[0] != Mode.IMMEDIATE:
+		return True, True
+
+	jumps = (instruction.parameters[0] != 0) == (instruction.opcode == Opcode.JUMP_IF_TRUE)
+	return jumps, not jumps
+
+class BasicBlock:
+	def __init__(self, start):
+		self.start = start
+		self.instructions = []
+		# Start addresses of the blocks execution can carry on in
+		self.successors = []
+		# Ends on a jump whose target is only known at run time
+		self.indirect = False
+
+	@property
+	def end(self):
+		last = self.instructions[-1]
+		return last.address + last.length
+
+	def __repr__(self):
+		return f"BasicBlock({self.start}-{self.end}, successors={self.successors})"
+
+class Disassembly:
+	'''
+	Static model of a program. Build one with analyze().
+	'''
+	def __init__(self, memory):
+		self.memory = memory
+		# Instructions by address, from the linear sweep
+		self.linear = {}
+		# Instructions reachable from address 0, by address
+		self.instructions = {}
+		# Basic blocks by start address
+		self.blocks = {}
+		# Every cell taken up by reachable code
+		self.code = set()
+		# Cells of code that instructions write to, and the subset of those holding opcodes
+		self.self_modifying = set()
+		self.opcode_writes = set()
+		# Addresses of instructions writing through the relative base
+		self.dynamic_writes = []
+		# Addresses of jumps whose target is only known at run time
+		self.indirect_jumps = []
+		self.input_sites = []
+		self.output_sites = []
+
+	def classify(self, address):
+		return "code" if address in self.code else "data"
+
+	def is_stable(self, start, end):
+		'''
+		Tells whether nothing is known to write to the cells from start up to end
+		'''
+		return not any(address in self.self_modifying for address in range(start, end))
+
+	def listing(self):
+		'''
+		Lines of the disassembly, code and data in address order
+		'''
+		lines = []
+		address = 0
+
+		while address < len(self.memory):
+			instruction = self.instructions.get(address)
+
+			if instruction is None:
+				lines.append(f"{address:>6}  data {self.memory[address]}")
+				address += 1
+				continue
+
+			if address in self.blocks:
+				lines.append(f"block_{address}:")
+
+			lines.append(f"{address:>6}  {format_instruction(instruction)}")
+			address += instruction.length
+
+		return lines
+
+def format_instruction(instruction):
+	operands = []
+
+	for mode, parameter in zip(instruction.modes, instruction.parameters):
+		if mode == Mode.IMMEDIATE:
+			operands.append(str(parameter))
+		elif mode == Mode.RELATIVE:
+			operands.append(f"[rb{parameter:+}]")
+		else:
+			operands.append(f"[{parameter}]")
+
+	return " ".join([ instruction.opcode.name ] + operands)
+
+def analyze(program):
+	'''
+	Returns the Disassembly of a program, given as an intcode string, a list of values or a ProgramImage
+	'''
+	image = program if isinstance(program, ProgramImage) else ProgramImage(program)
+	disassembly = image.analysis.get("disassembly")
+
+	if disassembly is None:
+		disassembly = image.analysis["disassembly"] = disassemble(image.memory)
+
+	return disassembly
+
+def disassemble(memory):
+	disassembly = Disassembly(memory)
+	sweep(disassembly)
+	descend(disassembly)
+	split_blocks(disassembly)
+	find_writes(disassembly)
+	return disassembly
+
+def sweep(disassembly):
+	'''
+	Linear sweep, decoding the program front to back
+	'''
+	memory = disassembly.memory
+	address = 0
+
+	while address < len(memory):
+		instruction = decode_instruction(memory, address)
+
+		if instruction is None:
+			address += 1
+		else:
+			disassembly.linear[address] = instruction
+			address += instruction.length
+
+def descend(disassembly):
+	'''
+	Recursive descent from address 0
+	'''
+	memory = disassembly.memory
+	instructions = disassembly.instructions
+	pending = [0]
+	# Values pushed with immediate adds and multiplies, which is how calls push their return address
+	constants = set()
+	# Addresses right after jumps that always jump
+	return_sites = set()
+	# Addresses descent has started from
+	visited = set()
+
+	while pending:
+		while pending:
+			address = pending.pop()
+			visited.add(address)
+
+			while address not in instructions:
+				instruction = disassembly.linear.get(address) or decode_instruction(memory, address)
+
+				if instruction is None:
+					break
+
+				instructions[address] = instruction
+				opcode = instruction.opcode
+				address += instruction.length
+
+				if opcode == Opcode.HALT:
+					break
+
+				fold = CONSTANT_FOLDS.get(opcode)
+				if fold is not None and instruction.modes[0] == instruction.modes[1] == Mode.IMMEDIATE:
+					constants.add(fold(instruction.parameters[0], instruction.parameters[1]))
+
+				if opcode in JUMPS:
+					jumps, falls_through = jump_behaviour(instruction)
+
+					if jumps and instruction.modes[1] == Mode.IMMEDIATE:
+						pending.append(instruction.parameters[1])
+					elif jumps:
+						disassembly.indirect_jumps.append(instruction.address)
+
+					if not falls_through:
+						return_sites.add(address)
+						break
+
+		pending = [ address for address in return_sites & constants if address not in visited ]
+
+	disassembly.indirect_jumps.sort()
+
+	for address, instruction in instructions.items():
+		disassembly.code.update(range(address, address + instruction.length))
+
+		if instruction.opcode == Opcode.INPUT:
+			disassembly.input_sites.append(address)
+		elif instruction.opcode == Opcode.OUTPUT:
+			disassembly.output_sites.append(address)
+
+	disassembly.input_sites.sort()
+	disassembly.output_sites.sort()
+
+def split_blocks(disassembly):
+	'''
+	Splits reachable code into basic blocks, ending on jumps and halts
+	'''
+	instructions = disassembly.instructions
+	leaders = { 0 }
+
+	for instruction in instructions.values():
+		if instruction.opcode in JUMPS:
+			leaders.add(instruction.address + instruction.length)
+
+			if instruction.modes[1] == Mode.IMMEDIATE:
+				leaders.add(instruction.parameters[1])
+
+	block = None
+
+	for address in sorted(instructions):
+		instruction = instructions[address]
+
+		if block is None or address in leaders or block.end != address:
+			block = disassembly.blocks[address] = BasicBlock(address)
+
+		block.instructions.append(instruction)
+
+	for block in disassembly.blocks.values():
+		last = block.instructions[-1]
+		end = block.end
+
+		if last.opcode == Opcode.HALT:
+			continue
+
+		if last.opcode in JUMPS:
+			jumps, falls_through = jump_behaviour(last)
+
+			if jumps and last.modes[1] == Mode.IMMEDIATE:
+				block.successors.append(last.parameters[1])
+			elif jumps:
+				block.indirect = True
+		else:
+			falls_through = True
+
+		if falls_through and end in instructions:
+			block.successors.append(end)
+
+		block.successors = [ successor for successor in dict.fromkeys(block.successors) if successor in disassembly.blocks ]
+
+def find_writes(disassembly):
+	'''
+	Finds the writes landing on code
+	'''
+	for address, instruction in disassembly.instructions.items():
+		parameter = WRITE_PARAMETERS.get(instruction.opcode)
+
+		if parameter is None:
+			continue
+
+		if instruction.modes[parameter - 1] == Mode.RELATIVE:
+			disassembly.dynamic_writes.append(address)
+			continue
+
+		target = instruction.parameters[parameter - 1]
+
+		if target in disassembly.code:
+			disassembly.self_modifying.add(target)
+
+		if target in disassembly.instructions:
+			disassembly.opcode_writes.add(target)
+
+	disassembly.dynamic_writes.sort()
+
+if __name__ == '__main__':
+	if sys.argv[1:]:
+		for filename in sys.argv[1:]:
+			disassembly = analyze(ProgramImage.from_file(filename))
+			print("\n".join(disassembly.listing()))
+			print(f"\n{len(disassembly.instructions)} instructions in {len(disassembly.blocks)} blocks, "
+				f"{len(disassembly.memory) - len(disassembly.code)} cells of data, "
+				f"{len(disassembly.self_modifying)} self modified cells, "
+				f"inputs at {disassembly.input_sites}, outputs at {disassembly.output_sites}")
+		sys.exit()
+
+	import os
+	import time
+
+	from general.intcode_computer.image import ProgramImage
+	from general.intcode_computer.main import IntcodeComputer
+	from general.intcode_computer.tracer import IntcodeTracer
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	''' Blocks, data and self modification of a small program '''
+	# Counts the value at 15 down from 3, outputting it on the way
+	disassembly = analyze("1101,0,3,15,4,15,1001,15,-1,15,1005,15,4,99,0,0")
+	assert sorted(disassembly.blocks) == [0, 4, 13]
+	assert disassembly.blocks[0].successors == [4]
+	assert disassembly.blocks[4].successors == [4, 13]
+	assert [ instruction.address for instruction in disassembly.blocks[4].instructions ] == [4, 6, 10]
+	assert disassembly.classify(14) == disassembly.classify(15) == "data"
+	assert disassembly.self_modifying == set() and disassembly.is_stable(0, 14)
+	assert disassembly.output_sites == [4] and disassembly.input_sites == []
+
+	# Writes landing on code, the second one on an opcode
+	disassembly = analyze("1101,0,5,5,1101,1,2,17,1101,1,98,12,1,17,17,17,99,0")
+	assert disassembly.self_modifying == {5, 12}
+	assert disassembly.opcode_writes == {12}
+	assert not disassembly.is_stable(0, 17)
+
+	''' Calls come back to the address they pushed '''
+	# Pushes 9 as the return address, calls the function at 12, which jumps back through the stack
+	disassembly = analyze("109,20,21101,9,0,0,1105,1,12,104,7,99,2105,1,0")
+	assert sorted(disassembly.instructions) == [0, 2, 6, 9, 11, 12]
+	assert disassembly.indirect_jumps == [12]
+	assert disassembly.blocks[12].indirect
+	assert disassembly.dynamic_writes == [2]
+
+	''' Puzzle programs '''
+	for day in ["day_9", "day_13", "day_15", "day_17"]:
+		image = ProgramImage.from_file(os.path.join(repository, day, "input.txt"))
+		disassembly = analyze(image)
+		assert analyze(image) is disassembly
+		assert disassembly.input_sites or day == "day_9"
+		assert disassembly.output_sites
+
+		# Everything a run goes through was found statically
+		computer = IntcodeComputer(image, True, True, True, False, True)
+		tracer = IntcodeTracer(capacity=1, trace_filter=lambda computer, pointer, opcode: pointer not in disassembly.instructions).attach(computer)
+		computer.run_for(100000, [1] if day == "day_9" else [], False)
+		assert tracer.recorded == 0, day
+
+	''' Big programs analyze quickly '''
+	# 3000 blocks, each counting a cell down and jumping to the next block
+	values = []
+	for block in range(3000):
+		start = len(values)
+		values += [ 1001, start + 7, -1, start + 7, 1005, start + 7, start + 8, 0 ]
+	values.append(99)
+
+	started = time.perf_counter()
+	disassembly = analyze(values)
+	assert time.perf_counter() - started < 1
+	assert len(disassembly.memory) > 20000
+	assert len(disassembly.blocks) == 3001
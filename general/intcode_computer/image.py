@@ -0,0 +1,130 @@
+'''
+Parsed, immutable Intcode programs.
+
+A ProgramImage parses a program once and keeps its values in a tuple nothing can write to.
+Computers take an image anywhere they take an instructions string, and booting one from
+an image is a single copy of that tuple into a list, with no parsing at all:
+
+	image = ProgramImage(instructions)
+	amplifiers = [ IntcodeComputer(image, True, True, True) for phase in phases ]
+
+So building the hundreds of computers a day 7 phase sweep goes through costs next to nothing
+past the first parse. Every backend works from an image, the ahead of time compiler
+included.
+
+Anything working out facts about the program that every computer running it can share
+(disassembly, blocks, ...) can keep them in the image's analysis dict.
+'''
+import hashlib
+
+def program_hash(memory):
+	'''
+	Hash identifying a program by its values. Caches of compiled code and of runs are keyed on it.
+	'''
+	return hashlib.sha256(",".join([ str(value) for value in memory ]).encode()).hexdigest()
+
+class ProgramImage:
+	'''
+	@param str|list program 	- Program as an intcode string, or as its list of values.
+	'''
+	def __init__(self, program):
+		if isinstance(program, ProgramImage):
+			program = program.memory
+
+		if isinstance(program, str):
+			self.memory = tuple([ int(value) for value in program.split(",") ])
+			self.text = program
+		else:
+			self.memory = tuple(program)
+			self.text = None
+
+		self.length = len(self.memory)
+		self.digest = None
+		# Results of static analysis of the program by name, shared by everything running it
+		self.analysis = {}
+
+	@classmethod
+	def from_file(cls, path):
+		with open(path) as f:
+			return cls(f.read().strip())
+
+	@property
+	def hash(self):
+		if self.digest is None:
+			self.digest = program_hash(self.memory)
+
+		return self.digest
+
+	def load(self):
+		'''
+		Returns a fresh, writable copy of the program's memory
+		'''
+		return list(self.memory)
+
+	def __len__(self):
+		return self.length
+
+	def __getitem__(self, address):
+		return self.memory[address]
+
+	def __str__(self):
+		if self.text is None:
+			self.text = ",".join([ str(value) for value in self.memory ])
+
+		return self.text
+
+	def __eq__(self, other):
+		return isinstance(other, ProgramImage) and self.memory == other.memory
+
+	def __hash__(self):
+		return hash(self.memory)
+
+	def __repr__(self):
+		return f"ProgramImage({self.length} values, {self.hash[:12]})"
+
+if __name__ == '__main__':
+	import os
+	import itertools
+
+	from general.intcode_computer.backends import BACKENDS
+	# Computers check for the image class of the package, not the one of this script
+	from general.intcode_computer.image import ProgramImage
+	from general.intcode_computer.main import IntcodeComputer, build_intcode_array
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	''' Images hold the parsed program '''
+	image = ProgramImage("1,9,10,3,2,3,11,0,99,30,40,50")
+	assert len(image) == 12 and image[3] == 3
+	assert str(image) == "1,9,10,3,2,3,11,0,99,30,40,50"
+	assert image == ProgramImage([1, 9, 10, 3, 2, 3, 11, 0, 99, 30, 40, 50]) == ProgramImage(image)
+	assert image.hash == ProgramImage(build_intcode_array(str(image))).hash
+	assert str(ProgramImage([1, 0, 0, 0, 99])) == "1,0,0,0,99"
+
+	''' Computers run from images without touching them '''
+	for computer_class in BACKENDS.values():
+		computer = computer_class(image, False, False, True, True)
+		assert computer.process_intcode() == "3500,9,10,70,2,3,11,0,99,30,40,50"
+		assert image.memory == (1, 9, 10, 3, 2, 3, 11, 0, 99, 30, 40, 50)
+
+	# While not persisting, the computer hands back the program it was made from
+	assert IntcodeComputer(image).instructions == str(image)
+
+	''' Day 7 feedback loops from a single image '''
+	image = ProgramImage.from_file(os.path.join(repository, "day_7", "input.txt"))
+	best = 0
+
+	for phases in itertools.permutations(range(5, 10)):
+		amplifiers = [ IntcodeComputer(image, True, True, True) for phase in phases ]
+		signal = 0
+
+		for amplifier, phase in zip(amplifiers, phases):
+			amplifier.queue_input([phase])
+
+		while not amplifiers[-1].halted:
+			for amplifier in amplifiers:
+				signal = (amplifier.run_until_input_needed([signal]) or [signal])[-1]
+
+		best = max(best, signal)
+
+	assert best == 76211147
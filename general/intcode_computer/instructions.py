@@ -0,0 +1,207 @@
+'''
+Instruction set of the Intcode computer.
+
+Besides the opcode and parameter mode enums, this module builds a dispatch table of
+specialized handlers: one per (opcode, parameter modes) combination, keyed by the raw
+instruction value found in memory. 1002 (multiply, second parameter immediate) maps
+straight to a handler that has its parameter modes baked in, so running an instruction
+takes a single table lookup and a single call.
+
+Every handler has the signature
+
+	handler(computer, memory, pointer) -> next pointer
+
+and returns None when the computer has to stop running (halt, input that has not been
+queued yet, or an output that needs to be handed back to the caller right away).
+Handlers that stop set computer.instruction_pointer themselves.
+
+Handlers index memory directly, so an address past the end of memory raises IndexError
+before the instruction has any side effects. Negative addresses would wrap around to the
+end of the list instead, so handlers check for those and raise IndexError themselves.
+The computer falls back to its reference interpreter for those instructions.
+'''
+from enum import IntEnum
+from itertools import product
+
+# Constants
+class Opcode(IntEnum):
+	ADDITION=1
+	MULTIPLICATION=2
+	INPUT=3
+	OUTPUT=4
+	JUMP_IF_TRUE=5
+	JUMP_IF_FALSE=6
+	LESS_THAN=7
+	EQUALS=8
+	ADJUST=9
+	HALT=99
+
+
+class Mode(IntEnum):
+	POSITION = 0
+	IMMEDIATE = 1
+	RELATIVE = 2
+
+
+# How many values (opcode included) each instruction takes up in memory
+INSTRUCTION_VALUES = {
+	Opcode.ADDITION: 4,
+	Opcode.MULTIPLICATION: 4,
+	Opcode.INPUT: 2,
+	Opcode.OUTPUT: 2,
+	Opcode.JUMP_IF_TRUE: 3,
+	Opcode.JUMP_IF_FALSE: 3,
+	Opcode.LESS_THAN: 4,
+	Opcode.EQUALS: 4,
+	Opcode.ADJUST: 2,
+	Opcode.HALT: 1,
+}
+
+# Which parameter (counting from 1) each instruction writes to
+WRITE_PARAMETERS = {
+	Opcode.ADDITION: 3,
+	Opcode.MULTIPLICATION: 3,
+	Opcode.INPUT: 1,
+	Opcode.LESS_THAN: 3,
+	Opcode.EQUALS: 3,
+}
+
+# Expressions reading a parameter's value, by mode. Position and relative mode read from
+# the address worked out by CHECK_ADDRESS.
+READ = {
+	Mode.POSITION: "memory[address_{offset}]",
+	Mode.IMMEDIATE: "memory[pointer + {offset}]",
+	Mode.RELATIVE: "memory[address_{offset}]",
+}
+
+# Message of the IndexError raised for negative addresses
+NEGATIVE_ADDRESS = "Negative address"
+
+# Works out the address a parameter reads from, raising IndexError for negative ones
+CHECK_ADDRESS = '''
+	address_{offset} = {address}
+	if address_{offset} < 0:
+		raise IndexError(NEGATIVE_ADDRESS)'''
+
+# How many parameters (counting from 1) each instruction reads from
+READ_PARAMETERS = {
+	Opcode.ADDITION: 2,
+	Opcode.MULTIPLICATION: 2,
+	Opcode.INPUT: 0,
+	Opcode.OUTPUT: 1,
+	Opcode.JUMP_IF_TRUE: 2,
+	Opcode.JUMP_IF_FALSE: 2,
+	Opcode.LESS_THAN: 2,
+	Opcode.EQUALS: 2,
+	Opcode.ADJUST: 1,
+	Opcode.HALT: 0,
+}
+
+# Expressions for the address a parameter writes to, by mode.
+# Writes never use immediate mode, so it is treated the same as position mode.
+ADDRESS = {
+	Mode.POSITION: "memory[pointer + {offset}]",
+	Mode.IMMEDIATE: "memory[pointer + {offset}]",
+	Mode.RELATIVE: "computer.relative_base + memory[pointer + {offset}]",
+}
+
+STORE = '''
+	if address < 0:
+		raise IndexError(NEGATIVE_ADDRESS)
+	memory[address] = {value}
+	if address in computer.decoded_addresses:
+		computer.invalidate_decoded(address)
+'''
+
+TEMPLATES = {
+	Opcode.ADDITION: '''
+	address = {address_3}''' + STORE.format(value="{read_1} + {read_2}") + '''
+	return pointer + 4
+''',
+	Opcode.MULTIPLICATION: '''
+	address = {address_3}''' + STORE.format(value="{read_1} * {read_2}") + '''
+	return pointer + 4
+''',
+	Opcode.INPUT: '''
+	if computer.program_input and not computer.input_queue:
+		computer.instruction_pointer = pointer
+		computer.waiting_for_input = True
+		return None
+	computer.get_input(memory, {address_1})
+	return pointer + 2
+''',
+	Opcode.OUTPUT: '''
+	value = {read_1}
+	if computer.collect_outputs:
+		computer.outputs.append(value)
+		if computer.stop_on_output:
+			computer.instruction_pointer = pointer + 2
+			return None
+		return pointer + 2
+	computer.do_output(memory, value)
+	return pointer + 2
+''',
+	Opcode.JUMP_IF_TRUE: '''
+	if {read_1} != 0:
+		return {read_2}
+	return pointer + 3
+''',
+	Opcode.JUMP_IF_FALSE: '''
+	if {read_1} == 0:
+		return {read_2}
+	return pointer + 3
+''',
+	Opcode.LESS_THAN: '''
+	address = {address_3}''' + STORE.format(value="1 if {read_1} < {read_2} else 0") + '''
+	return pointer + 4
+''',
+	Opcode.EQUALS: '''
+	address = {address_3}''' + STORE.format(value="1 if {read_1} == {read_2} else 0") + '''
+	return pointer + 4
+''',
+	Opcode.ADJUST: '''
+	computer.relative_base += {read_1}
+	return pointer + 2
+''',
+	Opcode.HALT: '''
+	computer.instruction_pointer = pointer
+	computer.halted = True
+	return None
+''',
+}
+
+def build_handler(opcode, modes):
+	'''
+	Generates the specialized handler for an opcode with the given
+	length three tuple of parameter modes
+	'''
+	parameters = {}
+	checks = ""
+	for offset, mode in enumerate(modes, 1):
+		parameters[f"read_{offset}"] = READ[mode].format(offset=offset)
+		parameters[f"address_{offset}"] = ADDRESS[mode].format(offset=offset)
+
+		if offset <= READ_PARAMETERS[opcode] and mode != Mode.IMMEDIATE:
+			checks += CHECK_ADDRESS.format(offset=offset, address=parameters[f"address_{offset}"])
+
+	name = f"{opcode.name.lower()}_{''.join(str(int(mode)) for mode in modes)}"
+	source = f"def {name}(computer, memory, pointer):" + checks + TEMPLATES[opcode].format(**parameters)
+
+	namespace = { "NEGATIVE_ADDRESS": NEGATIVE_ADDRESS }
+	exec(compile(source, f"<intcode {name}>", "exec"), namespace)
+	return namespace[name]
+
+def build_handlers():
+	'''
+	Builds the dispatch table mapping every raw instruction value to its handler
+	'''
+	handlers = {}
+	for opcode in Opcode:
+		for modes in product(Mode, repeat=3):
+			mode_1, mode_2, mode_3 = modes
+			instruction = opcode + 100 * mode_1 + 1000 * mode_2 + 10000 * mode_3
+			handlers[instruction] = build_handler(opcode, modes)
+
+	return handlers
+
+INSTRUCTION_HANDLERS = build_handlers()
@@ -0,0 +1,373 @@
+'''
+Trace compiling tier for the Intcode computer.
+
+JitIntcodeComputer counts how often execution enters each block: a run of instructions
+starting at a jump target (or right after input/output) and going up to the next jump,
+input, output or halt. Once a block has been entered `compile_threshold` times, Python
+source is generated for the whole block with every operand baked in as a constant, and
+compiled into a single function operating directly on the memory list:
+
+	def block_17(computer, memory):
+		decoded_addresses = computer.decoded_addresses
+		rb = computer.relative_base
+		...
+		memory[1000] = memory[1000] + 1
+		if 1000 in decoded_addresses:
+			...bail out back to the interpreter...
+		if memory[1000] != memory[1001]:
+			computer.relative_base = rb
+			return 17
+		...
+
+Every instruction of a compiled block is in the decode cache, so any write landing on
+compiled code goes through invalidate_decoded, which throws away the blocks containing
+that instruction. A block that writes to code bails out to the interpreter right after
+the write, so it never runs stale code.
+
+Intcode programs like the day 13 game index arrays by rewriting the parameters of their
+own instructions. Parameters that have been written to once are marked volatile: from then
+on they are read from memory by the compiled code instead of being baked in, and writing to
+them no longer throws anything away. Blocks that keep getting thrown away anyway (their
+opcodes are being rewritten) are left to the interpreter after MAX_INVALIDATIONS times.
+
+An instruction stepping outside of memory is handed to the reference interpreter,
+the same as in IntcodeComputer.execute. Computed addresses are checked for being negative
+first, since indexing the memory list with one would wrap around to its end.
+'''
+from general.intcode_computer.main import IntcodeComputer, UNLIMITED
+from general.intcode_computer.instructions import Opcode, Mode, READ_PARAMETERS, NEGATIVE_ADDRESS
+
+# Instructions that end a block. Jumps are compiled into the end of the block,
+# the others are left for the interpreter.
+BLOCK_ENDS = frozenset([ Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE, Opcode.INPUT, Opcode.OUTPUT, Opcode.HALT ])
+JUMPS = frozenset([ Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE ])
+
+# Block entry count given to blocks that can't be compiled, so they are never tried again
+NEVER = -UNLIMITED
+
+# How many times a block can be thrown away before we stop compiling it
+MAX_INVALIDATIONS = 3
+
+def read_expression(mode, parameter):
+	'''
+	Expression reading a parameter's value. The parameter itself is given as an expression too.
+	'''
+	if mode == Mode.IMMEDIATE:
+		return parameter
+	if mode == Mode.RELATIVE:
+		return f"memory[rb + {parameter}]"
+	return f"memory[{parameter}]"
+
+def address_expression(mode, parameter):
+	if mode == Mode.RELATIVE:
+		return f"rb + {parameter}"
+	return parameter
+
+def checked_address(name, address):
+	'''
+	Source lines raising IndexError when the address expression is negative, which indexing the
+	memory list would wrap around to its end. Returns them along with the expression to index
+	memory with afterwards. Constant addresses are checked right here.
+	'''
+	try:
+		constant = int(address)
+	except ValueError:
+		return [ f"{name} = {address}", f"if {name} < 0:", "	raise IndexError(NEGATIVE_ADDRESS)" ], name
+
+	return [ "raise IndexError(NEGATIVE_ADDRESS)" ] if constant < 0 else [], address
+
+class JitIntcodeComputer(IntcodeComputer):
+	'''
+	Same as IntcodeComputer, but hot blocks get compiled into Python functions
+	'''
+	compile_threshold = 16
+	max_block_instructions = 64
+
+	def __init__(self, *args, **kwargs):
+		# Compiled blocks by start address, as tuples of (function, instruction count)
+		self.compiled = {}
+		# Start addresses of the compiled blocks each instruction is part of
+		self.blocks_by_instruction = {}
+		# How many times execution entered each block start address
+		self.block_entries = {}
+		# How many times the block at each start address has been thrown away
+		self.block_invalidations = {}
+		# Instruction parameters the program writes to
+		self.volatile_addresses = set()
+		self.block_overcount = 0
+		super().__init__(*args, **kwargs)
+
+	def release_memory(self):
+		super().release_memory()
+		self.compiled = {}
+		self.blocks_by_instruction = {}
+		self.block_entries = {}
+		self.block_invalidations = {}
+		self.volatile_addresses = set()
+
+	def unshare_memory(self):
+		if self.memory_owners[0] > 1:
+			super().unshare_memory()
+			self.compiled = self.compiled.copy()
+			self.blocks_by_instruction = self.blocks_by_instruction.copy()
+			self.block_entries = self.block_entries.copy()
+			self.block_invalidations = self.block_invalidations.copy()
+			self.volatile_addresses = self.volatile_addresses.copy()
+
+	def invalidate_decoded(self, address):
+		'''
+		Forgets the decoded instruction covering the address along with every block compiled from it
+		'''
+		pointer = self.decoded_addresses[address]
+		super().invalidate_decoded(address)
+
+		if address != pointer:
+			self.volatile_addresses.add(address)
+
+		for start in self.blocks_by_instruction.pop(pointer, ()):
+			if self.compiled.pop(start, None) is not None:
+				invalidations = self.block_invalidations.get(start, 0) + 1
+				self.block_invalidations[start] = invalidations
+				self.block_entries[start] = NEVER if invalidations >= MAX_INVALIDATIONS else 0
+
+	def decode_instruction(self, array, pointer):
+		'''
+		Same as IntcodeComputer.decode_instruction, except that writes to volatile
+		parameters don't invalidate the instruction. Handlers and compiled blocks
+		read those parameters from memory every time.
+		'''
+		decoded = super().decode_instruction(array, pointer)
+
+		for address in range(pointer + 1, pointer + decoded[3]):
+			if address in self.volatile_addresses and self.decoded_addresses.get(address) == pointer:
+				del self.decoded_addresses[address]
+
+		return decoded
+
+	def block_source(self, memory, start):
+		'''
+		Generates the Python source of the function for the block starting at the address.
+		Returns the source along with the addresses of the instructions in the block,
+		or None when there is nothing worth compiling there.
+		'''
+		lines = []
+		pointers = []
+		pointer = start
+
+		while len(pointers) < self.max_block_instructions:
+			try:
+				handler, opcode, modes, instruction_values = self.decoded.get(pointer) or self.decode_instruction(memory, pointer)
+				parameters = memory[pointer + 1:pointer + instruction_values]
+			except Exception:
+				break
+
+			if len(parameters) != instruction_values - 1 or opcode in BLOCK_ENDS and opcode not in JUMPS:
+				break
+
+			pointers.append(pointer)
+			lines += self.compile_instruction(opcode, modes, parameters, pointer, len(pointers))
+			pointer += instruction_values
+
+			if opcode in JUMPS:
+				break
+
+		if not pointers:
+			return None
+
+		if not lines[-1].startswith("return"):
+			lines += [ "computer.relative_base = rb", f"return {pointer}" ]
+
+		executed_before = { address: index for index, address in enumerate(pointers) }
+		source = "\n".join([
+			f"def block_{start}(computer, memory, BLOCK_INSTRUCTIONS={len(pointers)}, EXECUTED_BEFORE={executed_before!r}):",
+			"	decoded_addresses = computer.decoded_addresses",
+			"	rb = computer.relative_base",
+			f"	pointer = {start}",
+			"	try:",
+		] + [ "		" + line for line in lines ] + [
+			"	except IndexError:",
+			"		computer.relative_base = rb",
+			"		computer.block_overcount += BLOCK_INSTRUCTIONS - EXECUTED_BEFORE[pointer] - 1",
+			"		return computer.step(memory, pointer)",
+		])
+
+		return source, pointers
+
+	def compile_block(self, memory, start):
+		'''
+		Compiles the function for the block starting at the address.
+		Returns the compiled block, or None when there is nothing worth compiling there.
+		'''
+		generated = self.block_source(memory, start)
+
+		if generated is None:
+			self.block_entries[start] = NEVER
+			return None
+
+		source, pointers = generated
+		namespace = { "NEGATIVE_ADDRESS": NEGATIVE_ADDRESS }
+		exec(compile(source, f"<intcode block {start}>", "exec"), namespace)
+		return self.add_block(start, namespace[f"block_{start}"], pointers)
+
+	def add_block(self, start, function, pointers):
+		'''
+		Starts running the compiled function whenever execution enters the block
+		'''
+		block = ( function, len(pointers) )
+		self.compiled[start] = block
+
+		# Sets here are shared with forks, so they are replaced rather than changed
+		for address in pointers:
+			self.blocks_by_instruction[address] = self.blocks_by_instruction.get(address, frozenset()) | { start }
+
+		return block
+
+	def compile_instruction(self, opcode, modes, parameters, pointer, executed):
+		'''
+		Python source lines for a single instruction. `executed` is how many instructions
+		of the block have run once this one is done.
+		'''
+		parameters = [
+			f"memory[{address}]" if address in self.volatile_addresses else str(parameter)
+			for address, parameter in enumerate(parameters, pointer + 1)
+		]
+		lines = [ f"pointer = {pointer}" ]
+		read = []
+
+		for offset, ( mode, parameter ) in enumerate(zip(modes, parameters[:READ_PARAMETERS[opcode]]), 1):
+			if mode == Mode.IMMEDIATE:
+				read.append(parameter)
+				continue
+
+			checks, address = checked_address(f"address_{offset}", address_expression(mode, parameter))
+			lines += checks
+			read.append(f"memory[{address}]")
+
+		next_pointer = pointer + len(parameters) + 1
+
+		if opcode == Opcode.ADJUST:
+			return lines + [ f"rb += {read[0]}" ]
+
+		if opcode in JUMPS:
+			comparison = "!=" if opcode == Opcode.JUMP_IF_TRUE else "=="
+			return lines + [
+				f"if {read[0]} {comparison} 0:",
+				"	computer.relative_base = rb",
+				f"	return {read[1]}",
+				"computer.relative_base = rb",
+				f"return {next_pointer}",
+			]
+
+		if opcode == Opcode.ADDITION:
+			value = f"{read[0]} + {read[1]}"
+		elif opcode == Opcode.MULTIPLICATION:
+			value = f"{read[0]} * {read[1]}"
+		elif opcode == Opcode.LESS_THAN:
+			value = f"1 if {read[0]} < {read[1]} else 0"
+		else:
+			value = f"1 if {read[0]} == {read[1]} else 0"
+
+		checks, address = checked_address("address", address_expression(modes[2], parameters[2]))
+
+		return lines + checks + [
+			f"memory[{address}] = {value}",
+			f"if {address} in decoded_addresses:",
+			"	computer.relative_base = rb",
+			f"	computer.block_overcount += BLOCK_INSTRUCTIONS - {executed}",
+			f"	computer.invalidate_decoded({address})",
+			f"	return {next_pointer}",
+		]
+
+	def execute(self, max_instructions=None):
+		'''
+		Same as IntcodeComputer.execute, except that compiled blocks are run whenever execution enters one.
+		A compiled block always runs to its end, so a limited run can go over max_instructions by
+		up to max_block_instructions.
+		'''
+		self.unshare_memory()
+		memory = self.memory
+		decoded = self.decoded
+		compiled = self.compiled
+		block_entries = self.block_entries
+		threshold = self.compile_threshold
+		pointer = self.instruction_pointer
+		budget = UNLIMITED if max_instructions is None else max_instructions
+		count = 0
+
+		while pointer is not None and count < budget:
+			block = compiled.get(pointer)
+
+			if block is not None:
+				count += block[1]
+				pointer = block[0](self, memory)
+				continue
+
+			entries = block_entries.get(pointer, 0) + 1
+			block_entries[pointer] = entries
+
+			if entries >= threshold and self.compile_block(memory, pointer) is not None:
+				continue
+
+			# Interpret up to the end of the block
+			try:
+				while count < budget:
+					try:
+						entry = decoded[pointer]
+					except KeyError:
+						entry = self.decode_instruction(memory, pointer)
+
+					count += 1
+					pointer = entry[0](self, memory, pointer)
+
+					if pointer is None or entry[1] in BLOCK_ENDS:
+						break
+			except IndexError:
+				pointer = self.step(memory, pointer)
+
+		if pointer is not None:
+			self.instruction_pointer = pointer
+
+		# An input that has to wait hasn't run, it's counted once it does
+		if self.waiting_for_input:
+			count -= 1
+
+		count -= self.block_overcount
+		self.block_overcount = 0
+		self.process_count += count
+		return count
+
+if __name__ == '__main__':
+	import os
+
+	''' Compiled code gives the same results as the interpreter '''
+	with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "day_9", "input.txt")) as f:
+		instructions = f.read()
+
+	for boost_input in [1, 2]:
+		interpreted = IntcodeComputer(instructions, True, True, True, False, True)
+		compiled = JitIntcodeComputer(instructions, True, True, True, False, True)
+		assert interpreted.run_until_halt([boost_input]) == compiled.run_until_halt([boost_input])
+		assert interpreted.process_count == compiled.process_count
+
+	# Sensor boost mode spends its time in a handful of hot blocks
+	assert compiled.compiled
+
+	''' Writes landing in compiled code throw the block away '''
+	# Counts mem[30] past 100 with a loop whose own add instruction gets patched
+	# from adding 1 to adding 2 halfway through.
+	program = "1001,30,1,30,1008,30,50,31,1006,31,15,1101,0,2,2,1007,30,101,31,1005,31,0,99,0,0,0,0,0,0,0,0,0"
+	compiled = JitIntcodeComputer(program, False, False, True, True)
+	interpreted = IntcodeComputer(program, False, False, True, True)
+	assert compiled.process_intcode() == interpreted.process_intcode()
+	assert compiled.memory[30] == 102
+	assert compiled.process_count == interpreted.process_count
+
+	''' Parameters the program keeps rewriting are read from memory instead of being thrown away '''
+	# Sums mem[50..149] into mem[20] by bumping the first parameter of its own add instruction
+	program = ",".join(map(str, [1,50,20,20, 1001,1,1,1, 1007,1,150,21, 1005,21,0, 4,20, 99] + [0] * 32 + list(range(1, 101))))
+	compiled = JitIntcodeComputer(program, True, True, True, False)
+	interpreted = IntcodeComputer(program, True, True, True, False)
+	assert compiled.run_until_halt() == interpreted.run_until_halt() == [5050]
+	assert compiled.process_count == interpreted.process_count
+	assert compiled.volatile_addresses == {1}
+	assert 0 in compiled.compiled
@@ -0,0 +1,405 @@
+'''
+Busy loop detection and fast forwarding for the Intcode computer.
+
+FastForwardIntcodeComputer runs like the dispatch backend, except that jumps going
+backwards (the back edges of loops) count how often they're taken. Once a loop has gone
+round often enough, the computer runs two iterations of it by hand, from its head back
+to its head, watching what they write:
+
+	- Both iterations took the same path, left the relative base alone and added the same
+	  amount to every cell they wrote. Every cell the loop touches is then a linear function
+	  of the iteration count k, and so is every comparison and jump condition in its body.
+	  Working out the first k any of those conditions changes at tells how many more
+	  iterations go exactly the same way, and all of them are skipped at once by adding
+	  k times the deltas. The exit itself, and anything after it, runs as usual.
+
+	- Nothing changed at all, or the loop can never exit. The program is spinning without
+	  ever doing any input or output, so running it is pointless. The computer stops with
+	  `idle` set, which run_for reports as Status.IDLE and the scheduler treats as parked.
+
+Loops doing input or output, loops whose addresses move (pointers stepped through memory)
+and loops multiplying two changing values are left to run as usual. Looking at a loop that
+can't be skipped doubles the number of back edges it has to take before it's looked at again,
+so those cost next to nothing.
+
+	IntcodeComputer = backend("fastforward")
+
+Skipped instructions, and the ones run by hand, still count towards process_count and the
+count execute() returns, so results and instruction counts match every other backend.
+Budgets given to run_for can be overrun by a skip.
+'''
+from general.intcode_computer.main import IntcodeComputer
+from general.intcode_computer.instructions import Opcode, Mode, INSTRUCTION_VALUES, WRITE_PARAMETERS, INSTRUCTION_HANDLERS
+
+JUMPS = frozenset([ Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE ])
+
+# Instructions a busy loop doesn't have
+EFFECTS = frozenset([ Opcode.INPUT, Opcode.OUTPUT, Opcode.HALT ])
+
+FOREVER = float("inf")
+
+# Back edge watching wrappers, by the jump handler they wrap
+WATCHED_HANDLERS = {}
+
+def watch_back_edges(handler):
+	'''
+	Wraps a jump handler, reporting every backwards jump to the computer
+	'''
+	watched = WATCHED_HANDLERS.get(handler)
+
+	if watched is None:
+		def watched(computer, memory, pointer):
+			target = handler(computer, memory, pointer)
+
+			if target <= pointer:
+				return computer.back_edge(memory, target)
+
+			return target
+
+		WATCHED_HANDLERS[handler] = watched
+
+	return watched
+
+def while_negative(value, step):
+	'''
+	Number of iterations k, counting from 0, for which value + step * k < 0 stays as it is at k = 0
+	'''
+	if value < 0:
+		return FOREVER if step <= 0 else (-value + step - 1) // step
+
+	return FOREVER if step >= 0 else value // -step + 1
+
+def while_zero(value, step):
+	'''
+	Number of iterations k, counting from 0, for which value + step * k == 0 stays as it is at k = 0
+	'''
+	if value == 0:
+		return FOREVER if step == 0 else 1
+
+	if step != 0 and -value % step == 0 and -value // step > 0:
+		return -value // step
+
+	return FOREVER
+
+class FastForwardIntcodeComputer(IntcodeComputer):
+	'''
+	IntcodeComputer that skips over the iterations of loops that only count
+	'''
+	# Back edges a loop takes before it's looked at, doubling every time it can't be skipped
+	watch_after = 16
+	# Longest loop body looked at, in instructions
+	max_body_instructions = 256
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		# Loop heads to [back edges taken, back edges until the loop is looked at]
+		self.loop_heads = {}
+		self.skipped_iterations = 0
+		self.skipped_instructions = 0
+		# Instructions skipped or run by hand that execute() hasn't reported yet
+		self.unreported = 0
+
+	def release_memory(self):
+		super().release_memory()
+		# Loop heads are addresses in the program we're letting go of
+		self.loop_heads = {}
+
+	def fork(self):
+		clone = super().fork()
+		clone.loop_heads = { head: counts.copy() for head, counts in self.loop_heads.items() }
+		return clone
+
+	def decode_instruction(self, array, pointer):
+		decoded = super().decode_instruction(array, pointer)
+
+		# Jumps straight ahead can't close a loop, only the others are watched
+		if decoded[1] in JUMPS and not (decoded[2][1] == Mode.IMMEDIATE and array[pointer + 2] > pointer):
+			decoded = ( watch_back_edges(decoded[0]), ) + decoded[1:]
+			self.decoded[pointer] = decoded
+
+		return decoded
+
+	def execute(self, max_instructions=None):
+		'''
+		Same as IntcodeComputer.execute, counting the instructions skipped and run by hand on the way
+		'''
+		self.unreported = 0
+		count = super().execute(max_instructions) + self.unreported
+		self.unreported = 0
+		return count
+
+	def back_edge(self, memory, head):
+		'''
+		Called on every backwards jump. Returns where to carry on running from.
+		'''
+		counts = self.loop_heads.get(head)
+
+		if counts is None:
+			counts = self.loop_heads[head] = [ 0, self.watch_after ]
+
+		counts[0] += 1
+
+		if counts[0] < counts[1]:
+			return head
+
+		counts[0] = 0
+		counts[1] *= 2
+		return self.fast_forward(memory, head, counts)
+
+	def fast_forward(self, memory, head, counts):
+		relative_base = self.relative_base
+
+		pointer, path, deltas = self.run_iteration(memory, head)
+		if path is None or self.relative_base != relative_base:
+			return pointer
+
+		pointer, again, deltas_again = self.run_iteration(memory, head)
+		if again != path or deltas_again != deltas or self.relative_base != relative_base:
+			return pointer
+
+		# Going round without changing anything
+		if not any(deltas.values()):
+			return self.go_idle(head)
+
+		iterations = self.iterations_left(memory, path, deltas)
+
+		if iterations is None:
+			return head
+
+		# Counting forever
+		if iterations == FOREVER:
+			return self.go_idle(head)
+
+		for address, delta in deltas.items():
+			self.store(memory, address, self.read(memory, address) + delta * iterations)
+
+		self.process_count += iterations * len(path)
+		self.unreported += iterations * len(path)
+		self.skipped_iterations += iterations
+		self.skipped_instructions += iterations * len(path)
+		counts[1] = self.watch_after
+
+		return head
+
+	def go_idle(self, head):
+		self.idle = True
+		self.instruction_pointer = head
+		return None
+
+	def write_address(self, memory, pointer, opcode, modes):
+		parameter = WRITE_PARAMETERS.get(opcode)
+
+		if parameter is None:
+			return None
+
+		address = memory[pointer + parameter]
+		if modes[parameter - 1] == Mode.RELATIVE:
+			address += self.relative_base
+
+		return address
+
+	def run_iteration(self, memory, head):
+		'''
+		Runs the loop from its head until it comes back to it.
+		Returns the pointer we got to, plus the path taken and the amount added to every
+		cell written if we made it back to the head, or None for both if we didn't.
+		'''
+		decoded = self.decoded
+		path = []
+		before = {}
+		pointer = head
+
+		while len(path) < self.max_body_instructions:
+			try:
+				entry = decoded[pointer]
+			except KeyError:
+				entry = self.decode_instruction(memory, pointer)
+
+			opcode = entry[1]
+			if opcode in EFFECTS:
+				break
+
+			try:
+				address = self.write_address(memory, pointer, opcode, entry[2])
+				if address is not None and address not in before:
+					before[address] = self.read(memory, address)
+
+				# The plain handler, jumps in here aren't watched
+				next_pointer = INSTRUCTION_HANDLERS[memory[pointer]](self, memory, pointer)
+			except IndexError:
+				break
+
+			path.append(pointer)
+			self.process_count += 1
+			self.unreported += 1
+			pointer = next_pointer
+
+			if pointer == head:
+				return pointer, path, { address: self.read(memory, address) - value for address, value in before.items() }
+
+		return pointer, None, None
+
+	def iterations_left(self, memory, path, deltas):
+		'''
+		Number of iterations from now on that take the same path as the last one,
+		FOREVER if they all do, or None if the loop isn't linear in its iteration count.
+		Values are (value now, amount added every iteration) pairs.
+		'''
+		written = {}
+
+		def cell(address):
+			if address in written:
+				return written[address]
+
+			return ( self.read(memory, address), deltas.get(address, 0) )
+
+		relative_base = self.relative_base
+		iterations = FOREVER
+
+		for pointer in path:
+			instruction, step = cell(pointer)
+			if step:
+				return None
+
+			opcode = Opcode(instruction % 100)
+			modes = self.parse_parameter_modes(instruction // 100)
+			parameters = [ cell(pointer + offset) for offset in range(1, INSTRUCTION_VALUES[opcode]) ]
+			addresses = []
+
+			for ( parameter, parameter_step ), mode in zip(parameters, modes):
+				# Addresses moving from one iteration to the next
+				if parameter_step and mode != Mode.IMMEDIATE:
+					return None
+
+				addresses.append(parameter + relative_base if mode == Mode.RELATIVE else parameter)
+
+			def operand(index):
+				return parameters[index] if modes[index] == Mode.IMMEDIATE else cell(addresses[index])
+
+			if opcode == Opcode.ADDITION or opcode == Opcode.MULTIPLICATION or opcode == Opcode.LESS_THAN or opcode == Opcode.EQUALS:
+				( value_1, step_1 ), ( value_2, step_2 ) = operand(0), operand(1)
+
+				if opcode == Opcode.ADDITION:
+					result = ( value_1 + value_2, step_1 + step_2 )
+				elif opcode == Opcode.MULTIPLICATION:
+					if step_1 and step_2:
+						return None
+					result = ( value_1 * value_2, value_1 * step_2 + step_1 * value_2 )
+				elif opcode == Opcode.LESS_THAN:
+					iterations = min(iterations, while_negative(value_1 - value_2, step_1 - step_2))
+					result = ( 1 if value_1 < value_2 else 0, 0 )
+				else:
+					iterations = min(iterations, while_zero(value_1 - value_2, step_1 - step_2))
+					result = ( 1 if value_1 == value_2 else 0, 0 )
+
+				written[addresses[2]] = result
+			elif opcode in JUMPS:
+				condition, condition_step = operand(0)
+				target, target_step = operand(1)
+
+				if target_step:
+					return None
+
+				iterations = min(iterations, while_zero(condition, condition_step))
+			elif opcode == Opcode.ADJUST:
+				adjustment, adjustment_step = operand(0)
+
+				if adjustment_step:
+					return None
+
+				relative_base += adjustment
+
+		# Where an iteration leaves every cell has to be where the next one picks up
+		for address, delta in deltas.items():
+			if cell(address) != ( self.read(memory, address) + delta, delta ):
+				return None
+
+		return iterations
+
+if __name__ == '__main__':
+	import os
+	import time
+
+	from general.intcode_computer.main import Status
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	def read_program(day, filename="input.txt"):
+		with open(os.path.join(repository, day, filename)) as f:
+			return f.read().strip()
+
+	''' Countdown loops are skipped '''
+	# Counts the cell at 11 down from a million, then outputs it
+	countdown = "1001,11,-1,11,1005,11,0,4,11,99,0,1000000"
+	computer = FastForwardIntcodeComputer(countdown, True, True, True)
+	plain = IntcodeComputer(countdown, True, True, True)
+	assert computer.run_until_halt() == plain.run_until_halt() == [0]
+	assert computer.process_count == plain.process_count
+	assert computer.skipped_iterations > 999000
+
+	# Runs report the instructions they skipped
+	computer = FastForwardIntcodeComputer(countdown, True, True, True)
+	plain = IntcodeComputer(countdown, True, True, True)
+	assert computer.run_for(None, None, False) == plain.run_for(None, None, False) == (Status.HALTED, 2000002)
+	assert computer.take_outputs() == [0]
+
+	# A program loaded in its place doesn't inherit its loop heads
+	assert computer.loop_heads
+	computer.instructions = "1105,1,0"
+	assert not computer.loop_heads
+
+	# Counting up to a limit with less than
+	count_up = "1001,15,1,15,1007,15,123457,16,1005,16,0,4,15,99,0,0,0"
+	assert FastForwardIntcodeComputer(count_up, True, True, True).run_until_halt() == IntcodeComputer(count_up, True, True, True).run_until_halt()
+
+	# Steps that don't land on the exit exactly
+	stepping = "1001,12,-3,12,1007,12,0,13,1006,13,0,99,1000000,0"
+	computer = FastForwardIntcodeComputer(stepping, False, False, True, True)
+	plain = IntcodeComputer(stepping, False, False, True, True)
+	assert computer.process_intcode() == plain.process_intcode()
+	assert computer.process_count == plain.process_count
+
+	''' Loops that never exit go idle '''
+	# Jumps to itself forever
+	computer = FastForwardIntcodeComputer("1105,1,0", True, True, True)
+	assert computer.run_for(10000)[0] is Status.IDLE
+	assert computer.idle and computer.instruction_pointer == 0
+
+	# Counts forever
+	computer = FastForwardIntcodeComputer("1001,7,1,7,1105,1,0,0", True, True, True)
+	assert computer.run_for()[0] is Status.IDLE
+
+	''' Loops doing output run as usual '''
+	outputs = "4,11,1001,11,-1,11,1005,11,0,99,0,100"
+	computer = FastForwardIntcodeComputer(outputs, True, True, True)
+	assert computer.run_until_halt() == list(range(100, 0, -1))
+	assert computer.skipped_iterations == 0
+
+	''' Puzzle programs give the same results '''
+	for day, inputs in [ ("day_9", [2]), ("day_5", [5]) ]:
+		computer = FastForwardIntcodeComputer(read_program(day), True, True, True, False, True)
+		plain = IntcodeComputer(read_program(day), True, True, True, False, True)
+		assert computer.run_until_halt(inputs) == plain.run_until_halt(inputs)
+		assert computer.process_count == plain.process_count
+
+	''' Day 13 game loop '''
+	game = "2" + read_program("day_13")[1:]
+	results = {}
+
+	for computer_class in [ IntcodeComputer, FastForwardIntcodeComputer ]:
+		computer = computer_class(game, True, True, True, False, True)
+		started = time.perf_counter()
+		outputs = computer.run_until_input_needed()
+		ball = paddle = 0
+
+		while not computer.halted:
+			for index in range(0, len(outputs), 3):
+				if outputs[index + 2] == 4:
+					ball = outputs[index]
+				elif outputs[index + 2] == 3:
+					paddle = outputs[index]
+			outputs = computer.run_until_input_needed([ (ball > paddle) - (ball < paddle) ])
+
+		results[computer_class] = ( outputs[-1], computer.process_count, time.perf_counter() - started )
+
+	assert results[IntcodeComputer][:2] == results[FastForwardIntcodeComputer][:2]
@@ -74,29 +74,14 @@ Opcodes (like 1, 2, or 99) mark the beginning of an instruction. The values used
 
 The address of the current instruction is called the instruction pointer; it starts at 0. After an instruction finishes, the instruction pointer increases by the number of values in the instruction; until you add more instructions to the computer, this is always 4 (1 opcode + 3 parameters) for the add and multiply instructions. (The halt instruction would increase the instruction pointer by 1, but it halts the program instead.)
 '''
+import sys
 import traceback
-from enum import IntEnum
 from collections import deque
+from copy import copy
+from enum import Enum
 
-# Constants
-class Opcode(IntEnum):
-	ADDITION=1
-	MULTIPLICATION=2
-	INPUT=3
-	OUTPUT=4
-	JUMP_IF_TRUE=5
-	JUMP_IF_FALSE=6
-	LESS_THAN=7
-	EQUALS=8
-	ADJUST=9
-	HALT=99
-
-
-class Mode(IntEnum):
-	POSITION = 0
-	IMMEDIATE = 1
-	RELATIVE = 2
-
+from general.intcode_computer.instructions import Opcode, Mode, INSTRUCTION_VALUES, INSTRUCTION_HANDLERS
+from general.intcode_computer.image import ProgramImage
 
 # Process performed when we evaluate opcode: 1
 def add( value1, value2 ):
@@ -118,15 +103,66 @@ def is_less_than( parameter_1, parameter_2 ):
 def is_equal_to( parameter_1, parameter_2 ):
 	return parameter_1 == parameter_2
 
+# Instruction budget of a run that is not limited
+UNLIMITED = sys.maxsize
+
+class Status(Enum):
+	'''
+	Why a run handed control back to its caller. See IntcodeComputer.run_for.
+	'''
+	# The input instruction we stopped at hasn't run, and isn't counted until it does
+	NEEDS_INPUT = "needs input"
+	OUTPUT_READY = "output ready"
+	HALTED = "halted"
+	BUDGET_EXHAUSTED = "budget exhausted"
+	# Stopped by a tracer's breakpoint or watchpoint, see tracer.py
+	BREAKPOINT = "breakpoint"
+	# Spinning in a loop that never does anything again, see loops.py
+	IDLE = "idle"
+
+class BreakpointReached(Exception):
+	'''
+	Raised by runs that have no Status to report with when a tracer's breakpoint or watchpoint
+	stops the computer (see tracer.py). run_for reports Status.BREAKPOINT instead.
+	The computer is left where it stopped, and running it again carries on from there.
+	'''
+	def __init__(self, stopped):
+		super().__init__(f"Stopped at {stopped[0]} {stopped[1]}")
+		# ("breakpoint" or "watchpoint", address), the same as the tracer's
+		self.stopped = stopped
+
+# Memory beyond the program is handed out in pages of 2 ** PAGE_BITS values.
+# Pages within DENSE_GROWTH values of the end of memory are added to memory itself,
+# anything further out lives in sparse pages so far away addresses cost nothing up front.
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+DENSE_GROWTH = 64 * PAGE_SIZE
+
+# Functions each opcode is evaluated with by the reference interpreter
+EVAL_FUNCTIONS = {
+	Opcode.ADDITION: add,
+	Opcode.MULTIPLICATION: mul,
+	Opcode.INPUT: None,
+	Opcode.OUTPUT: None,
+	Opcode.JUMP_IF_TRUE: is_true,
+	Opcode.JUMP_IF_FALSE: is_false,
+	Opcode.LESS_THAN: is_less_than,
+	Opcode.EQUALS: is_equal_to,
+	Opcode.ADJUST: None,
+	Opcode.HALT: None,
+}
+
 def build_intcode(intcode_array):
 	return ",".join([str(val) for val in intcode_array])
 
 def build_intcode_array(intcode):
-	return [val for val in intcode.split(",")]
+	return [int(val) for val in intcode.split(",")]
 
 class IntcodeComputer:
 	'''
 	@param str instructions 	- Memory state required to run the computer.
+								  Can also be a ProgramImage, which boots without parsing anything (see image.py).
 	@param bool program_input	- Modifier for Opcode.INPUT instructions.
 								  Flags whether we gain input from users or from input queue.
 								  Allows for programmatic behavior of input.
@@ -138,9 +174,24 @@ class IntcodeComputer:
 								  Flag that denotes whether or not we are testing the output of our computer.
 								  If so ,then we want to compare an intcode string to another intcode string after processing.
 								  If not, just signal the end of processing.
+	@param bool extra_processing_memory - Give the program zero filled memory past the end of its instructions.
+								  Pages are allocated the first time they're touched, so any address can be used.
+								  Without it, writes outside of the program are dropped.
 	@param bool debug 			- Output some verbose information
+
+	Setting `profiler` to an IntcodeProfiler (see profiler.py) runs the program through
+	the profiler's own loop, collecting statistics on everything the program does.
+	Setting `tracer` to an IntcodeTracer (see tracer.py) does the same for breakpoints,
+	watchpoints and instruction traces.
 	'''
 	def __init__(self, instructions, program_input=False, program_output=False, persistence=False, test=False, extra_processing_memory=False,debug=False):
+		self.memory = None
+		# Number of computers sharing our memory, shared between all of them. See fork().
+		self.memory_owners = [1]
+		# Decode cache. Maps instruction addresses to their decoded instruction,
+		# and every address covered by a decoded instruction back to its instruction address
+		self.decoded = {}
+		self.decoded_addresses = {}
 		self.instructions = instructions
 		self.input_queue = None
 		self.persistence = persistence
@@ -151,9 +202,157 @@ class IntcodeComputer:
 		self.instruction_pointer = 0
 		self.process_count = 0
 		self.relative_base = 0
-		self.boot_memory_size = len(self.instructions) * 2
+		self.halted = False
+		self.waiting_for_input = False
+		# Stuck in a busy loop, for computers that can tell (see loops.py)
+		self.idle = False
+		# Values output by the program that have not been handed back yet
+		self.outputs = []
+		self.collect_outputs = program_output
+		self.stop_on_output = True
 		self.extra_processing_memory = extra_processing_memory
-		self.initialized = False
+		# Pages of memory far beyond the end of self.memory, by page number
+		self.sparse_pages = {}
+		self.profiler = None
+		self.tracer = None
+
+	@property
+	def instructions(self):
+		'''
+		String form of the computer's memory. While persisting, the live memory is
+		only serialized when someone asks for it.
+		'''
+		if self.persistence and self.memory is not None:
+			return build_intcode(self.memory)
+
+		return str(self._instructions)
+
+	@instructions.setter
+	def instructions(self, value):
+		self._instructions = value
+		self.release_memory()
+
+	def fork(self):
+		'''
+		Returns a copy of the computer that carries on from the same state.
+		Forking is O(1): the copy shares memory and the decode cache with this computer, copy on write.
+		Whichever of them runs first while memory is still shared takes its own copy of it,
+		so running one computer never changes the state of the other.
+		'''
+		clone = self.__class__.__new__(self.__class__)
+		clone.__dict__.update(self.__dict__)
+
+		if self.memory is not None:
+			self.memory_owners[0] += 1
+
+		if self.input_queue is not None:
+			clone.input_queue = deque(self.input_queue)
+
+		clone.outputs = list(self.outputs)
+		# A tracer keeps the state of a single computer's run, so the copy runs without one
+		clone.tracer = None
+
+		return clone
+
+	def __copy__(self):
+		return self.fork()
+
+	def snapshot(self):
+		'''
+		Captures the current state of the computer so it can be restored or forked from later
+		'''
+		return self.fork()
+
+	def restore(self, snapshot):
+		'''
+		Puts the computer back into the state captured by the snapshot.
+		The snapshot stays untouched and can be restored again.
+		'''
+		state = snapshot.fork()
+		state.tracer = self.tracer
+		self.release_memory()
+		self.__dict__.update(state.__dict__)
+		return True
+
+	def release_memory(self):
+		'''
+		Lets go of our memory and decode cache, leaving them to any forks still sharing them
+		'''
+		self.memory_owners[0] -= 1
+		self.memory_owners = [1]
+		self.memory = None
+		self.sparse_pages = {}
+		self.decoded = {}
+		self.decoded_addresses = {}
+
+	def unshare_memory(self):
+		'''
+		Takes our own copy of memory and the decode cache if a fork is still sharing them
+		'''
+		if self.memory_owners[0] > 1:
+			self.memory_owners[0] -= 1
+			self.memory_owners = [1]
+			self.memory = self.memory.copy()
+			self.sparse_pages = { number: page.copy() for number, page in self.sparse_pages.items() }
+			self.decoded = self.decoded.copy()
+			self.decoded_addresses = self.decoded_addresses.copy()
+
+	def load_memory(self):
+		'''
+		Builds fresh memory from our instructions string.
+		Extra processing memory isn't allocated here, pages are added as the program touches them.
+		'''
+		if isinstance(self._instructions, ProgramImage):
+			return self._instructions.load()
+
+		return build_intcode_array(self._instructions)
+
+	def read(self, array, address):
+		'''
+		Reads the value at an address. Untouched extra processing memory reads as zero.
+		'''
+		if 0 <= address < len(array):
+			return array[address]
+
+		if address >= 0 and self.extra_processing_memory:
+			if address < len(array) + DENSE_GROWTH:
+				self.grow_memory(array, address)
+				return 0
+
+			page = self.sparse_pages.get(address >> PAGE_BITS)
+			return page[address & PAGE_MASK] if page else 0
+
+		raise IndexError(f"read(): Address {address} is outside of memory")
+
+	def grow_memory(self, array, address):
+		'''
+		Adds zero filled pages to the end of memory until it covers the address.
+		Sparse pages that end up inside of memory are moved into it.
+		'''
+		size = ((address >> PAGE_BITS) + 1) << PAGE_BITS
+		array.extend([0] * (size - len(array)))
+
+		for number in [ number for number in self.sparse_pages if number << PAGE_BITS < size ]:
+			start = number << PAGE_BITS
+			array[start:start + PAGE_SIZE] = self.sparse_pages.pop(number)
+
+		return array
+
+	def memory_footprint(self):
+		'''
+		Reports how much memory the program has been given.
+		Returns a dict with the number of cells, how many pages those make up
+		(sparse ones included), and roughly how many bytes they take.
+		'''
+		memory = self.memory if self.memory is not None else []
+		pages = list(self.sparse_pages.values())
+
+		return {
+			"cells": len(memory) + len(pages) * PAGE_SIZE,
+			"pages": -(-len(memory) // PAGE_SIZE) + len(pages),
+			"sparse_pages": len(pages),
+			"bytes": sys.getsizeof(memory) + sum(sys.getsizeof(page) for page in pages),
+		}
 
 	def set_persistence(self, value):
 		self.persistence = value
@@ -162,16 +361,26 @@ class IntcodeComputer:
 		self.input_queue = deque(input_items)
 		return True
 
+	def queue_input(self, input_items):
+		'''
+		Adds input items behind whatever input is still waiting to be read
+		'''
+		if self.input_queue is None:
+			self.input_queue = deque()
+
+		self.input_queue.extend(input_items)
+		return True
+
 	def get_parameter_value(self, parameter, intcode_array, mode=Mode.POSITION):
 
 		if mode == Mode.IMMEDIATE:
 			value = parameter
 		elif mode == Mode.RELATIVE:
-			value = intcode_array[self.relative_base + parameter]
+			value = self.read(intcode_array, self.relative_base + parameter)
 		else:
-			value = intcode_array[parameter]
+			value = self.read(intcode_array, parameter)
 
-		return int(value)
+		return value
 
 	# Process performed when we evaluate opcode: 3
 	def get_input( self, array, value):
@@ -182,10 +391,9 @@ class IntcodeComputer:
 		if self.debug:
 			print(f"Input Queue: {self.input_queue}")
 
-		user_input = input("> ") if self.program_input is False else str(self.input_queue.popleft())
+		user_input = int(input("> ")) if self.program_input is False else self.input_queue.popleft()
 
-		if 0 <= value < len(array):
-			array[value] = user_input
+		self.store(array, value, user_input)
 
 		return array
 
@@ -193,23 +401,25 @@ class IntcodeComputer:
 		'''
 		Outputs the given value
 		'''
-		if self.program_output:
+		if self.collect_outputs:
 			return value
 
 		print(">> {value}".format(value=value))
 		return True
 
 
-	def parse_parameter_modes(self, parameter_modes_string ):
+	def parse_parameter_modes(self, parameter_modes ):
 		'''
-		Method used to abstract obtaining parameter modes from a parameter modes string.
+		Method used to abstract obtaining parameter modes from the parameter mode digits of an instruction
+		(the instruction with its two opcode digits removed, e.g. 1002 -> 10).
 		Returns a length three tuple containing each of the parameter modes for the current instruction.
+		Missing digits are leading zeros, which means Mode.POSITION.
 		'''
-		mode_1 = parameter_modes_string[-1:]
-		mode_2 = parameter_modes_string[-2:-1]
-		mode_3 = parameter_modes_string[-3:-2]
+		mode_1 = parameter_modes % 10
+		mode_2 = parameter_modes // 10 % 10
+		mode_3 = parameter_modes // 100 % 10
 
-		return ( int(mode_1) if mode_1 else Mode.POSITION, int(mode_2) if mode_2 else Mode.POSITION, int(mode_3) if mode_3 else Mode.POSITION )
+		return ( mode_1, mode_2, mode_3 )
 
 	def perform_mathematic_instruction(self, eval_fn, array, pointer, modes):
 		'''
@@ -217,11 +427,11 @@ class IntcodeComputer:
 		for add and multiply procedures to work
 		'''
 		mode_1,mode_2, mode_3 = modes
-		parameter_1 = int(array[pointer + 1])
-		parameter_2 = int(array[pointer + 2])
+		parameter_1 = array[pointer + 1]
+		parameter_2 = array[pointer + 2]
 
 		# Parameter 3
-		parameter_3 = int(array[pointer + 3])
+		parameter_3 = array[pointer + 3]
 
 		val_1 = self.get_parameter_value(parameter_1, array, mode_1)
 		val_2 = self.get_parameter_value(parameter_2, array, mode_2)
@@ -235,24 +445,25 @@ class IntcodeComputer:
 			val_3 = val_3 + self.relative_base
 			# print(f"Val 3: {val_3}")
 
-		if 0 <= val_3 < len(array):
-			array[val_3] = str(evaluated)
+		self.store(array, val_3, evaluated)
 
 		return True
 
 
 	def perform_input_instruction(self, eval_fn, array, pointer, modes ):
+		eval_fn = eval_fn or self.get_input
 		mode = modes[:1][0]
-		param = int(array[pointer + 1])
+		param = array[pointer + 1]
 
 		param += self.relative_base if mode == Mode.RELATIVE else 0
 
 		return eval_fn(array, param)
 
 	def perform_print_instruction(self, eval_fn, array, pointer, modes ):
+		eval_fn = eval_fn or self.do_output
 		mode_1 = modes[0]
 
-		param = int(array[pointer + 1])
+		param = array[pointer + 1]
 		value = self.get_parameter_value(param, array, mode_1)
 		'''
 		Return the evaluated function
@@ -267,8 +478,8 @@ class IntcodeComputer:
 		'''
 		mode_1, mode_2 = modes[:2]
 
-		param_1 = int(array[pointer + 1])
-		param_2 = int(array[pointer + 2])
+		param_1 = array[pointer + 1]
+		param_2 = array[pointer + 2]
 
 		value_1 = self.get_parameter_value(param_1, array, mode_1)
 		value_2 = self.get_parameter_value(param_2, array, mode_2)
@@ -281,9 +492,12 @@ class IntcodeComputer:
 
 		return value_2
 
+	def perform_adjust_instruction(self, eval_fn, array, pointer, modes):
+		return self.adjust_relative_pointer(array, pointer, modes)
+
 	def adjust_relative_pointer(self, array, pointer, modes):
 		mode = modes[:1][0]
-		param = int(array[pointer + 1])
+		param = array[pointer + 1]
 
 		value = self.get_parameter_value(param, array, mode)
 
@@ -299,9 +513,9 @@ class IntcodeComputer:
 		'''
 		mode_1, mode_2, mode_3 = modes[:3]
 
-		param_1 = int(array[pointer + 1])
-		param_2 = int(array[pointer + 2])
-		param_3 = int(array[pointer + 3])
+		param_1 = array[pointer + 1]
+		param_2 = array[pointer + 2]
+		param_3 = array[pointer + 3]
 
 		value_1 = self.get_parameter_value(param_1, array, mode_1)
 		value_2 = self.get_parameter_value(param_2, array, mode_2)
@@ -310,130 +524,401 @@ class IntcodeComputer:
 		if mode_3 == Mode.RELATIVE:
 			value_3 = value_3 + self.relative_base
 
-		array[value_3] = '0'
-
-		if eval_fn(value_1, value_2):
-			array[value_3] = '1'
+		self.store(array, value_3, 1 if eval_fn(value_1, value_2) else 0)
 
 		return True
 
 	def perform_instruction( self, opcode, eval_fn, array, pointer, modes ):
 		'''
 		Procedure that basically acts as a controller for all instructions that are available within the system.
-		Based on the opcode, we will direct our other input to other procedures that perform the specific operation we want
-		'''
-		if opcode == Opcode.ADDITION or opcode == Opcode.MULTIPLICATION:
-			return self.perform_mathematic_instruction(eval_fn, array, pointer, modes)
-		elif opcode == Opcode.INPUT:
-			return self.perform_input_instruction(eval_fn, array, pointer, modes)
-		elif opcode == Opcode.OUTPUT:
-			return self.perform_print_instruction(eval_fn, array, pointer, modes)
-		elif opcode == Opcode.JUMP_IF_FALSE or opcode == Opcode.JUMP_IF_TRUE:
-			return self.perform_jump_instruction(eval_fn, array, pointer, modes)
-		elif opcode == Opcode.LESS_THAN or opcode == Opcode.EQUALS:
-			return self.perform_comparative_instruction(eval_fn, array, pointer, modes)
-		elif opcode == Opcode.ADJUST:
-			return self.adjust_relative_pointer(array, pointer, modes)
-		else:
+		Based on the opcode, we will direct our other input to other procedures that perform the specific operation we want.
+		Only the reference interpreter goes through here, everything else runs the handlers in INSTRUCTION_HANDLERS.
+		'''
+		try:
+			perform = INSTRUCTION_PERFORMERS[opcode]
+		except KeyError:
 			raise Exception(f"perform_instruction(): Unknown Instruction Opcode Given: {opcode}")
 
+		return perform(self, eval_fn, array, pointer, modes)
 
+	def decode_instruction(self, array, pointer):
+		'''
+		Decodes the instruction at the pointer and remembers it in our decode cache.
+		Returns a tuple of (handler, opcode, parameter modes, instruction values).
+		'''
+		instruction_options = array[pointer]
 
-	def process_intcode(self):
+		try:
+			handler = INSTRUCTION_HANDLERS[instruction_options]
+		except KeyError:
+			raise Exception(f"decode_instruction(): Unknown Instruction Given: {instruction_options}")
+
+		# From 0 to 3 parameter modes given.
+		parameter_modes = self.parse_parameter_modes(instruction_options // 100)
+		# Rightmost two digits are the opcode.
+		opcode = Opcode(instruction_options % 100)
+		instruction_values = INSTRUCTION_VALUES[opcode]
+
+		decoded = ( handler, opcode, parameter_modes, instruction_values )
+
+		# A new instruction overlapping an already decoded one replaces it
+		for address in range(pointer, pointer + instruction_values):
+			if address in self.decoded_addresses:
+				self.invalidate_decoded(address)
+
+		self.decoded[pointer] = decoded
+
+		for address in range(pointer, pointer + instruction_values):
+			self.decoded_addresses[address] = pointer
+
+		return decoded
+
+	def invalidate_decoded(self, address):
 		'''
-		Take in an intcode string and return the processed output
-		as another intcode string
+		Forgets the decoded instruction covering the address
 		'''
-		# Defining our opcode group specific variables
-		intcode_array = [val for val in self.instructions.split(",")]
+		pointer = self.decoded_addresses.pop(address)
+		instruction_values = self.decoded.pop(pointer)[3]
 
-		if self.extra_processing_memory and not self.initialized:
-			intcode_array += ['0' for step in range(self.boot_memory_size) ]
-			self.initialized = True
+		for covered in range(pointer, pointer + instruction_values):
+			self.decoded_addresses.pop(covered, None)
+
+	def store(self, array, address, value):
+		'''
+		Writes a value to memory. Writes landing inside a decoded instruction
+		invalidate it so that self modifying programs keep working.
+		Without extra processing memory, writes outside of memory are dropped.
+		'''
+		if 0 <= address < len(array):
+			array[address] = value
+		elif address >= 0 and self.extra_processing_memory:
+			if address < len(array) + DENSE_GROWTH:
+				self.grow_memory(array, address)[address] = value
+			else:
+				page = self.sparse_pages.setdefault(address >> PAGE_BITS, [0] * PAGE_SIZE)
+				page[address & PAGE_MASK] = value
+		else:
+			return False
+
+		if address in self.decoded_addresses:
+			self.invalidate_decoded(address)
+
+		return True
+
+	def execute(self, max_instructions=None):
+		'''
+		Runs instructions from the current instruction pointer until we halt,
+		have an output to hand back, or have run max_instructions instructions.
+		Each instruction is a single lookup in the decode cache followed by a call
+		to its specialized handler. Returns the number of instructions run.
+		'''
+		self.unshare_memory()
+		memory = self.memory
+		decoded = self.decoded
+		pointer = self.instruction_pointer
+		budget = UNLIMITED if max_instructions is None else max_instructions
+		count = 0
+
+		while pointer is not None and count < budget:
+			try:
+				for count in range(count + 1, budget + 1):
+					try:
+						handler = decoded[pointer][0]
+					except KeyError:
+						handler = self.decode_instruction(memory, pointer)[0]
+
+					pointer = handler(self, memory, pointer)
+
+					if pointer is None:
+						break
+			except IndexError:
+				# Handlers don't guard their memory accesses. Let the reference interpreter
+				# deal with the instruction that stepped outside of memory.
+				pointer = self.step(memory, pointer)
+
+		# An input that has to wait hasn't run, it's counted once it does
+		if self.waiting_for_input:
+			count -= 1
+
+		# Ran out of instructions while the program was still going
+		if pointer is not None:
+			self.instruction_pointer = pointer
+
+		self.process_count += count
+		return count
+
+	def step(self, memory, pointer):
+		'''
+		Runs the single instruction at the pointer through the reference interpreter.
+		Returns the next instruction pointer, or None when we have to stop running.
+		'''
+		try:
+			handler, opcode, parameter_modes, instruction_values = self.decoded[pointer]
+		except KeyError:
+			handler, opcode, parameter_modes, instruction_values = self.decode_instruction(memory, pointer)
 
 		if self.debug:
-			if self.persistence:
-				print("Intcode Array")
-				print(intcode_array)
-		while True:
-			instruction_options = str(intcode_array[self.instruction_pointer])
-			# From 0 to 3 parameter modes given.
-			raw_parameter_modes = instruction_options[:-2]
-			parameter_modes = self.parse_parameter_modes(raw_parameter_modes)
-			# Casting opcode to an int will remove the leading zero if necessary.
-			opcode = Opcode(int(instruction_options[-2:]))
+			print(f"Opcode: {opcode}")
+			print(f"Instruction Pointer: {pointer}")
+			print(memory)
+
+		if opcode == Opcode.HALT: # Halts processing of our intcode string
+			self.instruction_pointer = pointer
+			self.halted = True
+			return None
+
+		if opcode == Opcode.INPUT and self.program_input and not self.input_queue:
+			self.instruction_pointer = pointer
+			self.waiting_for_input = True
+			return None
+
+		instruction_output = self.perform_instruction( opcode, EVAL_FUNCTIONS[opcode], memory, pointer, parameter_modes )
+
+		# Generally, at the end of our instruction we will direct our instruction pointer to point at an opcode
+		# "instruction values" ahead of the current instruction.
+		instruction_pointer_interrim_value = pointer + instruction_values
+
+		# Case for when we are hijacking general instruction pointer direction with the output of our instruction.
+		if (opcode == Opcode.JUMP_IF_FALSE or opcode == Opcode.JUMP_IF_TRUE) and instruction_output != None:
+			instruction_pointer_interrim_value = instruction_output
 			if self.debug:
-				print(f"Opcode: {opcode}")
-				print(f"Instruction Pointer: {self.instruction_pointer}")
-				print(intcode_array)
-# 				print('''
-# ============================================================
-# Opcode: {opcode}
-# Intcode Array: {intcode_array}
-# ============================================================
-# 	'''.format(opcode=opcode,intcode_array=intcode_array))
-
-			# Evaluate our instruction opcodes
-			if opcode == Opcode.ADDITION:
-				opcode_eval_function = add
-				instruction_values = 4
-			elif opcode == Opcode.MULTIPLICATION:
-				opcode_eval_function = mul
-				instruction_values = 4
-			elif opcode == Opcode.INPUT:
-				opcode_eval_function = self.get_input
-				instruction_values = 2
-			elif opcode == Opcode.OUTPUT:
-				opcode_eval_function = self.do_output
-				instruction_values = 2
-			elif opcode == Opcode.JUMP_IF_TRUE:
-				opcode_eval_function = is_true
-				instruction_values = 3
-			elif opcode == Opcode.JUMP_IF_FALSE:
-				opcode_eval_function = is_false
-				instruction_values = 3
-			elif opcode == Opcode.LESS_THAN:
-				opcode_eval_function = is_less_than
-				instruction_values = 4
-			elif opcode == Opcode.EQUALS:
-				opcode_eval_function = is_equal_to
-				instruction_values = 4
-			elif opcode == Opcode.ADJUST:
-				opcode_eval_function = None
-				instruction_values = 2
-			elif opcode == Opcode.HALT: # Halts processing of our intcode string
-
-				if self.test and not self.debug:
-					return build_intcode(intcode_array)
+				print(f"Instruction Pointer Interrim Value {instruction_pointer_interrim_value}")
 
+		# This is in order to harvest the output from an opcode print.
+		if self.collect_outputs and opcode == Opcode.OUTPUT:
+			self.outputs.append(instruction_output)
+
+			if self.stop_on_output:
+				self.instruction_pointer = instruction_pointer_interrim_value
 				return None
 
-			instruction_output = self.perform_instruction( opcode, opcode_eval_function, intcode_array, self.instruction_pointer, parameter_modes )
+		return instruction_pointer_interrim_value
+
+	def interpret(self, max_instructions=None):
+		'''
+		Reference interpreter. Runs every instruction through perform_instruction,
+		which is slower than execute but lets us print what is going on.
+		Returns the number of instructions run.
+		'''
+		self.unshare_memory()
+		pointer = self.instruction_pointer
+		budget = UNLIMITED if max_instructions is None else max_instructions
+		count = 0
+
+		while pointer is not None and count < budget:
+			pointer = self.step(self.memory, pointer)
+			count += 1
+
+		if self.waiting_for_input:
+			count -= 1
+
+		if pointer is not None:
+			self.instruction_pointer = pointer
+
+		self.process_count += count
+		return count
+
+	def boot(self):
+		'''
+		Gets memory ready for a run.
+		Memory holds native ints and lives on the computer between calls while persisting.
+		Strings only exist at load and when dumping memory back out.
+		'''
+		if self.memory is None or not self.persistence:
+			self.release_memory()
+			self.memory = self.load_memory()
+
+		if self.debug:
+			if self.persistence:
+				print("Intcode Array")
+				print(self.memory)
+
+		self.halted = False
+		self.waiting_for_input = False
+
+	def resume(self, max_instructions=None):
+		'''
+		Picks up running from the current instruction pointer.
+		Returns the number of instructions run.
+		'''
+		if self.profiler is not None:
+			return self.profiler.execute(self, max_instructions)
+		elif self.tracer is not None:
+			return self.tracer.execute(self, max_instructions)
+		elif self.debug:
+			return self.interpret(max_instructions)
+		else:
+			return self.execute(max_instructions)
+
+	def check_tracer(self):
+		'''
+		Raises BreakpointReached if our tracer stopped the last run
+		'''
+		if self.tracer is not None and self.tracer.stopped:
+			raise BreakpointReached(self.tracer.stopped)
 
-			# This is in order to harvest the output from an opcode print.
+	def process_intcode(self):
+		'''
+		Take in an intcode string and return the processed output
+		as another intcode string. Raises BreakpointReached if a tracer stops the run.
+		'''
+		self.boot()
+		self.collect_outputs = self.program_output
+		self.stop_on_output = True
+		self.resume()
+		self.check_tracer()
 
+		if self.halted:
+			if self.test and not self.debug:
+				return build_intcode(self.memory)
 
-			# Generally, at the end of our instruction we will direct our instruction pointer to point at an opcode
-			# "instruction values" ahead of the current instruction.
-			instruction_pointer_interrim_value = self.instruction_pointer + instruction_values
+			return None
 
-			# Case for when we are hijacking general instruction pointer direction with the output of our instruction.
-			if (opcode == Opcode.JUMP_IF_FALSE or opcode == Opcode.JUMP_IF_TRUE) and instruction_output != None:
-				instruction_pointer_interrim_value = instruction_output
-				if self.debug:
-					print(f"Instruction Pointer Interrim Value {instruction_pointer_interrim_value}")
+		if self.waiting_for_input:
+			raise IndexError("process_intcode(): Program is waiting on input but the input queue is empty")
 
-			# Move our pointer up as many positions as instruction values
-			self.instruction_pointer = instruction_pointer_interrim_value
+		return self.outputs.pop()
 
-			if self.program_output and opcode == Opcode.OUTPUT:
+	def run_until_input_needed(self, input_items=None):
+		'''
+		Runs until the program halts or wants input that has not been queued yet.
+		Returns the list of every value output on the way. Raises BreakpointReached
+		if a tracer stops the run first.
 
-				if self.persistence:
-					self.instructions = build_intcode(intcode_array)
+		@param list input_items - Optional input to queue up before running
+		'''
+		if input_items is not None:
+			self.queue_input(input_items)
+
+		self.boot()
+		self.collect_outputs = True
+		self.stop_on_output = False
+		self.resume()
+		# Output stays on the computer, it's handed back once the run carries on
+		self.check_tracer()
+
+		return self.take_outputs()
 
-				return instruction_output
+	def run_until_halt(self, input_items=None):
+		'''
+		Runs the program to completion and returns the list of every value output
+		'''
+		outputs = self.run_until_input_needed(input_items)
+
+		if self.waiting_for_input:
+			raise Exception("run_until_halt(): Program wants more input than it was given")
+
+		return outputs
+
+	def run_for(self, max_instructions=None, input_items=None, stop_on_output=True):
+		'''
+		Runs at most max_instructions instructions, picking up from wherever the last call stopped.
+		Returns a (Status, instructions run) tuple, the status telling why we stopped.
+		Output stays on the computer until taken with take_outputs().
 
-			self.process_count += 1
+			status, count = computer.run_for(1000)
+			if status is Status.OUTPUT_READY:
+				value, = computer.take_outputs()
+
+		Compiled backends run whole blocks at a time, so they can go over the budget by a block.
+
+		@param int max_instructions 	- Instructions to run at most. None runs without a limit.
+		@param list input_items 		- Optional input to queue up before running
+		@param bool stop_on_output 		- Stop with Status.OUTPUT_READY as soon as a value is output.
+										  Otherwise output piles up until we stop for another reason.
+		'''
+		if input_items is not None:
+			self.queue_input(input_items)
+
+		# Only the first slice boots, later ones carry on with the memory we have
+		if self.memory is None:
+			self.boot()
+
+		if self.halted:
+			return Status.HALTED, 0
+
+		self.waiting_for_input = False
+		self.idle = False
+		self.collect_outputs = True
+		self.stop_on_output = stop_on_output
+		waiting_outputs = len(self.outputs)
+
+		count = self.resume(max_instructions)
+
+		if self.halted:
+			status = Status.HALTED
+		elif self.waiting_for_input:
+			status = Status.NEEDS_INPUT
+		elif self.idle:
+			status = Status.IDLE
+		elif self.tracer is not None and self.tracer.stopped:
+			status = Status.BREAKPOINT
+		elif stop_on_output and len(self.outputs) > waiting_outputs:
+			status = Status.OUTPUT_READY
+		else:
+			status = Status.BUDGET_EXHAUSTED
+
+		return status, count
+
+	def take_outputs(self):
+		'''
+		Hands back the list of values output since they were last taken
+		'''
+		outputs = self.outputs
+		self.outputs = []
+		return outputs
+
+	def run(self, input_items=None):
+		'''
+		Drives the computer as a generator. Every value the program outputs is yielded as soon as it is output.
+		When the program wants input that has not been queued, None is yielded instead and the program
+		waits until a value is given to send(). Values sent at any other time are queued up for later.
+		A tracer stopping the run raises BreakpointReached out of the generator.
+
+			outputs = computer.run()
+			first_output = next(outputs)
+			output_after_input = outputs.send(2)
+
+		@param list input_items - Optional input to queue up before running
+		'''
+		if self.input_queue is None:
+			self.input_queue = deque()
+
+		if input_items is not None:
+			self.input_queue.extend(input_items)
+
+		self.boot()
+		self.collect_outputs = True
+		self.stop_on_output = True
+
+		while True:
+			self.waiting_for_input = False
+			self.resume()
+			self.check_tracer()
+
+			if self.outputs:
+				sent = yield self.outputs.pop()
+			elif self.halted:
+				return
+			else:
+				sent = yield None
+
+			if sent is not None:
+				self.input_queue.append(sent)
+
+
+# Reference interpreter dispatch. Maps each opcode to the method performing it
+INSTRUCTION_PERFORMERS = {
+	Opcode.ADDITION: IntcodeComputer.perform_mathematic_instruction,
+	Opcode.MULTIPLICATION: IntcodeComputer.perform_mathematic_instruction,
+	Opcode.INPUT: IntcodeComputer.perform_input_instruction,
+	Opcode.OUTPUT: IntcodeComputer.perform_print_instruction,
+	Opcode.JUMP_IF_TRUE: IntcodeComputer.perform_jump_instruction,
+	Opcode.JUMP_IF_FALSE: IntcodeComputer.perform_jump_instruction,
+	Opcode.LESS_THAN: IntcodeComputer.perform_comparative_instruction,
+	Opcode.EQUALS: IntcodeComputer.perform_comparative_instruction,
+	Opcode.ADJUST: IntcodeComputer.perform_adjust_instruction,
+}
 
 
 if __name__ == '__main__':
@@ -453,11 +938,15 @@ if __name__ == '__main__':
 
 	test1 = IntcodeComputer('', True)
 	test1.set_input_queue([0])
-	assert ",".join(test1.get_input(
-			[val for val in "3,12,6,12,15,1,13,14,13,4,13,99,-1,0,1,9".split(",")],
+	assert build_intcode(test1.get_input(
+			build_intcode_array("3,12,6,12,15,1,13,14,13,4,13,99,-1,0,1,9"),
 			12
 		)) == "3,12,6,12,15,1,13,14,13,4,13,99,0,0,1,9"
 
+	''' Parameter modes are decoded from integers '''
+	assert test1.parse_parameter_modes(1002 // 100) == (Mode.POSITION, Mode.IMMEDIATE, Mode.POSITION)
+	assert test1.parse_parameter_modes(21101 // 100) == (Mode.IMMEDIATE, Mode.IMMEDIATE, Mode.RELATIVE)
+
 	''' Blackbox testing '''
 	test2 = IntcodeComputer("1,0,0,0,99", False, False, True, True)
 	assert test2.process_intcode() == "2,0,0,0,99"
@@ -466,4 +955,82 @@ if __name__ == '__main__':
 	test4 = IntcodeComputer("2,4,4,5,99,0", False, False, True, True)
 	assert test4.process_intcode() == "2,4,4,5,99,9801"
 	test5 = IntcodeComputer("1,1,1,4,99,5,6,0,99", False, False, True, True)
-	assert test5.process_intcode() == "30,1,1,4,2,5,6,0,99"
\ No newline at end of file
+	assert test5.process_intcode() == "30,1,1,4,2,5,6,0,99"
+
+	''' Memory persists between runs without rebuilding the instructions string '''
+	test6 = IntcodeComputer("3,11,4,11,1001,11,1,11,1105,1,2,0", True, True, True)
+	test6.set_input_queue([7])
+	assert test6.process_intcode() == 7
+	assert test6.process_intcode() == 8
+	test7 = copy(test6)
+	assert test7.process_intcode() == 9
+	assert test7.process_intcode() == 10
+	assert test6.process_intcode() == 9
+	assert test7.instructions == "3,11,4,11,1001,11,1,11,1105,1,2,10"
+
+	''' Self modifying code invalidates decoded instructions '''
+	test8 = IntcodeComputer("104,0,1001,1,1,1,1105,1,0", False, True, True)
+	assert [test8.process_intcode() for step in range(3)] == [0, 1, 2]
+	test9 = IntcodeComputer("1106,0,4,99,1001,0,-1,0,1105,1,0", False, False, True, True)
+	assert test9.process_intcode() == "1105,0,4,99,1001,0,-1,0,1105,1,0"
+
+	''' Batch runs hand back every output at once '''
+	test10 = IntcodeComputer("3,16,4,16,1001,16,1,16,1008,16,3,17,1006,17,0,99,0,0", True, True, True)
+	assert test10.run_until_input_needed([1]) == [1]
+	assert test10.waiting_for_input
+	assert test10.run_until_halt([5, 2]) == [5, 2]
+	assert test10.halted
+
+	''' Computers can be driven as generators '''
+	test11 = IntcodeComputer("3,16,4,16,1001,16,1,16,1008,16,3,17,1006,17,0,99,0,0", True, True, True)
+	outputs = test11.run()
+	assert next(outputs) is None
+	assert outputs.send(1) == 1
+	assert next(outputs) is None
+	assert outputs.send(5) == 5
+	assert outputs.send(2) == 2
+	assert list(outputs) == []
+	assert test11.halted
+
+	''' Forks share memory until one of them runs '''
+	test12 = IntcodeComputer("3,16,4,16,1001,16,1,16,1008,16,3,17,1006,17,0,99,0,0", True, True, True)
+	assert test12.run_until_input_needed([1]) == [1]
+	saved = test12.snapshot()
+	test13 = test12.fork()
+	assert test13.memory is test12.memory
+	assert test13.run_until_halt([2]) == [2]
+	assert test13.memory is not test12.memory
+	assert test12.run_until_input_needed([7]) == [7]
+	test12.restore(saved)
+	assert test12.run_until_halt([2]) == [2]
+	assert saved.instructions == "3,16,4,16,1001,16,1,16,1008,16,3,17,1006,17,0,99,2,0"
+
+	''' Extra processing memory is allocated a page at a time, on first touch '''
+	test14 = IntcodeComputer("21101,5,6,5000,21101,7,8,1000000000,109,1000000000,204,0,204,-999995000,99", False, True, True, False, True)
+	assert test14.run_until_halt() == [15, 11]
+	assert test14.memory_footprint()["sparse_pages"] == 1
+	assert test14.memory_footprint()["cells"] == 6 * PAGE_SIZE
+
+	''' Runs can be cut into slices of a limited number of instructions '''
+	test15 = IntcodeComputer("3,16,4,16,1001,16,1,16,1008,16,3,17,1006,17,0,99,0,0", True, True, True)
+	# Input that has to wait doesn't count as running, it's counted once the input is there
+	assert test15.run_for(1) == (Status.NEEDS_INPUT, 0)
+	assert test15.run_for(1, [1]) == (Status.BUDGET_EXHAUSTED, 1)
+	assert test15.run_for(10) == (Status.OUTPUT_READY, 1)
+	assert test15.take_outputs() == [1]
+	assert test15.run_for(3) == (Status.BUDGET_EXHAUSTED, 3)
+	assert test15.run_for() == (Status.NEEDS_INPUT, 0)
+	assert test15.run_for(None, [5, 2], False) == (Status.HALTED, 11)
+	assert test15.take_outputs() == [5, 2]
+	assert test15.run_for(10) == (Status.HALTED, 0)
+	assert test15.process_count == 16
+
+	''' The reference interpreter keeps to the budget as well '''
+	test16 = IntcodeComputer("3,16,4,16,1001,16,1,16,1008,16,3,17,1006,17,0,99,0,0", True, True, True)
+	test16.queue_input([1])
+	test16.boot()
+	test16.collect_outputs = True
+	test16.stop_on_output = False
+	assert test16.interpret(0) == 0 and test16.instruction_pointer == 0
+	assert test16.interpret(3) == 3 and test16.instruction_pointer == 8
+	assert test16.outputs == [1]
\ No newline at end of file
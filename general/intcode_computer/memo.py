@@ -0,0 +1,216 @@
+'''
+Memoized Intcode runs.
+
+Intcode programs are deterministic: the same program given the same input always outputs
+the same values and ends up in the same state. RunCache remembers runs by program hash and
+input sequence, so running something again returns straight away:
+
+	runs = RunCache()
+	outputs, computer = runs.run(instructions, [5])
+
+Every input prefix of a run is remembered along the way, as a copy on write fork of the
+computer right after that input went in. A run whose inputs start with ones seen before
+picks up from the longest of them instead of starting over. Day 7 amplifiers running
+[phase, signal] only ever start a given phase once, whatever signal comes after it.
+
+Runs are kept in memory, dropping the least recently used ones past `capacity`. Given a
+directory (or the INTCODE_RUN_CACHE environment variable), they're also saved to disk so
+they outlive the process, which makes rerunning a day's tests instant.
+'''
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+from general.intcode_computer.backends import backend
+from general.intcode_computer.image import program_hash
+from general.intcode_computer.main import build_intcode_array
+
+CACHE_DIRECTORY = os.environ.get("INTCODE_RUN_CACHE")
+
+class RunCache:
+	'''
+	@param int capacity 		- Number of runs kept in memory.
+	@param str directory 		- Optional directory runs are saved to, and looked up in when they aren't in memory.
+	@param str backend_name 	- Backend runs that aren't cached run on, see backends.py.
+	'''
+	def __init__(self, capacity=4096, directory=CACHE_DIRECTORY, backend_name="dispatch"):
+		self.capacity = capacity
+		self.directory = directory
+		self.backend_name = backend_name
+		# Tuples of (computer, outputs) by (program hash, inputs), least recently used first
+		self.runs = OrderedDict()
+		# Program hashes by instructions string
+		self.hashes = {}
+		self.hits = 0
+		self.misses = 0
+
+	def computer(self, instructions):
+		return backend(self.backend_name)(instructions, True, True, True, False, True)
+
+	def program_hash(self, instructions):
+		digest = self.hashes.get(instructions)
+
+		if digest is None:
+			digest = self.hashes[instructions] = program_hash(build_intcode_array(instructions))
+
+		return digest
+
+	def path(self, key):
+		digest, inputs = key
+		return os.path.join(self.directory, digest[:32], f"{hashlib.sha256(repr(inputs).encode()).hexdigest()[:32]}.pickle")
+
+	def lookup(self, instructions, key):
+		'''
+		Returns the (computer, outputs) remembered for the key, or None
+		'''
+		run = self.runs.get(key)
+
+		if run is not None:
+			self.runs.move_to_end(key)
+			return run
+
+		if self.directory is None or not os.path.exists(self.path(key)):
+			return None
+
+		with open(self.path(key), "rb") as f:
+			state = pickle.load(f)
+
+		computer = self.computer(instructions)
+		outputs = state.pop("outputs")
+		computer.__dict__.update(state)
+
+		self.remember(key, computer, outputs, save=False)
+		return computer, outputs
+
+	def remember(self, key, computer, outputs, save=True):
+		self.runs[key] = ( computer.fork(), tuple(outputs) )
+		self.runs.move_to_end(key)
+
+		while len(self.runs) > self.capacity:
+			self.runs.popitem(last=False)
+
+		if save and self.directory is not None:
+			path = self.path(key)
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			partial = f"{path}.{os.getpid()}.tmp"
+
+			with open(partial, "wb") as f:
+				pickle.dump({
+					"memory": computer.memory,
+					"sparse_pages": computer.sparse_pages,
+					"instruction_pointer": computer.instruction_pointer,
+					"relative_base": computer.relative_base,
+					"halted": computer.halted,
+					"waiting_for_input": computer.waiting_for_input,
+					"process_count": computer.process_count,
+					"outputs": list(outputs),
+				}, f)
+
+			os.replace(partial, path)
+
+	def run(self, instructions, input_items=()):
+		'''
+		Runs the program from the start on the inputs, until it halts or wants more input.
+		Returns the list of every value it output, and a computer carrying on from where it stopped.
+		'''
+		digest = self.program_hash(instructions)
+		inputs = tuple(input_items)
+
+		# Pick up from the longest run of these inputs we have
+		for length in range(len(inputs), -1, -1):
+			run = self.lookup(instructions, (digest, inputs[:length]))
+			if run is not None:
+				break
+
+		if run is None:
+			computer = self.computer(instructions)
+			outputs = computer.run_until_input_needed()
+			self.remember((digest, ()), computer, outputs)
+		else:
+			computer, outputs = run
+			computer = computer.fork()
+			outputs = list(outputs)
+
+		if run is not None and length == len(inputs):
+			self.hits += 1
+		else:
+			self.misses += 1
+
+		for position in range(length, len(inputs)):
+			outputs += computer.run_until_input_needed([ inputs[position] ])
+			self.remember((digest, inputs[:position + 1]), computer, outputs)
+
+		return outputs, computer
+
+if __name__ == '__main__':
+	import itertools
+	import shutil
+	import tempfile
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	def read_program(day, filename="input.txt"):
+		with open(os.path.join(repository, day, filename)) as f:
+			return f.read().strip()
+
+	''' Same runs come back from the cache '''
+	runs = RunCache(directory=None)
+	instructions = read_program("day_5")
+
+	outputs, computer = runs.run(instructions, [5])
+	assert outputs == [14195011] and computer.halted
+	assert (runs.hits, runs.misses) == (0, 1)
+
+	again, computer = runs.run(instructions, [5])
+	assert again == outputs and computer.halted
+	assert (runs.hits, runs.misses) == (1, 1)
+
+	# Whatever is done with a computer handed back doesn't touch the cache
+	outputs, computer = runs.run(read_program("day_5", "ex_3.txt"), [])
+	assert outputs == [] and computer.waiting_for_input
+	assert computer.run_until_input_needed([8]) == [1000]
+	assert runs.run(read_program("day_5", "ex_3.txt"), [7])[0] == [999]
+
+	''' Amplifiers share their phase prefix '''
+	instructions = read_program("day_7")
+	best = 0
+
+	for phases in itertools.permutations(range(5)):
+		signal = 0
+		for phase in phases:
+			signal = runs.run(instructions, [phase, signal])[0][-1]
+		best = max(best, signal)
+
+	assert best == 30940
+	# Only the first run of every phase had to boot the program
+	assert sum(1 for digest, inputs in runs.runs if digest == runs.program_hash(instructions) and len(inputs) == 1) == 5
+
+	# Carrying on in a feedback loop from a computer handed back
+	outputs, computer = runs.run(read_program("day_7", "ex_4.txt"), [9, 0])
+	assert outputs == [5] and not computer.halted
+
+	''' Least recently used runs get dropped '''
+	runs = RunCache(capacity=3, directory=None)
+	instructions = read_program("day_5", "ex_3.txt")
+	for value in range(5):
+		runs.run(instructions, [value])
+	assert len(runs.runs) == 3
+
+	''' Runs saved to disk outlive the cache '''
+	directory = tempfile.mkdtemp()
+	try:
+		instructions = read_program("day_9")
+		outputs, computer = RunCache(directory=directory).run(instructions, [1])
+
+		runs = RunCache(directory=directory)
+		again, computer = runs.run(instructions, [1])
+		assert again == outputs == [2427443564] and computer.halted
+		assert (runs.hits, runs.misses) == (1, 0)
+
+		# A computer loaded from disk carries on like any other
+		outputs, computer = RunCache(directory=directory).run(read_program("day_5", "ex_3.txt"), [])
+		outputs, computer = RunCache(directory=directory).run(read_program("day_5", "ex_3.txt"), [])
+		assert computer.run_until_halt([9]) == [1001]
+	finally:
+		shutil.rmtree(directory)
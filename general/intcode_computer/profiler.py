@@ -0,0 +1,252 @@
+'''
+Execution profiler for the Intcode computer.
+
+Profiling is opt in. Attaching a profiler makes IntcodeComputer.resume run the program
+through IntcodeProfiler.execute, a copy of the regular execution loop that records every
+instruction before running it. Computers without a profiler never touch this module, so
+leaving it off costs nothing.
+
+	profiler = IntcodeProfiler().attach(computer)
+
+	with profiler.phase("game loop"):
+		computer.run_until_input_needed()
+
+	profiler.write_json("day_13_profile.json")
+	profiler.write_folded("day_13.folded")
+
+What gets collected:
+	- How many times each opcode ran
+	- How many times the instruction at each address ran
+	- How many times each address was read from and written to by a parameter
+	- Relative base adjustments, by amount
+	- Wall time and instructions run, per phase
+
+Intcode has no call instruction, so call stacks for the folded stack output are worked out
+from the calling convention the programs we get use: a function moves the relative base
+forward when it's entered and back when it returns. A forward adjustment pushes a frame
+named after the last jump target, a backward one pops it. The folded file can be fed to
+flamegraph.pl or speedscope as is.
+'''
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from general.intcode_computer.main import UNLIMITED
+from general.intcode_computer.instructions import Opcode, Mode, WRITE_PARAMETERS, INSTRUCTION_VALUES
+
+JUMPS = frozenset([ Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE ])
+
+# Name of the bottom frame of every folded stack
+ROOT_FRAME = "main"
+
+class IntcodeProfiler:
+	'''
+	Collects statistics on every instruction run by the computers it's attached to
+	'''
+	def __init__(self):
+		self.opcodes = Counter()
+		self.addresses = Counter()
+		self.reads = Counter()
+		self.writes = Counter()
+		self.adjustments = Counter()
+		# Instructions run under each call stack, keyed by folded stack
+		self.stacks = Counter()
+		# Phase name to [seconds, instructions]
+		self.phases = {}
+		self.current_phase = "run"
+		self.call_stack = [ ROOT_FRAME ]
+		self.folded_stack = ROOT_FRAME
+		self.last_jump_target = 0
+
+	def attach(self, computer):
+		computer.profiler = self
+		return self
+
+	@contextmanager
+	def phase(self, name):
+		'''
+		Counts everything run inside of the block towards the named phase
+		'''
+		previous = self.current_phase
+		self.current_phase = name
+		try:
+			yield self
+		finally:
+			self.current_phase = previous
+
+	def execute(self, computer, max_instructions=None):
+		'''
+		Same as IntcodeComputer.execute, recording every instruction before it runs
+		'''
+		computer.unshare_memory()
+		memory = computer.memory
+		decoded = computer.decoded
+		pointer = computer.instruction_pointer
+		budget = UNLIMITED if max_instructions is None else max_instructions
+		count = 0
+		started = time.perf_counter()
+
+		while pointer is not None and count < budget:
+			count += 1
+
+			try:
+				entry = decoded[pointer]
+			except KeyError:
+				entry = computer.decode_instruction(memory, pointer)
+
+			opcode = entry[1]
+
+			# An input that has to wait isn't recorded until it runs
+			if opcode != Opcode.INPUT or not computer.program_input or computer.input_queue:
+				self.record(computer, memory, pointer, opcode, entry[2])
+
+			relative_base = computer.relative_base
+
+			try:
+				next_pointer = entry[0](computer, memory, pointer)
+			except IndexError:
+				next_pointer = computer.step(memory, pointer)
+
+			if opcode in JUMPS and next_pointer is not None and next_pointer != pointer + 3:
+				self.last_jump_target = next_pointer
+			elif opcode == Opcode.ADJUST:
+				self.adjust(computer.relative_base - relative_base)
+
+			pointer = next_pointer
+
+		# An input that has to wait hasn't run, it's counted once it does
+		if computer.waiting_for_input:
+			count -= 1
+
+		if pointer is not None:
+			computer.instruction_pointer = pointer
+
+		phase = self.phases.setdefault(self.current_phase, [0.0, 0])
+		phase[0] += time.perf_counter() - started
+		phase[1] += count
+
+		computer.process_count += count
+		return count
+
+	def record(self, computer, memory, pointer, opcode, modes):
+		'''
+		Counts the instruction, along with the addresses its parameters read and write
+		'''
+		self.opcodes[opcode] += 1
+		self.addresses[pointer] += 1
+		self.stacks[self.folded_stack] += 1
+
+		write_parameter = WRITE_PARAMETERS.get(opcode)
+
+		for parameter in range(1, INSTRUCTION_VALUES[opcode]):
+			mode = modes[parameter - 1]
+
+			if mode == Mode.IMMEDIATE or pointer + parameter >= len(memory):
+				continue
+
+			address = memory[pointer + parameter]
+			if mode == Mode.RELATIVE:
+				address += computer.relative_base
+
+			if parameter == write_parameter:
+				self.writes[address] += 1
+			else:
+				self.reads[address] += 1
+
+	def adjust(self, amount):
+		'''
+		Counts a relative base adjustment and follows the call stack through it
+		'''
+		self.adjustments[amount] += 1
+
+		if amount > 0:
+			self.call_stack.append(f"fn_{self.last_jump_target}")
+		elif amount < 0 and len(self.call_stack) > 1:
+			self.call_stack.pop()
+		else:
+			return
+
+		self.folded_stack = ";".join(self.call_stack)
+
+	def to_dict(self):
+		'''
+		Everything collected so far, as plain JSON friendly data
+		'''
+		return {
+			"instructions": sum(self.opcodes.values()),
+			"opcodes": { opcode.name: count for opcode, count in self.opcodes.most_common() },
+			"addresses": { str(address): count for address, count in self.addresses.most_common() },
+			"reads": { str(address): count for address, count in self.reads.most_common() },
+			"writes": { str(address): count for address, count in self.writes.most_common() },
+			"relative_base_adjustments": {
+				"total": sum(self.adjustments.values()),
+				"by_amount": { str(amount): count for amount, count in self.adjustments.most_common() },
+			},
+			"phases": {
+				name: { "seconds": seconds, "instructions": instructions }
+				for name, ( seconds, instructions ) in self.phases.items()
+			},
+		}
+
+	def write_json(self, filename):
+		with open(filename, "w") as f:
+			json.dump(self.to_dict(), f, indent=4)
+
+	def folded_stacks(self):
+		'''
+		Lines of the folded stack format, one per call stack: "main;fn_12;fn_80 1234"
+		'''
+		return [ f"{stack} {count}" for stack, count in sorted(self.stacks.items()) ]
+
+	def write_folded(self, filename):
+		with open(filename, "w") as f:
+			f.write("\n".join(self.folded_stacks()) + "\n")
+
+if __name__ == '__main__':
+	import os
+	import tempfile
+
+	from general.intcode_computer.main import IntcodeComputer
+
+	''' Counts a small program exactly '''
+	computer = IntcodeComputer("1101,2,3,7,4,7,99,0", True, True, True)
+	profiler = IntcodeProfiler().attach(computer)
+	assert computer.run_until_halt() == [5]
+	assert profiler.opcodes == { Opcode.ADDITION: 1, Opcode.OUTPUT: 1, Opcode.HALT: 1 }
+	assert profiler.addresses == { 0: 1, 4: 1, 6: 1 }
+	assert profiler.writes == { 7: 1 }
+	assert profiler.reads == { 7: 1 }
+	assert profiler.phases["run"][1] == computer.process_count == 3
+
+	''' Profiled runs give the same results as unprofiled ones '''
+	with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "day_9", "input.txt")) as f:
+		instructions = f.read()
+
+	plain = IntcodeComputer(instructions, True, True, True, False, True)
+	profiled = IntcodeComputer(instructions, True, True, True, False, True)
+	profiler = IntcodeProfiler().attach(profiled)
+
+	with profiler.phase("boost"):
+		assert profiled.run_until_halt([1]) == plain.run_until_halt([1])
+
+	assert profiled.process_count == plain.process_count
+	assert profiler.phases["boost"][1] == plain.process_count
+	assert sum(profiler.opcodes.values()) == sum(profiler.addresses.values()) == sum(profiler.stacks.values())
+	assert profiler.adjustments
+
+	''' Exports '''
+	with tempfile.TemporaryDirectory() as directory:
+		profiler.write_json(os.path.join(directory, "profile.json"))
+		with open(os.path.join(directory, "profile.json")) as f:
+			profile = json.load(f)
+
+		assert profile["instructions"] == plain.process_count
+		assert profile["phases"]["boost"]["instructions"] == plain.process_count
+
+		profiler.write_folded(os.path.join(directory, "profile.folded"))
+		with open(os.path.join(directory, "profile.folded")) as f:
+			lines = f.read().split()
+
+		assert all(stack.startswith(ROOT_FRAME) for stack in lines[::2])
+		assert sum(int(count) for count in lines[1::2]) == plain.process_count
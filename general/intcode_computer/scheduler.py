@@ -0,0 +1,341 @@
+'''
+Cooperative round robin scheduler for networks of Intcode computers.
+
+Machines are connected by bounded channels: everything a machine outputs goes into the
+input channel of each machine it's connected to. The scheduler takes turns running the
+machines that can make progress, each for a budget of instructions at a time:
+
+	scheduler = Scheduler()
+	amplifiers = [ scheduler.add(IntcodeComputer(instructions, True, True, True), [phase]) for phase in phases ]
+	for source, target in zip(amplifiers, amplifiers[1:] + amplifiers[:1]):
+		scheduler.connect(source, target)
+	scheduler.send(amplifiers[0], 0)
+	scheduler.run()
+
+Machines run through IntcodeComputer.resume, so profilers and tracers attached to them
+work as usual. A tracer's breakpoint raises BreakpointReached out of run().
+
+A machine wanting input its channel doesn't have is parked until something gets sent to
+it. A machine with output for a channel that is full is blocked until the machine reading
+that channel has taken something out of it. Machines that can tell they're spinning in a
+busy loop (see loops.py) don't get another turn either. run() returns once no machine can
+make progress, because every one of them has halted, is parked, blocked or spinning.
+
+Nothing here recurses, so networks of hundreds of machines passing millions of messages
+only cost the time it takes to run them.
+'''
+from collections import deque
+
+from general.intcode_computer.main import IntcodeComputer
+
+class Channel:
+	'''
+	Bounded queue of values on their way into a machine.
+	Its items are the machine's input queue, so the machine reads straight out of it.
+
+	@param int capacity - Most values the channel holds at once. None doesn't limit it.
+	'''
+	def __init__(self, capacity=None):
+		self.capacity = capacity
+		self.items = deque()
+		# Machines blocked on this channel being full
+		self.blocked_senders = []
+
+	@property
+	def full(self):
+		return self.capacity is not None and len(self.items) >= self.capacity
+
+	def __len__(self):
+		return len(self.items)
+
+class Machine:
+	'''
+	A computer in a scheduler's network
+
+	@param IntcodeComputer computer 	- Computer running the machine's program
+	@param Channel channel 			- Channel the machine reads its input from
+	'''
+	def __init__(self, computer, channel, name=None):
+		self.computer = computer
+		self.channel = channel
+		self.name = name
+		# Machines everything we output gets sent to
+		self.targets = []
+		# Values we output that haven't fit into our targets' channels yet
+		self.outbox = deque()
+		# Values we output while not connected to anything
+		self.outputs = []
+		self.scheduled = False
+
+	@property
+	def halted(self):
+		return self.computer.halted
+
+	@property
+	def parked(self):
+		return self.computer.waiting_for_input and not self.channel.items
+
+	@property
+	def blocked(self):
+		return bool(self.outbox)
+
+	@property
+	def spinning(self):
+		'''
+		Stuck in a loop that never does anything again, for computers that can tell (see loops.py)
+		'''
+		return self.computer.idle
+
+	def __repr__(self):
+		return f"Machine({self.name})"
+
+class Scheduler:
+	'''
+	@param int budget 	- Instructions a machine runs per turn before the next one gets to go.
+	@param int capacity - Default capacity of machines' input channels.
+	'''
+	def __init__(self, budget=1000, capacity=64):
+		self.budget = budget
+		self.capacity = capacity
+		self.machines = []
+		# Machines that can make progress, in the order they get their turn
+		self.ready = deque()
+		self.instructions = 0
+		self.messages = 0
+
+	def add(self, computer, input_items=(), name=None, capacity=None):
+		'''
+		Adds a computer to the network. Returns its Machine.
+
+		@param list input_items	- Input it starts with, which may go over the channel's capacity.
+		'''
+		channel = Channel(capacity or self.capacity)
+		channel.items.extend(computer.input_queue or ())
+		channel.items.extend(input_items)
+
+		computer.boot()
+		computer.input_queue = channel.items
+		computer.collect_outputs = True
+		computer.stop_on_output = False
+
+		machine = Machine(computer, channel, len(self.machines) if name is None else name)
+		self.machines.append(machine)
+		self.schedule(machine)
+
+		return machine
+
+	def connect(self, source, target):
+		'''
+		Sends everything the source machine outputs to the target machine
+		'''
+		source.targets.append(target)
+		self.schedule(source)
+
+	def send(self, target, value):
+		'''
+		Sends a value to a machine from outside of the network, whether its channel is full or not
+		'''
+		target.channel.items.append(value)
+		self.schedule(target)
+
+	def schedule(self, machine):
+		if not machine.scheduled and not machine.halted:
+			machine.scheduled = True
+			self.ready.append(machine)
+
+	def deliver(self, machine):
+		'''
+		Moves the machine's outbox into its targets' channels until one of them fills up
+		'''
+		outbox = machine.outbox
+
+		if not machine.targets:
+			machine.outputs.extend(outbox)
+			outbox.clear()
+			return
+
+		while outbox:
+			for target in machine.targets:
+				if target.channel.full:
+					target.channel.blocked_senders.append(machine)
+					return
+
+			value = outbox.popleft()
+			for target in machine.targets:
+				target.channel.items.append(value)
+				self.schedule(target)
+
+			self.messages += 1
+
+	def turn(self, machine):
+		'''
+		Runs the machine for one turn
+		'''
+		computer = machine.computer
+		channel = machine.channel
+
+		self.deliver(machine)
+		if machine.blocked:
+			return
+
+		received = len(channel.items)
+		computer.waiting_for_input = False
+		computer.idle = False
+		# Through resume, so profilers, tracers and debug output all work on machines
+		self.instructions += computer.resume(self.budget)
+
+		if computer.outputs:
+			machine.outbox.extend(computer.outputs)
+			computer.outputs.clear()
+			self.deliver(machine)
+
+		# Taking input out of the channel makes room for whoever was blocked on it
+		if len(channel.items) < received and channel.blocked_senders:
+			for sender in channel.blocked_senders:
+				self.schedule(sender)
+			channel.blocked_senders.clear()
+
+		if not (machine.halted or machine.parked or machine.blocked or machine.spinning):
+			self.schedule(machine)
+
+		# A tracer stopping the machine stops the network, running it again carries on
+		computer.check_tracer()
+
+	def run(self, max_instructions=None):
+		'''
+		Runs the network until no machine can make progress, or until the network as a whole
+		has run max_instructions instructions. Networks that never settle need the cap to stop.
+		Returns True if every machine has halted, False otherwise.
+		'''
+		ready = self.ready
+		limit = None if max_instructions is None else self.instructions + max_instructions
+
+		while ready:
+			if limit is not None and self.instructions >= limit:
+				break
+
+			machine = ready.popleft()
+			machine.scheduled = False
+			self.turn(machine)
+
+		return all(machine.halted for machine in self.machines)
+
+	@property
+	def idle(self):
+		'''
+		Machines that haven't halted but can't make progress either
+		'''
+		return [ machine for machine in self.machines if not machine.halted and not machine.scheduled ]
+
+if __name__ == '__main__':
+	import itertools
+	import os
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	def read_program(day, filename="input.txt"):
+		with open(os.path.join(repository, day, filename)) as f:
+			return f.read().strip()
+
+	def feedback_loop(instructions, phases, **kwargs):
+		scheduler = Scheduler(**kwargs)
+		amplifiers = [ scheduler.add(IntcodeComputer(instructions, True, True, True), [phase]) for phase in phases ]
+
+		for source, target in zip(amplifiers, amplifiers[1:] + amplifiers[:1]):
+			scheduler.connect(source, target)
+
+		scheduler.send(amplifiers[0], 0)
+		assert scheduler.run()
+		# The last amplifier's final signal ends up waiting in the first one's channel
+		return amplifiers[0].channel.items[-1]
+
+	''' Day 7 feedback loops '''
+	instructions = read_program("day_7", "ex_4.txt")
+	assert feedback_loop(instructions, [9, 8, 7, 6, 5]) == 139629729
+	# Slices of a single instruction and channels of a single value don't change the result
+	assert feedback_loop(instructions, [9, 8, 7, 6, 5], budget=1, capacity=1) == 139629729
+	assert max(feedback_loop(read_program("day_7", "ex_5.txt"), phases) for phases in itertools.permutations(range(5, 10))) == 18216
+
+	''' Big networks run without recursing '''
+	# Adds one to everything it reads and passes it on, forever
+	increment = "3,9,1001,9,1,9,4,9,1105,1,0"
+	scheduler = Scheduler(budget=50, capacity=2)
+	chain = [ scheduler.add(IntcodeComputer(increment, True, True, True)) for machine in range(500) ]
+
+	for source, target in zip(chain, chain[1:]):
+		scheduler.connect(source, target)
+
+	for value in range(200):
+		scheduler.send(chain[0], value * 1000000)
+
+	# Every machine ends up parked, waiting on input that never comes
+	assert not scheduler.run()
+	assert chain[-1].outputs == [ value * 1000000 + 500 for value in range(200) ]
+	assert scheduler.messages == 200 * 499
+	assert len(scheduler.idle) == 500
+
+	''' Networks that never settle stop at the instruction cap '''
+	scheduler = Scheduler(budget=50, capacity=2)
+	ring = [ scheduler.add(IntcodeComputer(increment, True, True, True)) for machine in range(100) ]
+
+	for source, target in zip(ring, ring[1:] + ring[:1]):
+		scheduler.connect(source, target)
+
+	scheduler.send(ring[0], 0)
+	assert not scheduler.run(max_instructions=100000)
+	assert 100000 <= scheduler.instructions < 100000 + scheduler.budget
+
+	''' Idle networks are reported '''
+	scheduler = Scheduler()
+	waiting = scheduler.add(IntcodeComputer(increment, True, True, True))
+	assert not scheduler.run()
+	assert scheduler.idle == [ waiting ] and waiting.parked
+
+	# Values sent to an unconnected machine come back out of it
+	scheduler.send(waiting, 41)
+	assert not scheduler.run()
+	assert waiting.outputs == [ 42 ]
+
+	''' Machines spinning in busy loops stop getting turns '''
+	from general.intcode_computer.loops import FastForwardIntcodeComputer
+
+	scheduler = Scheduler()
+	spinning = scheduler.add(FastForwardIntcodeComputer("3,7,1105,1,2,99,0,0", True, True, True), [1])
+	assert not scheduler.run()
+	assert spinning.spinning and scheduler.idle == [ spinning ]
+
+	''' Full channels block senders until there's room '''
+	# Outputs 0, 1, 2, ... forever
+	counter = "4,9,1001,9,1,9,1105,1,0,0"
+	scheduler = Scheduler(budget=100, capacity=3)
+	source = scheduler.add(IntcodeComputer(counter, True, True, True))
+	# Halts without ever reading its channel
+	sink = scheduler.add(IntcodeComputer("99", True, True, True))
+	scheduler.connect(source, sink)
+
+	assert not scheduler.run()
+	assert list(sink.channel.items) == [ 0, 1, 2 ]
+	assert source.blocked and scheduler.idle == [ source ]
+
+	''' Machines run under their tracers '''
+	from general.intcode_computer.main import BreakpointReached
+	from general.intcode_computer.tracer import IntcodeTracer
+
+	scheduler = Scheduler()
+	first = scheduler.add(IntcodeComputer(increment, True, True, True))
+	second = scheduler.add(IntcodeComputer(increment, True, True, True))
+	scheduler.connect(first, second)
+	# Stops the second machine before it outputs
+	tracer = IntcodeTracer().attach(second.computer).break_at(6)
+	scheduler.send(first, 1)
+
+	try:
+		scheduler.run()
+		assert False
+	except BreakpointReached as stop:
+		assert stop.stopped == ( "breakpoint", 6 )
+
+	assert second.outputs == [] and tracer.recorded == 2
+	tracer.clear()
+	assert not scheduler.run()
+	assert second.outputs == [ 3 ]
@@ -0,0 +1,230 @@
+'''
+Parameter sweeps over Intcode programs.
+
+A sweep runs the same program once for every point of a parameter space, fanned out over
+a pool of worker processes, and hands back (parameter, result) pairs as soon as they are
+done (in completion order, not in the order of the space):
+
+	# Day 2: patch the noun and verb into memory, stop as soon as one gives 19690720
+	space = [ { 1: noun, 2: verb } for noun in range(100) for verb in range(100) ]
+	for patches, result in sweep(instructions, space, run_with_patches, stop_when=equals(19690720)):
+		...
+
+	# Day 7: highest signal out of every phase setting permutation
+	sweep(instructions, itertools.permutations(range(5, 10)), run_amplifiers, reduce=max)
+
+Each worker parses the program once and boots a template computer from it. Every run
+starts from a copy on write fork of that template, so nothing gets parsed again.
+
+Runners are functions of (template computer, parameter) returning the result of the run.
+They run in the worker processes, so they (and stop_when) have to be defined at the top
+level of a module. Given reduce, sweep() returns reduce(results) over the results alone
+instead of the pairs. The space is consumed lazily and only a few chunks per worker are in
+flight at any time. Once stop_when matches a result, or the caller stops iterating, work
+still pending is cancelled.
+'''
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+from general.intcode_computer.backends import backend
+
+# Template computer of the program each worker process runs
+worker_template = None
+
+def boot_template(instructions, backend_name):
+	'''
+	Parses the program and boots the computer every run gets forked from
+	'''
+	template = backend(backend_name)(instructions, True, True, True, False, True)
+	template.boot()
+	return template
+
+def start_worker(instructions, backend_name):
+	global worker_template
+	worker_template = boot_template(instructions, backend_name)
+
+def run_chunk(runner, chunk, stop_when, template=None):
+	'''
+	Runs every parameter of the chunk, stopping early on a result stop_when is looking for.
+	Returns the list of (parameter, result) pairs.
+	'''
+	template = template or worker_template
+	results = []
+
+	for parameter in chunk:
+		result = runner(template, parameter)
+		results.append((parameter, result))
+
+		if stop_when is not None and stop_when(parameter, result):
+			break
+
+	return results
+
+def run_with_patches(template, patches, result_address=0):
+	'''
+	Writes the patches ({ address: value }) over the program, runs it,
+	and returns the value it leaves at result_address
+	'''
+	computer = template.fork()
+	computer.unshare_memory()
+
+	for address, value in patches.items():
+		computer.store(computer.memory, address, value)
+
+	computer.run_until_input_needed()
+	return computer.read(computer.memory, result_address)
+
+def run_with_inputs(template, input_items):
+	'''
+	Runs the program on the inputs and returns everything it outputs
+	'''
+	return template.fork().run_until_halt(list(input_items))
+
+def run_amplifiers(template, phases):
+	'''
+	Runs a day 7 amplifier per phase, feeding each one's output into the next one.
+	The last amplifier's output goes back into the first one until they halt, so
+	amplifiers that halt after a single output work too. Returns the last signal,
+	or None if the amplifiers never output one.
+	'''
+	amplifiers = [ template.fork() for phase in phases ]
+	for amplifier, phase in zip(amplifiers, phases):
+		amplifier.queue_input([phase])
+
+	signal = 0
+	last_signal = None
+
+	while not amplifiers[-1].halted:
+		for amplifier in amplifiers:
+			outputs = amplifier.run_until_input_needed([signal])
+
+			# Halted or waiting without passing anything on, so nothing else will come out
+			if not outputs:
+				return last_signal
+
+			signal = outputs[-1]
+
+		last_signal = signal
+
+	return last_signal
+
+class equals:
+	'''
+	stop_when predicate matching results equal to the target
+	'''
+	def __init__(self, target):
+		self.target = target
+
+	def __call__(self, parameter, result):
+		return result == self.target
+
+def sweep(instructions, space, runner=run_with_inputs, stop_when=None, processes=None, chunk_size=64, backend_name="dispatch", reduce=None):
+	'''
+	Runs the program for every parameter in the space. Returns an iterator of (parameter, result) pairs
+	in completion order, or reduce's value for the results if given.
+
+	@param str instructions 	- Program to run.
+	@param iterable space 		- Parameters to run the program with.
+	@param function runner		- Runs the program for a parameter, see run_with_patches, run_with_inputs and run_amplifiers.
+	@param function stop_when	- Optional predicate of (parameter, result). The sweep stops after the first result it matches.
+	@param int processes		- Number of worker processes, every core by default. 0 runs everything in this process.
+	@param int chunk_size 		- Parameters handed to a worker at a time.
+	@param str backend_name 	- Backend the workers run the program on, see backends.py.
+	@param function reduce 		- Optional function of an iterable of the results, max for example.
+	'''
+	pairs = sweep_pairs(instructions, iter(space), runner, stop_when, processes, chunk_size, backend_name)
+
+	if reduce is None:
+		return pairs
+
+	return reduce(result for parameter, result in pairs)
+
+def sweep_pairs(instructions, space, runner, stop_when, processes, chunk_size, backend_name):
+	'''
+	Yields the (parameter, result) pairs of sweep(), see there
+	'''
+
+	if processes == 0:
+		template = boot_template(instructions, backend_name)
+		for chunk in iter(lambda: list(islice(space, chunk_size)), []):
+			for parameter, result in run_chunk(runner, chunk, stop_when, template):
+				yield parameter, result
+				if stop_when is not None and stop_when(parameter, result):
+					return
+		return
+
+	processes = processes or os.cpu_count()
+	executor = ProcessPoolExecutor(processes, initializer=start_worker, initargs=(instructions, backend_name))
+	pending = set()
+
+	try:
+		while True:
+			# Keep a couple of chunks queued up per worker
+			while len(pending) < 2 * processes:
+				chunk = list(islice(space, chunk_size))
+				if not chunk:
+					break
+				pending.add(executor.submit(run_chunk, runner, chunk, stop_when))
+
+			if not pending:
+				return
+
+			done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+			for future in done:
+				for parameter, result in future.result():
+					yield parameter, result
+					if stop_when is not None and stop_when(parameter, result):
+						return
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
+
+if __name__ == '__main__':
+	import itertools
+
+	from general.intcode_computer.main import IntcodeComputer
+
+	repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+	def read_program(day, filename="input.txt"):
+		with open(os.path.join(repository, day, filename)) as f:
+			return f.read().strip()
+
+	''' Day 2 noun and verb search stops at the target '''
+	instructions = read_program("day_2")
+	space = [ { 1: noun, 2: verb } for noun in range(100) for verb in range(100) ]
+
+	for processes in [0, 2]:
+		results = list(sweep(instructions, space, run_with_patches, stop_when=equals(19690720), processes=processes))
+		patches, result = results[-1]
+		assert result == 19690720
+		assert 100 * patches[1] + patches[2] == 7014
+		# Stopped well before the end of the space
+		assert len(results) < len(space)
+
+	# Same as running each of them on its own
+	for patches, result in sweep(instructions, space[:200], run_with_patches, processes=2):
+		computer = IntcodeComputer(instructions, False, False, True)
+		computer.boot()
+		for address, value in patches.items():
+			computer.store(computer.memory, address, value)
+		computer.resume()
+		assert computer.memory[0] == result
+
+	''' Day 7 amplifiers, in series and in a feedback loop '''
+	instructions = read_program("day_7", "ex_1.txt")
+	assert sweep(instructions, itertools.permutations(range(5)), run_amplifiers, processes=2, chunk_size=8, reduce=max) == 43210
+
+	instructions = read_program("day_7", "ex_4.txt")
+	results = dict(sweep(instructions, itertools.permutations(range(5, 10)), run_amplifiers, processes=2, chunk_size=8))
+	assert len(results) == 120
+	assert results[(9, 8, 7, 6, 5)] == max(results.values()) == 139629729
+
+	# Amplifiers that stop without any output don't take the sweep down with them
+	assert run_amplifiers(boot_template("3,0,99", "dispatch"), [ 0, 1 ]) is None
+	assert sweep("3,0,3,0,99", [ [ 0 ], [ 0, 1 ] ], run_amplifiers, processes=2, reduce=list) == [ None, None ]
+
+	''' Input sweeps '''
+	instructions = read_program("day_5", "ex_3.txt")
+	assert sorted(sweep(instructions, [ [7], [8], [9] ], processes=0)) == [ ([7], [999]), ([8], [1000]), ([9], [1001]) ]
@@ -0,0 +1,473 @@
+'''
+Symbolic execution of Intcode programs.
+
+SymbolicIntcodeComputer runs a program with some of its memory cells (or inputs) standing
+for unknowns instead of numbers. Arithmetic on unknowns builds up expressions instead of
+values, so once the program halts, whatever it leaves in memory or outputs is the
+closed form expression of its unknowns:
+
+	computer = SymbolicIntcodeComputer(instructions, symbols={ 1: "noun", 2: "verb" })
+	computer.run_until_input_needed()
+	computer.memory[0] 		# -> ((noun * 250000) + verb) + 493708 for example
+
+solve() then finds values of the unknowns giving a target value without running the
+program again:
+
+	solve(computer.memory[0], 19690720, { "noun": range(100), "verb": range(100) })
+
+Expressions are a DAG: every expression is only ever built once, so the same subexpression
+used in different places is the same object.
+
+Additions and multiplications always go through. Comparisons build expressions as well,
+but jumps, relative base adjustments, instructions themselves and addresses written to need
+actual numbers. Running into one that depends on an unknown raises SymbolicError, so this
+works for straight line computations and for programs whose control flow doesn't depend on
+the unknowns.
+
+Reading from an address that depends on an unknown (like day 2's first instruction, which
+reads from addresses noun and verb) gives an opaque load expression. That's fine as long as
+it gets overwritten, as it does in day 2, but it can't be evaluated or solved for.
+'''
+import weakref
+from itertools import product
+
+from general.intcode_computer.main import IntcodeComputer, UNLIMITED
+from general.intcode_computer.instructions import Opcode, Mode
+
+class SymbolicError(Exception):
+	'''
+	The program needs an actual number where it only has an expression
+	'''
+
+class Expression:
+	'''
+	Node of an expression DAG. Build them with symbol(), add(), multiply(), less_than() and equals().
+	'''
+	__slots__ = ( "operator", "operands", "__weakref__" )
+
+	# Every expression built so far, so that the same expression is only ever built once
+	built = weakref.WeakValueDictionary()
+
+	def __new__(cls, operator, *operands):
+		# Numbers and names by value, equal names not always being the same object. Expressions by identity
+		key = ( operator, ) + tuple(( type(operand), operand ) if isinstance(operand, (int, str)) else id(operand) for operand in operands)
+		expression = cls.built.get(key)
+
+		if expression is None:
+			expression = super().__new__(cls)
+			expression.operator = operator
+			expression.operands = operands
+			cls.built[key] = expression
+
+		return expression
+
+	def __add__(self, other):
+		return add(self, other)
+
+	def __radd__(self, other):
+		return add(other, self)
+
+	def __mul__(self, other):
+		return multiply(self, other)
+
+	def __rmul__(self, other):
+		return multiply(other, self)
+
+	def __bool__(self):
+		raise SymbolicError(f"Truth value of {self} depends on unknowns")
+
+	def __str__(self):
+		def visit(node, operands):
+			if node.operator == "symbol":
+				return operands[0]
+
+			if node.operator == "load":
+				return f"[{operands[0]}]"
+
+			left, right = (
+				str(text) if isinstance(operand, int) or operand.operator == "symbol" else f"({text})"
+				for operand, text in zip(node.operands, operands)
+			)
+			return f"{left} {node.operator} {right}"
+
+		return fold(self, visit)
+
+	def __repr__(self):
+		return f"Expression({self})"
+
+def fold(expression, visit):
+	'''
+	Works out visit(node, operands) for every node of the expression, operands first, and returns it for the expression.
+	operands are the results for the node's operands, numbers and names standing for themselves.
+
+	Each node is only visited once however many times it's shared, and the DAG is walked
+	without recursing, so neither deep nor widely shared expressions blow up.
+	'''
+	if not isinstance(expression, Expression):
+		return expression
+
+	memo = {}
+	stack = [ expression ]
+
+	while stack:
+		node = stack[-1]
+
+		if id(node) in memo:
+			stack.pop()
+			continue
+
+		pending = [ operand for operand in node.operands if isinstance(operand, Expression) and id(operand) not in memo ]
+		if pending:
+			stack.extend(pending)
+			continue
+
+		stack.pop()
+		memo[id(node)] = visit(node, [ memo[id(operand)] if isinstance(operand, Expression) else operand for operand in node.operands ])
+
+	return memo[id(expression)]
+
+def symbol(name):
+	return Expression("symbol", name)
+
+def load(address):
+	return Expression("load", address)
+
+def add(left, right):
+	if isinstance(left, int) and isinstance(right, int):
+		return left + right
+
+	# Keep constants on the right so (x + 1) + 2 folds into x + 3
+	if isinstance(left, int):
+		left, right = right, left
+
+	if right == 0:
+		return left
+
+	if isinstance(right, int) and left.operator == "+" and isinstance(left.operands[1], int):
+		return add(left.operands[0], left.operands[1] + right)
+
+	return Expression("+", left, right)
+
+def multiply(left, right):
+	if isinstance(left, int) and isinstance(right, int):
+		return left * right
+
+	if isinstance(left, int):
+		left, right = right, left
+
+	if right == 0:
+		return 0
+
+	if right == 1:
+		return left
+
+	if isinstance(right, int) and left.operator == "*" and isinstance(left.operands[1], int):
+		return multiply(left.operands[0], left.operands[1] * right)
+
+	return Expression("*", left, right)
+
+def less_than(left, right):
+	if isinstance(left, int) and isinstance(right, int):
+		return 1 if left < right else 0
+
+	return Expression("<", left, right)
+
+def equals(left, right):
+	if isinstance(left, int) and isinstance(right, int):
+		return 1 if left == right else 0
+
+	if left is right:
+		return 1
+
+	return Expression("==", left, right)
+
+OPERATIONS = {
+	Opcode.ADDITION: add,
+	Opcode.MULTIPLICATION: multiply,
+	Opcode.LESS_THAN: less_than,
+	Opcode.EQUALS: equals,
+}
+
+def evaluate(expression, values):
+	'''
+	Value of the expression with the unknowns set to the values, a dict of name to value
+	'''
+	def visit(node, operands):
+		if node.operator == "symbol":
+			return values[operands[0]]
+
+		if node.operator == "load":
+			raise SymbolicError(f"evaluate(): Can't evaluate {node}, it was read from an address depending on unknowns")
+
+		left, right = operands
+		return {
+			"+": lambda: left + right,
+			"*": lambda: left * right,
+			"<": lambda: 1 if left < right else 0,
+			"==": lambda: 1 if left == right else 0,
+		}[node.operator]()
+
+	return fold(expression, visit)
+
+def polynomial(expression):
+	'''
+	Expands the expression into a polynomial. Returns a dict mapping each monomial,
+	a sorted tuple of the names multiplied together, to its coefficient.
+	'''
+	def terms(operand):
+		if isinstance(operand, int):
+			return { (): operand } if operand else {}
+
+		return operand
+
+	def visit(node, operands):
+		if node.operator == "symbol":
+			return { node.operands: 1 }
+
+		if node.operator == "load":
+			raise SymbolicError(f"polynomial(): Can't expand {node}, it was read from an address depending on unknowns")
+
+		left, right = ( terms(operand) for operand in operands )
+		result = {}
+
+		if node.operator == "+":
+			for side in (left, right):
+				for monomial, coefficient in side.items():
+					result[monomial] = result.get(monomial, 0) + coefficient
+		elif node.operator == "*":
+			for ( monomial_1, coefficient_1 ), ( monomial_2, coefficient_2 ) in product(left.items(), right.items()):
+				monomial = tuple(sorted(monomial_1 + monomial_2))
+				result[monomial] = result.get(monomial, 0) + coefficient_1 * coefficient_2
+		else:
+			raise SymbolicError(f"polynomial(): Can't expand {node}")
+
+		return { monomial: coefficient for monomial, coefficient in result.items() if coefficient }
+
+	return terms(fold(expression, visit))
+
+def solve(expression, target, bounds):
+	'''
+	Finds values of the unknowns that make the expression equal to the target.
+	Returns a dict of name to value, or None if there are none within the bounds.
+
+	@param dict bounds - Range of values each unknown can take, by name
+
+	When the expression is linear, the unknown with the most possible values is solved for
+	directly, so only the other unknowns get enumerated. Day 2's noun and verb take 100 tries
+	instead of 10,000 runs. Anything else is enumerated over its bounds.
+	'''
+	terms = polynomial(expression)
+	names = sorted(bounds, key=lambda name: len(bounds[name]))
+	unknown = [ name for monomial in terms for name in monomial if name not in bounds ]
+
+	if unknown:
+		raise SymbolicError(f"solve(): No bounds given for {', '.join(sorted(set(unknown)))}")
+
+	def value_of(terms, values):
+		total = 0
+		for monomial, coefficient in terms.items():
+			for name in monomial:
+				coefficient *= values[name]
+			total += coefficient
+		return total
+
+	solved = None
+	if all(len(monomial) <= 1 for monomial in terms):
+		solved = next(( name for name in reversed(names) if (name,) in terms ), None)
+
+	others = [ name for name in names if name != solved ]
+	rest = { monomial: coefficient for monomial, coefficient in terms.items() if monomial != (solved,) }
+
+	for combination in product(*[ bounds[name] for name in others ]):
+		values = dict(zip(others, combination))
+		remainder = target - value_of(rest, values)
+
+		if solved is None:
+			if remainder == 0:
+				return values
+			continue
+
+		coefficient = terms[(solved,)]
+		if remainder % coefficient == 0 and remainder // coefficient in bounds[solved]:
+			values[solved] = remainder // coefficient
+			return values
+
+	return None
+
+class SymbolicIntcodeComputer(IntcodeComputer):
+	'''
+	Same as IntcodeComputer, but memory and input can hold expressions of unknowns.
+
+	@param dict symbols - Names of the unknowns to put in memory, by address.
+	'''
+	def __init__(self, *args, symbols=None, **kwargs):
+		self.symbols = symbols or {}
+		super().__init__(*args, **kwargs)
+
+	def load_memory(self):
+		memory = super().load_memory()
+
+		for address, name in self.symbols.items():
+			memory[address] = symbol(name)
+
+		return memory
+
+	def number(self, value, what):
+		'''
+		Makes sure the value doesn't depend on any unknowns
+		'''
+		if isinstance(value, Expression):
+			raise SymbolicError(f"{what} depends on unknowns: {value}")
+
+		return value
+
+	def execute(self, max_instructions=None):
+		'''
+		Same as IntcodeComputer.execute, running every instruction through symbolic_step
+		'''
+		self.unshare_memory()
+		memory = self.memory
+		pointer = self.instruction_pointer
+		budget = UNLIMITED if max_instructions is None else max_instructions
+		count = 0
+
+		while pointer is not None and count < budget:
+			count += 1
+			pointer = self.symbolic_step(memory, pointer)
+
+		if self.waiting_for_input:
+			count -= 1
+
+		if pointer is not None:
+			self.instruction_pointer = pointer
+
+		self.process_count += count
+		return count
+
+	def interpret(self, max_instructions=None):
+		return self.execute(max_instructions)
+
+	def symbolic_step(self, memory, pointer):
+		'''
+		Runs the instruction at the pointer. Returns the next instruction pointer, or None when we have to stop running.
+		'''
+		self.number(self.read(memory, pointer), f"Instruction at {pointer}")
+
+		try:
+			handler, opcode, modes, instruction_values = self.decoded[pointer]
+		except KeyError:
+			handler, opcode, modes, instruction_values = self.decode_instruction(memory, pointer)
+
+		parameters = [ self.read(memory, address) for address in range(pointer + 1, pointer + instruction_values) ]
+
+		def address(index):
+			parameter = self.number(parameters[index], f"Address of parameter {index + 1} of the instruction at {pointer}")
+			return parameter + self.relative_base if modes[index] == Mode.RELATIVE else parameter
+
+		def value(index):
+			if modes[index] == Mode.IMMEDIATE:
+				return parameters[index]
+
+			parameter = parameters[index]
+			if isinstance(parameter, Expression):
+				return load(parameter if modes[index] == Mode.POSITION else add(parameter, self.relative_base))
+
+			return self.read(memory, address(index))
+
+		if opcode in OPERATIONS:
+			self.store(memory, address(2), OPERATIONS[opcode](value(0), value(1)))
+		elif opcode == Opcode.INPUT:
+			if self.program_input and not self.input_queue:
+				self.instruction_pointer = pointer
+				self.waiting_for_input = True
+				return None
+			self.get_input(memory, address(0))
+		elif opcode == Opcode.OUTPUT:
+			output = value(0)
+			if self.collect_outputs:
+				self.outputs.append(output)
+				if self.stop_on_output:
+					self.instruction_pointer = pointer + instruction_values
+					return None
+			else:
+				self.do_output(memory, output)
+		elif opcode in (Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE):
+			condition = self.number(value(0), f"Jump condition at {pointer}")
+			if (condition != 0) == (opcode == Opcode.JUMP_IF_TRUE):
+				return self.number(value(1), f"Jump target at {pointer}")
+		elif opcode == Opcode.ADJUST:
+			self.relative_base += self.number(value(0), f"Relative base adjustment at {pointer}")
+		else:
+			self.instruction_pointer = pointer
+			self.halted = True
+			return None
+
+		return pointer + instruction_values
+
+if __name__ == '__main__':
+	import os
+
+	''' Day 2 in closed form '''
+	with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "day_2", "input.txt")) as f:
+		instructions = f.read().strip()
+
+	computer = SymbolicIntcodeComputer(instructions, False, False, True, symbols={ 1: "noun", 2: "verb" })
+	computer.run_until_input_needed()
+	expression = computer.memory[0]
+	assert solve(expression, 19690720, { "noun": range(100), "verb": range(100) }) == { "noun": 70, "verb": 14 }
+
+	# The expression gives what actually running the program gives
+	for noun, verb in [ (12, 2), (0, 0), (99, 99), (70, 14) ]:
+		concrete = IntcodeComputer(instructions, False, False, True)
+		concrete.boot()
+		concrete.store(concrete.memory, 1, noun)
+		concrete.store(concrete.memory, 2, verb)
+		concrete.resume()
+		assert evaluate(expression, { "noun": noun, "verb": verb }) == concrete.memory[0]
+
+	''' Expressions are shared, not rebuilt '''
+	x, y = symbol("x"), symbol("y")
+	assert x + y is x + y
+	assert (x + 1) + 2 is x + 3
+	assert x * 0 == 0 and x * 1 is x
+	# Names are compared by value, they aren't always the same object
+	assert symbol("".join([ "x" ])) is x
+
+	''' Deep and widely shared expressions are only walked once per node '''
+	doubled = x
+	for step in range(40):
+		doubled = doubled + doubled
+	assert polynomial(doubled) == { ("x",): 2 ** 40 }
+	assert solve(doubled, 3 * 2 ** 40, { "x": range(10) }) == { "x": 3 }
+
+	# Deeper than Python would recurse
+	chain = x
+	for step in range(5000):
+		chain = chain * 2 + y
+	assert evaluate(chain, { "x": 0, "y": 1 }) == 2 ** 5000 - 1
+	assert solve(chain, 2 ** 5000 - 1, { "x": range(10), "y": range(10) }) == { "x": 0, "y": 1 }
+	assert str(chain).count("y") == 5000
+
+	''' Non linear expressions get enumerated '''
+	# mem[11] = mem[9] + mem[10], then squared
+	computer = SymbolicIntcodeComputer("1,9,10,11,2,11,11,11,99,0,0,0", False, False, True, symbols={ 9: "a", 10: "b" })
+	computer.run_until_input_needed()
+	solution = solve(computer.memory[11], 49, { "a": range(10), "b": range(10) })
+	assert solution["a"] + solution["b"] == 7
+
+	''' Unknowns can come in through input and go out through output '''
+	computer = SymbolicIntcodeComputer("3,9,1002,9,3,9,4,9,99,0", True, True, True)
+	assert [ str(output) for output in computer.run_until_halt([symbol("x")]) ] == ["x * 3"]
+
+	''' Comparisons only go as far as jumps '''
+	# Compares the input with 8 and jumps on the result
+	computer = SymbolicIntcodeComputer("3,11,8,11,12,11,1005,11,10,99,99,0,8", True, True, True)
+	try:
+		computer.run_until_halt([symbol("x")])
+		assert False
+	except SymbolicError:
+		assert str(computer.memory[11]) == "x == 8"
+
+	# But the same program runs fine when the comparison comes out the same either way
+	computer = SymbolicIntcodeComputer("3,11,8,11,12,11,1005,11,10,99,99,0,8", True, True, True)
+	assert computer.run_until_halt([8]) == []
@@ -0,0 +1,371 @@
+'''
+Breakpoints, watchpoints and instruction tracing for the Intcode computer.
+
+Like profiling, tracing is opt in. Attaching a tracer makes IntcodeComputer.resume pick
+IntcodeTracer.execute, an instrumented copy of the execution loop, when the run starts.
+Computers without a tracer run their regular loop and never touch this module.
+
+	tracer = IntcodeTracer(capacity=10000).attach(computer)
+	tracer.break_at(1024, lambda computer: computer.relative_base > 2000)
+	tracer.watch(392)
+
+	status, count = computer.run_for()
+	if status is Status.BREAKPOINT:
+		print(tracer.stopped, tracer.records()[-5:])
+
+A breakpoint stops the computer before the instruction at its address runs, a watchpoint
+right after an instruction writes to its address. Either way tracer.stopped tells which one
+it was, run_for reports Status.BREAKPOINT, and running again carries on from there. Runs that
+have no status to report (run_until_halt, run(), process_intcode, ...) raise BreakpointReached.
+Forks of a traced computer run without a tracer.
+
+Every instruction run (or only the ones trace_filter accepts) is recorded into a ring buffer
+holding the last `capacity` of them. Records are six 64 bit integers in an array:
+
+	instruction pointer, instruction value, three raw parameters (0 past the instruction's end), result
+
+The result is the value written for instructions that write (0 for writes that were dropped), the value output for outputs,
+the next instruction pointer for jumps and the relative base for adjustments. write() dumps
+the buffer in that binary form, oldest record first, and read_trace() loads it back.
+'''
+from array import array
+from collections import namedtuple
+
+from general.intcode_computer.main import UNLIMITED
+from general.intcode_computer.instructions import Opcode, Mode, INSTRUCTION_VALUES, WRITE_PARAMETERS
+
+TraceRecord = namedtuple("TraceRecord", [ "pointer", "instruction", "parameter_1", "parameter_2", "parameter_3", "result" ])
+
+RECORD_FIELDS = len(TraceRecord._fields)
+
+JUMPS = frozenset([ Opcode.JUMP_IF_TRUE, Opcode.JUMP_IF_FALSE ])
+
+# Range of values a record field holds, anything outside of it is clamped
+FIELD_MIN = -(1 << 63)
+FIELD_MAX = (1 << 63) - 1
+
+class IntcodeTracer:
+	'''
+	@param int capacity 		- Number of records the ring buffer keeps. 0 records nothing.
+	@param func trace_filter 	- Optional function of (computer, pointer, opcode) telling whether to record an instruction.
+	'''
+	def __init__(self, capacity=4096, trace_filter=None):
+		self.capacity = capacity
+		self.trace_filter = trace_filter
+		self.buffer = array("q", bytes(8 * RECORD_FIELDS * capacity))
+		# Records written since the start, the oldest ones of which have been written over
+		self.recorded = 0
+		# Conditions by breakpoint address, None for breakpoints that always stop
+		self.breakpoints = {}
+		self.watchpoints = set()
+		# ("breakpoint" or "watchpoint", address) of whatever stopped the last run, or None
+		self.stopped = None
+		# Breakpoint we stopped at, which the next run has to get past before stopping on it again
+		self.resume_pointer = None
+
+	def attach(self, computer):
+		computer.tracer = self
+		return self
+
+	def break_at(self, address, condition=None):
+		'''
+		Stops before the instruction at the address runs.
+
+		@param func condition - Optional function of the computer, only stopping when it returns True.
+		'''
+		self.breakpoints[address] = condition
+		return self
+
+	def watch(self, address):
+		'''
+		Stops right after an instruction writes to the address
+		'''
+		self.watchpoints.add(address)
+		return self
+
+	def clear(self):
+		self.breakpoints.clear()
+		self.watchpoints.clear()
+		self.resume_pointer = None
+		return self
+
+	def execute(self, computer, max_instructions=None):
+		'''
+		Same as IntcodeComputer.execute, checking breakpoints and watchpoints and recording every instruction
+		'''
+		computer.unshare_memory()
+		memory = computer.memory
+		decoded = computer.decoded
+		pointer = computer.instruction_pointer
+		budget = UNLIMITED if max_instructions is None else max_instructions
+		breakpoints = self.breakpoints
+		watchpoints = self.watchpoints
+		recording = self.capacity > 0
+		trace_filter = self.trace_filter
+		resumed = self.resume_pointer
+		self.resume_pointer = None
+		self.stopped = None
+		count = 0
+
+		while pointer is not None and count < budget:
+			if pointer in breakpoints and pointer != resumed:
+				condition = breakpoints[pointer]
+
+				if condition is None or condition(computer):
+					self.stopped = ( "breakpoint", pointer )
+					self.resume_pointer = pointer
+					break
+
+			resumed = None
+
+			try:
+				entry = decoded[pointer]
+			except KeyError:
+				entry = computer.decode_instruction(memory, pointer)
+
+			opcode = entry[1]
+			write_address = self.write_address(computer, memory, pointer, opcode, entry[2])
+			count += 1
+
+			try:
+				next_pointer = entry[0](computer, memory, pointer)
+			except IndexError:
+				next_pointer = computer.step(memory, pointer)
+
+			# Input that hasn't been queued yet, the instruction hasn't run
+			if computer.waiting_for_input:
+				count -= 1
+				pointer = next_pointer
+				continue
+
+			# Dropped writes didn't write anything, to watchpoints or the record
+			if write_address is not None and not self.stored(computer, memory, write_address):
+				write_address = None
+
+			if recording and (trace_filter is None or trace_filter(computer, pointer, opcode)):
+				self.record(computer, memory, pointer, opcode, entry[2], write_address, next_pointer)
+
+			pointer = next_pointer
+
+			if write_address in watchpoints:
+				self.stopped = ( "watchpoint", write_address )
+				break
+
+		if pointer is not None:
+			computer.instruction_pointer = pointer
+
+		computer.process_count += count
+		return count
+
+	def write_address(self, computer, memory, pointer, opcode, modes):
+		'''
+		Address the instruction at the pointer writes to, or None
+		'''
+		parameter = WRITE_PARAMETERS.get(opcode)
+
+		if parameter is None or pointer + parameter >= len(memory):
+			return None
+
+		address = memory[pointer + parameter]
+		if modes[parameter - 1] == Mode.RELATIVE:
+			address += computer.relative_base
+
+		return address
+
+	def stored(self, computer, memory, address):
+		'''
+		Whether a write to the address went through. Writes to negative addresses, and without
+		extra processing memory writes past the end of memory, are dropped (see IntcodeComputer.store).
+		'''
+		return address >= 0 and (address < len(memory) or computer.extra_processing_memory)
+
+	def record(self, computer, memory, pointer, opcode, modes, write_address, next_pointer):
+		values = INSTRUCTION_VALUES[opcode]
+		parameters = [ memory[address] if address < len(memory) else 0 for address in range(pointer + 1, pointer + values) ]
+		parameters += [0] * (3 - len(parameters))
+
+		if write_address is not None:
+			result = computer.read(memory, write_address)
+		elif opcode == Opcode.OUTPUT:
+			result = computer.get_parameter_value(parameters[0], memory, modes[0])
+		elif opcode in JUMPS:
+			result = next_pointer
+		elif opcode == Opcode.ADJUST:
+			result = computer.relative_base
+		else:
+			result = 0
+
+		fields = ( pointer, memory[pointer], parameters[0], parameters[1], parameters[2], result )
+		start = (self.recorded % self.capacity) * RECORD_FIELDS
+
+		try:
+			self.buffer[start:start + RECORD_FIELDS] = array("q", fields)
+		except OverflowError:
+			self.buffer[start:start + RECORD_FIELDS] = array("q", [ min(max(field, FIELD_MIN), FIELD_MAX) for field in fields ])
+
+		self.recorded += 1
+
+	def ordered_buffer(self):
+		'''
+		Records in the ring buffer as a flat array, oldest first
+		'''
+		if self.recorded <= self.capacity:
+			return self.buffer[:self.recorded * RECORD_FIELDS]
+
+		split = (self.recorded % self.capacity) * RECORD_FIELDS
+		return self.buffer[split:] + self.buffer[:split]
+
+	def records(self):
+		'''
+		Returns the list of TraceRecords in the ring buffer, oldest first
+		'''
+		return unpack(self.ordered_buffer())
+
+	def write(self, filename):
+		with open(filename, "wb") as f:
+			self.ordered_buffer().tofile(f)
+
+def unpack(buffer):
+	return [ TraceRecord(*buffer[start:start + RECORD_FIELDS]) for start in range(0, len(buffer), RECORD_FIELDS) ]
+
+def read_trace(filename):
+	'''
+	Returns the list of TraceRecords written to the file by IntcodeTracer.write
+	'''
+	buffer = array("q")
+
+	with open(filename, "rb") as f:
+		buffer.frombytes(f.read())
+
+	return unpack(buffer)
+
+if __name__ == '__main__':
+	import os
+	import tempfile
+
+	from general.intcode_computer.main import IntcodeComputer, Status, BreakpointReached
+
+	counter = "3,16,4,16,1001,16,1,16,1008,16,3,17,1006,17,0,99,0,0"
+
+	''' Breakpoints stop before their instruction, and running again carries on '''
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.break_at(4)
+	assert computer.run_for(None, [1, 5, 2], False) == (Status.BREAKPOINT, 2)
+	assert tracer.stopped == ( "breakpoint", 4 ) and computer.instruction_pointer == 4
+	assert computer.take_outputs() == [1]
+	assert computer.run_for(None, None, False) == (Status.BREAKPOINT, 5)
+	tracer.clear()
+	assert computer.run_for(None, None, False) == (Status.HALTED, 9)
+	assert computer.take_outputs() == [5, 2]
+
+	# Conditional breakpoints only stop when their condition holds
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.break_at(2, lambda computer: computer.memory[16] == 2)
+	assert computer.run_for(None, [1, 5, 2], False)[0] is Status.BREAKPOINT
+	assert computer.take_outputs() == [1, 5]
+
+	''' Runs without a status raise, leaving output on the computer for when they carry on '''
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.break_at(4)
+
+	try:
+		computer.run_until_halt([1, 5, 2])
+		assert False
+	except BreakpointReached as stop:
+		assert stop.stopped == ( "breakpoint", 4 )
+
+	tracer.clear()
+	assert computer.run_until_halt() == [1, 5, 2]
+
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.break_at(4)
+	outputs = computer.run([1, 5, 2])
+	assert next(outputs) == 1
+
+	try:
+		next(outputs)
+		assert False
+	except BreakpointReached:
+		pass
+
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.break_at(4)
+	computer.queue_input([1, 5, 2])
+	assert computer.process_intcode() == 1
+
+	try:
+		computer.process_intcode()
+		assert False
+	except BreakpointReached:
+		pass
+
+	assert computer.process_intcode() == 5
+
+	# Forks run without the tracer, restoring a snapshot keeps it
+	snapshot = computer.snapshot()
+	assert snapshot.tracer is None
+	assert snapshot.run_until_halt() == [2] and tracer.stopped is None
+	computer.restore(snapshot)
+	assert computer.tracer is tracer
+
+	''' Watchpoints stop after their address is written to '''
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.watch(17)
+	assert computer.run_for(None, [1, 5, 2], False) == (Status.BREAKPOINT, 4)
+	assert tracer.stopped == ( "watchpoint", 17 ) and computer.instruction_pointer == 12
+
+	# Writes that get dropped don't count, only the one that lands does
+	computer = IntcodeComputer("1101,1,2,100,1101,3,4,100,99", True, True, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.watch(100)
+	assert computer.run_for() == (Status.HALTED, 3) and tracer.stopped is None
+
+	computer = IntcodeComputer("1101,1,2,-1,99", True, True, True, False, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.watch(-1)
+	assert computer.run_for() == (Status.HALTED, 2) and tracer.stopped is None
+
+	computer = IntcodeComputer("1101,1,2,100,1101,3,4,100,99", True, True, True, False, True)
+	tracer = IntcodeTracer().attach(computer)
+	tracer.watch(100)
+	assert computer.run_for() == (Status.BREAKPOINT, 1) and tracer.stopped == ( "watchpoint", 100 )
+
+	''' The ring buffer keeps the last records '''
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer(capacity=3).attach(computer)
+	assert computer.run_until_halt([1, 5, 2]) == [1, 5, 2]
+	assert tracer.recorded == computer.process_count == 16
+	assert tracer.records() == [
+		TraceRecord(8, 1008, 16, 3, 17, 1),
+		TraceRecord(12, 1006, 17, 0, 0, 15),
+		TraceRecord(15, 99, 0, 0, 0, 0),
+	]
+
+	# Filters pick which instructions get recorded
+	computer = IntcodeComputer(counter, True, True, True)
+	tracer = IntcodeTracer(trace_filter=lambda computer, pointer, opcode: opcode == Opcode.OUTPUT).attach(computer)
+	computer.run_until_halt([1, 5, 2])
+	assert [ record.result for record in tracer.records() ] == [1, 5, 2]
+
+	''' Traced runs give the same results as plain ones, and traces survive a round trip to disk '''
+	with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "day_9", "input.txt")) as f:
+		instructions = f.read()
+
+	plain = IntcodeComputer(instructions, True, True, True, False, True)
+	traced = IntcodeComputer(instructions, True, True, True, False, True)
+	tracer = IntcodeTracer(capacity=1000).attach(traced)
+	assert traced.run_until_halt([2]) == plain.run_until_halt([2])
+	assert traced.process_count == plain.process_count == tracer.recorded
+
+	with tempfile.TemporaryDirectory() as directory:
+		tracer.write(os.path.join(directory, "day_9.trace"))
+		assert os.path.getsize(os.path.join(directory, "day_9.trace")) == 1000 * RECORD_FIELDS * 8
+		assert read_trace(os.path.join(directory, "day_9.trace")) == tracer.records()
+
+	assert tracer.records()[-1].instruction == 99